@@ -1,27 +1,59 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, send_from_directory, g, abort
 from flask_cors import CORS
-from database import db
-from models import User, WordBook, Word, UserWordProgress, UserWordMistake, DeviceAuth
+from database import db, init_db
+from config import config
+from models import User, WordBook, Word, WordBookUnit, UserWordProgress, UserWordMistake, ReviewSchedule, DeviceAuth, ImportJob
+from grading import MODE_A, MODE_B, grade_answers
+from scheduling import due_reviews
+from pagination import InvalidCursor, keyset_page
+from word_cache import get_unit_words, invalidate_wordbook, cache_stats
+from word_edits import VersionConflict, WordPatchError, apply_patch, delete_words, move_words
+from conditional import bump_progress_version, conditional_get, wordbook_list_version, wordbook_version
+import metrics
+import assets
+import template_cache
+from template_cache import deferred
+from unit_bundles import bundle_response
+import unit_catalog
+from logging_setup import ANSWER_LOGGER, configure_logging
+from import_jobs import has_active_job, submit_import_job, job_status
+import device_auth_cache
+from passwords import PasswordServiceBusy, hash_password, verify_password
 import re
+import atexit
+import functools
 import datetime
 import os
 import logging
-import math
-import random
-import csv
-import io
 
-# 配置日志
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
+# 逐题提交的日志量很大，单独的logger便于采样
+answer_logger = logging.getLogger(ANSWER_LOGGER)
 
 app = Flask(__name__)
 CORS(app, origins='*', supports_credentials=True)  # 允许所有来源的跨域请求
-app.config['SECRET_KEY'] = os.urandom(24)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:////home/ubuntu/PyProjects/vocabapp/wordbook.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
+# 通过 FLASK_CONFIG 选择配置（development/production），默认使用生产配置
+app.config.from_object(config[os.environ.get('FLASK_CONFIG', 'production')])
+# 配置日志
+configure_logging(app)
+init_db(app)
+with app.app_context():
+    metrics.init_metrics(app, db.engine)
+# 静态资源指纹化和预压缩，模板通过 asset_url() 引用
+assets.init_assets(app)
+# 模板字节码缓存（工作进程启动即复用已编译模板）和按版本号缓存的 {% cache %} 片段
+template_cache.init_template_cache(app)
+
+# 退出前写入尚未落库的设备 last_used
+@atexit.register
+def flush_device_last_used():
+    with app.app_context():
+        device_auth_cache.flush_last_used(force=True)
+
+# 时间在数据库中以DateTime存储，仅在页面展示时格式化
+@app.template_filter('datetime')
+def format_datetime(value, fmt='%Y-%m-%d %H:%M:%S'):
+    return value.strftime(fmt) if value else ''
 
 # 输入验证正则表达式
 USERNAME_PATTERN = r'^[a-zA-Z0-9_]+$'
@@ -29,21 +61,21 @@ EMAIL_PATTERN = r'^[\w\.-]+@[\w\.-]+\.\w+$'
 
 # 检查登录状态的装饰器
 def login_required(f):
+    @functools.wraps(f)
     def wrap(*args, **kwargs):
         if 'user_id' not in session:
             return redirect(url_for('login'))
         return f(*args, **kwargs)
-    wrap.__name__ = f.__name__
     return wrap
 
 # 检查管理员权限
 def admin_required(f):
+    @functools.wraps(f)
     def wrap(*args, **kwargs):
         if 'username' not in session or session['username'] != 'admin':
             logger.warning('Unauthorized access attempt')
             return jsonify({'error': '需要管理员权限'}), 403
         return f(*args, **kwargs)
-    wrap.__name__ = f.__name__
     return wrap
 
 @app.route('/')
@@ -59,40 +91,42 @@ def register():
     if request.method == 'POST':
         logger.debug('Processing POST request for /register')
         data = request.form
-        logger.debug(f'Form data: {data}')
         username = data.get('username')
         password = data.get('password')
         email = data.get('email', '').strip()
         if not username or len(username) > 20 or not re.match(USERNAME_PATTERN, username):
-            logger.warning(f'Invalid username: {username}')
+            logger.warning('Invalid username: %s', username)
             return jsonify({'error': '用户名必须为1-20字符，仅限字母、数字、下划线'}), 400
         if not password or len(password) < 6 or len(password) > 128:
             logger.warning('Invalid password length')
             return jsonify({'error': '密码必须为6-128字符'}), 400
         if email and (len(email) > 20 or not re.match(EMAIL_PATTERN, email)):
-            logger.warning(f'Invalid email: {email}')
+            logger.warning('Invalid email: %s', email)
             return jsonify({'error': '邮箱格式无效或超过20字符'}), 400
         with app.app_context():
             try:
                 if User.query.filter_by(username=username).first():
-                    logger.warning(f'Username already exists: {username}')
+                    logger.warning('Username already exists: %s', username)
                     return jsonify({'error': '用户名已存在'}), 400
                 if email and User.query.filter_by(email=email).first():
-                    logger.warning(f'Email already exists: {email}')
+                    logger.warning('Email already exists: %s', email)
                     return jsonify({'error': '邮箱已存在'}), 400
-                password_hash = generate_password_hash(password)
+                password_hash = hash_password(password)
                 new_user = User(
                     username=username,
                     password_hash=password_hash,
                     email=email or None,
-                    created_at=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    created_at=datetime.datetime.now()
                 )
                 db.session.add(new_user)
                 db.session.commit()
-                logger.info(f'User registered successfully: {username}')
+                logger.info('User registered successfully: %s', username)
                 return jsonify({'message': '注册成功，请登录'}), 200
+            except PasswordServiceBusy:
+                logger.warning('Password service busy during registration')
+                return jsonify({'error': '当前请求较多，请稍后重试'}), 503
             except Exception as e:
-                logger.error(f'Error during registration: {str(e)}')
+                logger.error('Error during registration: %s', e)
                 return jsonify({'error': '服务器错误，请稍后重试'}), 500
     logger.debug('Rendering register.html')
     return render_template('register.html')
@@ -109,7 +143,6 @@ def login():
         else:
             data = request.form
             
-        logger.debug(f'Received data: {data}')
         username = data.get('username')
         password = data.get('password')
         device_fingerprint = data.get('device_fingerprint')
@@ -122,37 +155,37 @@ def login():
         with app.app_context():
             try:
                 user = User.query.filter_by(username=username).first()
-                if not user or not check_password_hash(user.password_hash, password):
-                    logger.warning(f'Login failed for username: {username}')
+                password_ok, new_hash = verify_password(user.password_hash, password) if user else (False, None)
+                if not password_ok:
+                    logger.warning('Login failed for username: %s', username)
                     return jsonify({'error': '用户名或密码错误'}), 401
+                if new_hash:
+                    # 哈希参数已调整，用本次登录的明文密码升级存储的哈希
+                    user.password_hash = new_hash
+                    db.session.commit()
                 
                 session['user_id'] = user.id
                 session['username'] = user.username
-                logger.info(f'User logged in: {username}')
+                logger.info('User logged in: %s', username)
                 
                 # 如果提供了设备指纹，创建或更新设备授权
                 if device_fingerprint:
                     auth_token = generate_auth_token()
+                    digest = device_auth_cache.fingerprint_digest(device_fingerprint)
                     
-                    # 首先检查该设备指纹是否已被其他用户使用
-                    existing_device_auth = DeviceAuth.query.filter_by(
-                        device_fingerprint=device_fingerprint,
-                        is_active=1
+                    # 设备指纹全局唯一：同一设备只有一条授权记录
+                    device_auth = DeviceAuth.query.filter_by(
+                        fingerprint_digest=digest
                     ).first()
                     
-                    current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    current_time = datetime.datetime.now()
                     
-                    if existing_device_auth and existing_device_auth.user_id != user.id:
-                        # 设备指纹已被其他用户使用，先禁用旧的授权
-                        logger.warning(f'Device fingerprint {device_fingerprint[:16]}... was associated with user {existing_device_auth.user_id}, now reassigning to user {user.id}')
-                        existing_device_auth.is_active = 0
+                    if device_auth and device_auth.user_id != user.id:
+                        # 设备指纹已被其他用户使用，将授权转移给当前用户（令牌随之更换）
+                        logger.warning('Device fingerprint %s... was associated with user %s, now reassigning to user %s', device_fingerprint[:16], device_auth.user_id, user.id)
+                        device_auth.user_id = user.id
                     
                     # 创建或更新当前用户的设备授权
-                    device_auth = DeviceAuth.query.filter_by(
-                        user_id=user.id,
-                        device_fingerprint=device_fingerprint
-                    ).first()
-                    
                     if device_auth:
                         device_auth.auth_token = auth_token
                         device_auth.last_used = current_time
@@ -161,7 +194,7 @@ def login():
                     else:
                         device_auth = DeviceAuth(
                             user_id=user.id,
-                            device_fingerprint=device_fingerprint,
+                            fingerprint_digest=digest,
                             device_name=device_name,
                             auth_token=auth_token,
                             created_at=current_time,
@@ -171,11 +204,16 @@ def login():
                         db.session.add(device_auth)
                     
                     db.session.commit()
-                    logger.info(f'Device auth updated for user {user.username} with fingerprint {device_fingerprint[:16]}...')
+                    # 令牌已更新或设备已重新分配，旧的缓存条目作废
+                    device_auth_cache.invalidate(digest)
+                    logger.info('Device auth updated for user %s with fingerprint %s...', user.username, device_fingerprint[:16])
                     
                 return jsonify({'message': '登录成功'}), 200
+            except PasswordServiceBusy:
+                logger.warning('Password service busy during login')
+                return jsonify({'error': '当前登录人数较多，请稍后重试'}), 503
             except Exception as e:
-                logger.error(f'Error during login: {str(e)}')
+                logger.error('Error during login: %s', e)
                 return jsonify({'error': '服务器错误，请稍后重试'}), 500
     logger.debug('Rendering login.html')
     return render_template('login.html')
@@ -196,30 +234,36 @@ def check_device_auth():
         
     with app.app_context():
         try:
-            device_auth = DeviceAuth.query.filter_by(
-                device_fingerprint=device_fingerprint,
-                is_active=1
-            ).first()
+            digest = device_auth_cache.fingerprint_digest(device_fingerprint)
+            cached = device_auth_cache.get_cached(digest)
+            if cached is None:
+                device_auth = DeviceAuth.query.filter_by(
+                    fingerprint_digest=digest,
+                    is_active=1
+                ).first()
+                user = User.query.get(device_auth.user_id) if device_auth else None
+                if user:
+                    cached = device_auth_cache.store(digest, device_auth, user)
+            
+            if cached:
+                session['user_id'] = cached.user_id
+                session['username'] = cached.username
+                # last_used 合并后定期批量写入，自动登录本身不再产生写事务
+                device_auth_cache.touch(cached.device_auth_id)
+                device_auth_cache.flush_last_used()
+                logger.info('Auto-login successful for user: %s with device fingerprint: %s...', cached.username, device_fingerprint[:16])
+                return jsonify({'success': True, 'token': cached.auth_token})
             
             if device_auth:
-                user = User.query.get(device_auth.user_id)
-                if user:
-                    session['user_id'] = user.id
-                    session['username'] = user.username
-                    device_auth.last_used = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    db.session.commit()
-                    logger.info(f'Auto-login successful for user: {user.username} with device fingerprint: {device_fingerprint[:16]}...')
-                    return jsonify({'success': True, 'token': device_auth.auth_token})
-                else:
-                    # 用户不存在，禁用此设备授权
-                    device_auth.is_active = 0
-                    db.session.commit()
-                    logger.warning(f'Device auth found but user not found for fingerprint: {device_fingerprint[:16]}...')
+                # 用户不存在，禁用此设备授权
+                device_auth.is_active = 0
+                db.session.commit()
+                logger.warning('Device auth found but user not found for fingerprint: %s...', device_fingerprint[:16])
             
-            logger.debug(f'No active device auth found for fingerprint: {device_fingerprint[:16]}...')
+            logger.debug('No active device auth found for fingerprint: %s...', device_fingerprint[:16])
             return jsonify({'success': False})
         except Exception as e:
-            logger.error(f'Error checking device auth: {str(e)}')
+            logger.error('Error checking device auth: %s', e)
             return jsonify({'error': '服务器错误'}), 500
 
 def generate_auth_token():
@@ -230,24 +274,46 @@ def generate_auth_token():
 @app.route('/logout')
 def logout():
     logger.debug('User logging out')
+    if 'user_id' in session:
+        device_auth_cache.invalidate_user(session['user_id'])
     session.clear()
     return redirect(url_for('login'))
 
+WORDBOOK_LIST_PER_PAGE = 20
+WORDBOOK_LIST_MAX_PER_PAGE = 100
+
 @app.route('/wordbook/list')
 @login_required
+@conditional_get(wordbook_list_version)
 def wordbook_list():
     logger.debug('Accessing wordbook list')
+    limit = min(max(request.args.get('limit', WORDBOOK_LIST_PER_PAGE, type=int), 1), WORDBOOK_LIST_MAX_PER_PAGE)
+    cursor = request.args.get('cursor')
     with app.app_context():
-        wordbooks = WordBook.query.order_by(WordBook.created_at.desc()).all()
+        try:
+            wordbooks, next_cursor = keyset_page(WordBook.query, [WordBook.created_at, WordBook.id], cursor, limit)
+        except InvalidCursor as e:
+            logger.warning('Invalid wordbook list cursor: %s', cursor)
+            return jsonify({'error': str(e)}), 400
+        if request.args.get('format') == 'json':
+            return jsonify({
+                'wordbooks': [{
+                    'id': wordbook.id,
+                    'title': wordbook.title,
+                    'created_at': wordbook.created_at.isoformat(timespec='seconds')
+                } for wordbook in wordbooks],
+                'next_cursor': next_cursor
+            }), 200
         is_admin = session['username'] == 'admin'
-        return render_template('wordbook_list.html', wordbooks=wordbooks, is_admin=is_admin)
+        return render_template('wordbook_list.html', wordbooks=wordbooks, is_admin=is_admin,
+                               next_cursor=next_cursor, limit=limit)
 
 @app.route('/wordbook/import_csv/<int:wordbook_id>', methods=['POST'])
 @login_required
 @admin_required
 def import_csv_words(wordbook_id):
     """管理员导入CSV格式的单词数据"""
-    logger.debug(f'Received CSV import request for wordbook {wordbook_id}')
+    logger.debug('Received CSV import request for wordbook %s', wordbook_id)
     
     if 'csv_file' not in request.files:
         logger.warning('No CSV file uploaded')
@@ -259,142 +325,31 @@ def import_csv_words(wordbook_id):
         return jsonify({'error': '请选择CSV文件'}), 400
     
     if not file.filename.endswith('.csv'):
-        logger.warning(f'Invalid file type: {file.filename}')
+        logger.warning('Invalid file type: %s', file.filename)
         return jsonify({'error': '请上传CSV格式的文件'}), 400
     
-    try:
-        # 读取CSV文件内容
-        content = file.read()
-        logger.info(f'文件大小: {len(content)} 字节')
-        
-        # 尝试不同的编码
-        encodings = ['utf-8', 'utf-8-sig', 'gbk', 'gb2312']
-        decoded_content = None
-        
-        for encoding in encodings:
-            try:
-                decoded_content = content.decode(encoding)
-                logger.info(f'成功使用 {encoding} 编码解码')
-                break
-            except UnicodeDecodeError:
-                logger.warning(f'无法使用 {encoding} 编码解码')
-                continue
-        
-        if decoded_content is None:
-            logger.error('无法解码文件内容')
-            return jsonify({'error': '文件编码不支持，请使用UTF-8编码保存CSV文件'}), 400
-        
-        # 移除BOM头（如果存在）
-        if decoded_content.startswith('\ufeff'):
-            decoded_content = decoded_content[1:]
-            logger.info('移除BOM头')
-        
-        logger.info(f'文件内容前100字符: {repr(decoded_content[:100])}')
-        
-        csv_reader = csv.reader(io.StringIO(decoded_content))
-        
-        # 跳过标题行
-        headers = next(csv_reader, None)
-        if not headers or len(headers) < 3:
-            logger.warning('Invalid CSV format')
-            return jsonify({'error': 'CSV格式错误，至少需要3列数据'}), 400
-        
-        # 验证CSV格式
-        expected_headers = ['unit', 'english', 'chinese']
-        headers_lower = [h.lower().strip() for h in headers]
-        logger.info(f'CSV headers: {headers}')
-        logger.info(f'Headers lower: {headers_lower}')
-        logger.info(f'Expected headers: {expected_headers}')
-        
-        if not all(h.lower() in headers_lower for h in expected_headers):
-            missing_headers = [h for h in expected_headers if h.lower() not in headers_lower]
-            logger.warning(f'Invalid CSV headers: {headers}')
-            logger.warning(f'Missing headers: {missing_headers}')
-            return jsonify({'error': f'CSV标题行必须包含：unit, english, chinese。缺少：{missing_headers}'}), 400
-        
-        # 获取列索引
-        unit_idx = next((i for i, h in enumerate(headers) if h.lower().strip() == 'unit'), 0)
-        english_idx = next((i for i, h in enumerate(headers) if h.lower().strip() == 'english'), 1)
-        chinese_idx = next((i for i, h in enumerate(headers) if h.lower().strip() == 'chinese'), 2)
-        
-        imported_count = 0
-        errors = []
-        
-        with app.app_context():
-            wordbook = WordBook.query.get_or_404(wordbook_id)
-            
-            for row_num, row in enumerate(csv_reader, 2):  # 从第2行开始计数
-                try:
-                    if len(row) < 3:
-                        errors.append(f'第{row_num}行：数据不完整')
-                        continue
-                    
-                    unit = row[unit_idx].strip()
-                    english = row[english_idx].strip()
-                    chinese = row[chinese_idx].strip()
-                    
-                    # 验证数据
-                    if not unit or len(unit) > 50:
-                        errors.append(f'第{row_num}行：单元名称必须在1-50字符之间')
-                        continue
-                    
-                    if not english or len(english) > 50:
-                        errors.append(f'第{row_num}行：英文单词必须在1-50字符之间')
-                        continue
-                    
-                    if not chinese or len(chinese) > 50:
-                        errors.append(f'第{row_num}行：中文释义必须在1-50字符之间')
-                        continue
-                    
-                    # 检查是否已存在相同的单词
-                    existing_word = Word.query.filter_by(
-                        wordbook_id=wordbook_id,
-                        unit=unit,
-                        english=english,
-                        chinese=chinese
-                    ).first()
-                    
-                    if existing_word:
-                        errors.append(f'第{row_num}行：该单词已存在')
-                        continue
-                    
-                    # 创建新单词
-                    new_word = Word(
-                        wordbook_id=wordbook_id,
-                        unit=unit,
-                        english=english,
-                        chinese=chinese,
-                        created_at=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    )
-                    db.session.add(new_word)
-                    imported_count += 1
-                    
-                except Exception as e:
-                    logger.error(f'Error processing row {row_num}: {str(e)}')
-                    errors.append(f'第{row_num}行：处理错误 - {str(e)}')
-                    continue
-            
-            if imported_count > 0:
-                db.session.commit()
-                logger.info(f'Successfully imported {imported_count} words for wordbook {wordbook_id}')
-            else:
-                db.session.rollback()
-                
-        # 返回结果
-        result = {
-            'message': f'成功导入 {imported_count} 个单词',
-            'imported_count': imported_count,
-            'errors': errors
-        }
-        
-        if errors:
-            result['message'] += f'，遇到 {len(errors)} 个错误'
-            
-        return jsonify(result), 200
-        
-    except Exception as e:
-        logger.error(f'Error during CSV import: {str(e)}')
-        return jsonify({'error': f'导入失败：{str(e)}'}), 500
+    with app.app_context():
+        WordBook.query.get_or_404(wordbook_id)
+        try:
+            job_id = submit_import_job(app, wordbook_id, file)
+        except Exception as e:
+            logger.error('Error creating import job: %s', e)
+            db.session.rollback()
+            return jsonify({'error': f'导入失败：{str(e)}'}), 500
+    return jsonify({
+        'message': '导入任务已提交，正在后台处理',
+        'job_id': job_id,
+        'status_url': url_for('import_job_status', job_id=job_id)
+    }), 202
+
+@app.route('/wordbook/import_csv/job/<job_id>', methods=['GET'])
+@login_required
+@admin_required
+def import_job_status(job_id):
+    """查询后台导入任务的进度"""
+    with app.app_context():
+        job = ImportJob.query.get_or_404(job_id)
+        return jsonify(job_status(job)), 200
 
 @app.route('/wordbook/create', methods=['GET', 'POST'])
 @login_required
@@ -403,144 +358,232 @@ def wordbook_create():
     logger.debug('Received request to /wordbook/create')
     if request.method == 'POST':
         data = request.form
-        logger.debug(f'Form data: {data}')
         title = data.get('title', '').strip()
         if not title or len(title) > 100:
-            logger.warning(f'Invalid title: {title}')
+            logger.warning('Invalid title: %s', title)
             return jsonify({'error': '标题必须为1-100字符'}), 400
         with app.app_context():
             try:
                 if WordBook.query.filter_by(title=title).first():
-                    logger.warning(f'Title already exists: {title}')
+                    logger.warning('Title already exists: %s', title)
                     return jsonify({'error': '单词书标题已存在'}), 400
                 new_wordbook = WordBook(
                     title=title,
-                    created_at=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    created_at=datetime.datetime.now()
                 )
                 db.session.add(new_wordbook)
                 db.session.commit()
-                logger.info(f'Wordbook created: {title}')
+                logger.info('Wordbook created: %s', title)
                 return jsonify({'message': '单词书创建成功', 'wordbook_id': new_wordbook.id}), 200
             except Exception as e:
-                logger.error(f'Error creating wordbook: {str(e)}')
+                logger.error('Error creating wordbook: %s', e)
                 return jsonify({'error': '服务器错误，请稍后重试'}), 500
     return render_template('wordbook_form_with_import.html', mode='create')
 
+WORDBOOK_EDIT_PAGE_SIZE = 100
+WORDBOOK_EDIT_MAX_PAGE_SIZE = 500
+WORD_FIELD_PATTERN = re.compile(r'^words\[(\d+)\]\[\w+\]$')
+
 @app.route('/wordbook/<int:id>/edit', methods=['GET', 'POST'])
 @login_required
 @admin_required
 def wordbook_edit(id):
-    logger.debug(f'Received request to /wordbook/{id}/edit')
+    logger.debug('Received request to /wordbook/%s/edit', id)
     with app.app_context():
         wordbook = WordBook.query.get_or_404(id)
         if request.method == 'POST':
             data = request.form
-            logger.debug(f'Form data: {data}')
             title = data.get('title', '').strip()
             words_data = []
-            delete_words = data.getlist('delete_words')
-            i = 0
-            while f'words[{i}][unit]' in data:
+            try:
+                delete_ids = {int(word_id) for word_id in data.getlist('delete_words')}
+            except ValueError:
+                logger.warning('Invalid delete_words: %s', data.getlist('delete_words'))
+                return jsonify({'error': '无效的单词ID'}), 400
+            # 编辑器分批加载单词、也可删除卡片，序号不一定连续，按出现的序号排序解析
+            indices = sorted({int(m.group(1)) for m in map(WORD_FIELD_PATTERN.match, data.keys()) if m})
+            for i in indices:
                 words_data.append({
                     'id': data.get(f'words[{i}][id]', ''),
                     'unit': data.get(f'words[{i}][unit]', '').strip(),
                     'english': data.get(f'words[{i}][english]', '').strip(),
                     'chinese': data.get(f'words[{i}][chinese]', '').strip()
                 })
-                i += 1
             if not title or len(title) > 100:
-                logger.warning(f'Invalid title: {title}')
+                logger.warning('Invalid title: %s', title)
                 return jsonify({'error': '标题必须为1-100字符'}), 400
             if title != wordbook.title and WordBook.query.filter_by(title=title).first():
-                logger.warning(f'Title already exists: {title}')
+                logger.warning('Title already exists: %s', title)
                 return jsonify({'error': '单词书标题已存在'}), 400
             for idx, word in enumerate(words_data, 1):
                 if not word['unit'] or len(word['unit']) > 50:
-                    logger.warning(f'Invalid unit at index {idx}')
+                    logger.warning('Invalid unit at index %s', idx)
                     return jsonify({'error': f'第{idx}个单词的单元必须为1-50字符'}), 400
                 if not word['english'] or len(word['english']) > 50:
-                    logger.warning(f'Invalid english at index {idx}')
+                    logger.warning('Invalid english at index %s', idx)
                     return jsonify({'error': f'第{idx}个单词的英文必须为1-50字符'}), 400
                 if not word['chinese'] or len(word['chinese']) > 50:
-                    logger.warning(f'Invalid chinese at index {idx}')
+                    logger.warning('Invalid chinese at index %s', idx)
                     return jsonify({'error': f'第{idx}个单词的中文必须为1-50字符'}), 400
             try:
                 wordbook.title = title
-                if delete_words:
-                    Word.query.filter(Word.id.in_(delete_words)).delete()
+                wordbook.version += 1
+                version = wordbook.version
+                if delete_ids:
+                    # 只删除属于本单词书的单词，连同其错题和复习计划（与 PATCH 接口一致）
+                    delete_words(id, delete_ids)
+                # 一次加载本单词书的全部单词，避免逐个按ID查询
+                existing_words = {str(word.id): word for word in Word.query.filter_by(wordbook_id=id)}
+                new_words = []
+                moved_units = {}
                 for word_data in words_data:
                     if word_data['id']:
-                        word = Word.query.get(word_data['id'])
+                        word = existing_words.get(word_data['id'])
                         if word:
+                            if word.unit != word_data['unit']:
+                                moved_units[word.id] = word_data['unit']
                             word.unit = word_data['unit']
                             word.english = word_data['english']
                             word.chinese = word_data['chinese']
                     else:
-                        new_word = Word(
-                            wordbook_id=wordbook.id,
-                            unit=word_data['unit'],
-                            english=word_data['english'],
-                            chinese=word_data['chinese'],
-                            created_at=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        )
-                        db.session.add(new_word)
+                        new_words.append({
+                            'wordbook_id': wordbook.id,
+                            'unit': word_data['unit'],
+                            'english': word_data['english'],
+                            'chinese': word_data['chinese'],
+                            'created_at': datetime.datetime.now()
+                        })
+                if new_words:
+                    # 新单词用一条 executemany 批量插入
+                    db.session.execute(Word.__table__.insert(), new_words)
+                # 换单元的单词同步其错题和复习计划的单元（与 PATCH 接口一致）
+                move_words(id, moved_units)
+                unit_catalog.rebuild(id)
                 db.session.commit()
-                logger.info(f'Wordbook {id} updated')
-                return jsonify({'message': '单词书更新成功'}), 200
+                invalidate_wordbook(id)
+                logger.info('Wordbook %s updated', id)
+                return jsonify({'message': '单词书更新成功', 'version': version}), 200
             except Exception as e:
-                logger.error(f'Error updating wordbook: {str(e)}')
+                logger.error('Error updating wordbook: %s', e)
                 db.session.rollback()
                 return jsonify({'error': '服务器错误，请稍后重试'}), 500
-        words = Word.query.filter_by(wordbook_id=id).all()
-        return render_template('wordbook_edit.html', wordbook=wordbook, words=words)
+        # 编辑页只渲染第一页单词，其余由前端滚动时通过 wordbook_words 分批加载
+        words, next_cursor = keyset_page(Word.query.filter_by(wordbook_id=id), [Word.id], limit=WORDBOOK_EDIT_PAGE_SIZE,
+                                         descending=False)
+        return render_template('wordbook_edit.html', wordbook=wordbook, words=words, next_cursor=next_cursor)
+
+@app.route('/wordbook/<int:id>/words', methods=['GET'])
+@login_required
+@admin_required
+def wordbook_words(id):
+    """编辑器按ID游标分批加载单词"""
+    limit = min(max(request.args.get('limit', WORDBOOK_EDIT_PAGE_SIZE, type=int), 1), WORDBOOK_EDIT_MAX_PAGE_SIZE)
+    cursor = request.args.get('cursor')
+    with app.app_context():
+        try:
+            words, next_cursor = keyset_page(Word.query.filter_by(wordbook_id=id), [Word.id], cursor, limit,
+                                             descending=False)
+        except InvalidCursor as e:
+            logger.warning('Invalid word list cursor: %s', cursor)
+            return jsonify({'error': str(e)}), 400
+        return jsonify({
+            'words': [{'id': w.id, 'unit': w.unit, 'english': w.english, 'chinese': w.chinese} for w in words],
+            'next_cursor': next_cursor
+        }), 200
+
+@app.route('/wordbook/<int:id>/words', methods=['PATCH'])
+@login_required
+@admin_required
+def wordbook_words_patch(id):
+    """编辑器只提交变化的单词（修改/新增/删除），在一个事务内批量应用"""
+    logger.debug('Received PATCH request to /wordbook/%s/words', id)
+    with app.app_context():
+        wordbook = WordBook.query.get_or_404(id)
+        try:
+            version = apply_patch(wordbook, request.get_json(silent=True))
+            db.session.commit()
+        except WordPatchError as e:
+            db.session.rollback()
+            logger.warning('Invalid word patch for wordbook %s: %s', id, e)
+            return jsonify({'error': str(e)}), 400
+        except VersionConflict as e:
+            db.session.rollback()
+            logger.warning('Stale word patch for wordbook %s (current version %s)', id, e.current_version)
+            return jsonify({'error': '单词书已被修改，请刷新后重试', 'version': e.current_version}), 409
+        except Exception as e:
+            logger.error('Error patching wordbook: %s', e)
+            db.session.rollback()
+            return jsonify({'error': '服务器错误，请稍后重试'}), 500
+        invalidate_wordbook(id)
+        return jsonify({'message': '单词书更新成功', 'version': version}), 200
 
 @app.route('/wordbook/<int:id>/delete', methods=['POST'])
 @login_required
 @admin_required
 def wordbook_delete(id):
-    logger.debug(f'Received request to delete wordbook {id}')
+    logger.debug('Received request to delete wordbook %s', id)
     with app.app_context():
         wordbook = WordBook.query.get_or_404(id)
+        if has_active_job(id):
+            logger.warning('Refusing to delete wordbook %s while an import job is active', id)
+            return jsonify({'error': '单词书正在导入单词，请等待导入完成后再删除'}), 409
         try:
+            # 按单词书批量删除关联数据，避免ORM级联逐条加载单词及其错题
+            for model in (UserWordMistake, ReviewSchedule, UserWordProgress, ImportJob, WordBookUnit, Word):
+                model.query.filter_by(wordbook_id=id).delete(synchronize_session=False)
             db.session.delete(wordbook)
             db.session.commit()
-            logger.info(f'Wordbook {id} deleted')
+            invalidate_wordbook(id)
+            logger.info('Wordbook %s deleted', id)
             return jsonify({'message': '单词书删除成功'}), 200
         except Exception as e:
-            logger.error(f'Error deleting wordbook: {str(e)}')
+            logger.error('Error deleting wordbook: %s', e)
             return jsonify({'error': '服务器错误，请稍后重试'}), 500
 
 @app.route('/wordbook/<int:id>')
 @login_required
+@conditional_get(lambda id: wordbook_version(id, with_progress=True))
 def wordbook_detail(id):
-    logger.debug(f'Received request to /wordbook/{id}')
+    logger.debug('Received request to /wordbook/%s', id)
+    # 条件GET已查询的版本号（单词书不存在时为None）；下面的 app_context 会带来新的 g，需先取出
+    versions = g.page_versions
     with app.app_context():
         wordbook = WordBook.query.get_or_404(id)
-        units = db.session.query(Word.unit, db.func.count(Word.id).label('word_count')).filter_by(wordbook_id=id).group_by(Word.unit).all()
-        progress = UserWordProgress.query.filter_by(user_id=session['user_id'], wordbook_id=id).all()
-        progress_dict = {p.unit: {'is_completed_a': p.is_completed_a, 'is_completed_b': p.is_completed_b} for p in progress}
-        units_data = [
-            {
-                'unit': unit,
-                'word_count': word_count,
-                'is_completed_a': progress_dict.get(unit, {}).get('is_completed_a', 0),
-                'is_completed_b': progress_dict.get(unit, {}).get('is_completed_b', 0)
-            } for unit, word_count in units
-        ]
+        if versions is None:
+            # 版本查询之后才创建的单词书：按本次请求开始时的状态处理
+            abort(404)
+        progress_version = versions[1]
+        user_id = session['user_id']
+
+        def load_units():
+            units = unit_catalog.list_units(id)
+            progress = UserWordProgress.query.filter_by(user_id=user_id, wordbook_id=id).all()
+            progress_dict = {p.unit: {'is_completed_a': p.is_completed_a, 'is_completed_b': p.is_completed_b} for p in progress}
+            return [
+                {
+                    'unit': unit,
+                    'word_count': word_count,
+                    'is_completed_a': progress_dict.get(unit, {}).get('is_completed_a', 0),
+                    'is_completed_b': progress_dict.get(unit, {}).get('is_completed_b', 0)
+                } for unit, word_count in units
+            ]
+
         is_admin = session['username'] == 'admin'
-        return render_template('wordbook_detail.html', wordbook=wordbook, units=units_data, is_admin=is_admin)
+        # 单元列表按 (单词书版本, 用户进度版本) 缓存，片段命中时不再查询单元目录和进度
+        return render_template('wordbook_detail.html', wordbook=wordbook, units=deferred(load_units),
+                               user_id=user_id, progress_version=progress_version, is_admin=is_admin)
 
 @app.route('/wordbook/<int:id>/select', methods=['POST'])
 @login_required
 def wordbook_select(id):
-    logger.debug(f'Received request to select wordbook {id}')
+    logger.debug('Received request to select wordbook %s', id)
     with app.app_context():
         wordbook = WordBook.query.get_or_404(id)
-        units = db.session.query(Word.unit).filter_by(wordbook_id=id).distinct().all()
+        units = unit_catalog.list_units(id)
         try:
-            for unit in units:
-                unit = unit[0]
-                if not UserWordProgress.query.filter_by(user_id=session['user_id'], wordbook_id=id, unit=unit).first():
+            started_units = {p.unit for p in UserWordProgress.query.filter_by(user_id=session['user_id'], wordbook_id=id)}
+            for unit, _ in units:
+                if unit not in started_units:
                     progress = UserWordProgress(
                         user_id=session['user_id'],
                         wordbook_id=id,
@@ -552,30 +595,18 @@ def wordbook_select(id):
                         incorrect_count_a=0,
                         correct_count_b=0,
                         incorrect_count_b=0,
-                        created_at=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                        created_at=datetime.datetime.now()
                     )
                     db.session.add(progress)
+            bump_progress_version(session['user_id'])
             db.session.commit()
-            logger.info(f'Wordbook {id} selected for user {session["user_id"]}')
+            logger.info('Wordbook %s selected for user %s', id, session['user_id'])
             return jsonify({'message': '单词书选择成功'}), 200
         except Exception as e:
-            logger.error(f'Error selecting wordbook: {str(e)}')
+            logger.error('Error selecting wordbook: %s', e)
             db.session.rollback()
             return jsonify({'error': '服务器错误，请稍后重试'}), 500
 
-# 生成20%空白的单词（用于模式A）
-def generate_partial_word(word):
-    if not word:
-        return word
-    length = len(word)
-    hide_count = max(1, math.ceil(length * 0.2))  # 至少隐藏1个字母
-    indices = list(range(1, length))  # 避免隐藏首字母
-    hide_indices = random.sample(indices, min(hide_count, len(indices)))
-    word_chars = list(word)
-    for idx in hide_indices:
-        word_chars[idx] = '_'
-    return ''.join(word_chars)
-
 # 生成全空白的单词（用于模式B）
 def generate_full_blank_word(word):
     if not word:
@@ -584,207 +615,195 @@ def generate_full_blank_word(word):
 
 @app.route('/wordbook/<int:id>/practice_a/<unit>', methods=['GET'])
 @login_required
+@conditional_get(lambda id, unit: wordbook_version(id))
 def practice_a(id, unit):
-    logger.debug(f'Received request to /wordbook/{id}/practice_a/{unit}')
+    logger.debug('Received request to /wordbook/%s/practice_a/%s', id, unit)
     with app.app_context():
         wordbook = WordBook.query.get_or_404(id)
-        words = Word.query.filter_by(wordbook_id=id, unit=unit).all()
+        # 页面上的单词数须与按 wordbook.version 请求的数据包一致
+        words = get_unit_words(id, unit, wordbook.version)
         if not words:
-            logger.warning(f'No words found for wordbook {id}, unit {unit}')
+            logger.warning('No words found for wordbook %s, unit %s', id, unit)
             return jsonify({'error': '该单元没有单词'}), 404
-        words_data = [{
-            'id': w.id,
-            'chinese': w.chinese,
-            'english': w.english,
-            'partial': generate_partial_word(w.english),
-            'wordbook_id': id,
-            'unit': unit
-        } for w in words]
-        return render_template('practice_a.html', wordbook=wordbook, unit=unit, words=words_data)
+        # 单词不再嵌入页面，由前端从单元数据包（可被 service worker 缓存）加载
+        return render_template('practice_a.html', wordbook=wordbook, unit=unit, word_count=len(words))
 
-@app.route('/wordbook/<int:id>/practice_a/<unit>/submit', methods=['POST'])
+def practice_b_words(id, unit, words):
+    """错题复习页面数据：只显示单词长度的下划线"""
+    return [{
+        'id': word_id,
+        'chinese': chinese,
+        'english': english,
+        'full_blank': generate_full_blank_word(english),
+        'wordbook_id': id,
+        'unit': unit
+    } for word_id, english, chinese in words]
+
+@app.route('/wordbook/<int:id>/units/<unit>/bundle', methods=['GET'])
 @login_required
-def practice_a_submit(id, unit):
-    logger.debug(f'Received request to /wordbook/{id}/practice_a/{unit}/submit')
-    data = request.form
-    logger.debug(f'Form data: {data}')
+def unit_bundle(id, unit):
+    """
+    单元数据包：练习页面和离线客户端按内容版本号缓存，未变化时返回304。
+    地址中的 v 是页面渲染时的单词书版本号：读缓存中的单词早于该版本时重新从数据库读取，
+    否则 service worker 会把旧单词永久缓存在新版本号下。
+    """
+    with app.app_context():
+        return bundle_response(id, unit, get_unit_words(id, unit, request.args.get('v', type=int)))
+
+@app.route('/sw.js', methods=['GET'])
+def service_worker():
+    """service worker 须从根路径提供，才能拦截练习页面发出的请求"""
+    response = send_from_directory(app.static_folder, 'sw.js', mimetype='text/javascript', max_age=0)
+    response.cache_control.no_cache = True
+    return response
+
+# 各提交接口对应的判分模式（模式A只统计进度，模式B/复习同时维护错题本）
+SUBMIT_MODES = {
+    'practice_a': MODE_A,
+    'practice_b': MODE_B,
+    'review_b': MODE_B,
+}
+MAX_BATCH_ANSWERS = 200
+
+def parse_single_answer(data):
+    """解析单个答案表单，返回 ([(word_id, 小写答案)], 错误信息)"""
     word_id = data.get('word_id')
     answer = data.get('answer', '').strip().lower()
     if not word_id or not answer:
         logger.warning('Word ID or answer missing')
-        return jsonify({'error': '单词ID或答案不能为空'}), 400
+        return None, '单词ID或答案不能为空'
+    try:
+        word_id = int(word_id)
+    except ValueError:
+        logger.warning('Invalid word ID %s', word_id)
+        return None, '无效的单词ID'
+    return [(word_id, answer)], None
+
+def parse_answer_batch(data):
+    """解析批量提交的JSON，返回 ([(word_id, 小写答案), ...], 错误信息)"""
+    answers = data.get('answers') if isinstance(data, dict) else None
+    if not isinstance(answers, list) or not answers:
+        logger.warning('Batch submit without answers')
+        return None, '答案列表不能为空'
+    if len(answers) > MAX_BATCH_ANSWERS:
+        logger.warning('Batch too large: %s answers', len(answers))
+        return None, f'每次最多提交{MAX_BATCH_ANSWERS}个答案'
+    parsed = []
+    for idx, item in enumerate(answers, 1):
+        word_id = item.get('word_id') if isinstance(item, dict) else None
+        answer = str(item.get('answer') or '').strip().lower() if isinstance(item, dict) else ''
+        try:
+            word_id = int(word_id)
+        except (TypeError, ValueError):
+            word_id = None
+        if not word_id or not answer:
+            logger.warning('Word ID or answer missing at index %s', idx)
+            return None, f'第{idx}个答案的单词ID或答案不能为空'
+        parsed.append((word_id, answer))
+    return parsed, None
+
+def grade_and_commit(user_id, id, unit, mode, answers):
+    """判分并提交事务；单词ID无效时返回None。异步模式下由唯一的写线程调用"""
     with app.app_context():
         try:
-            word = Word.query.get_or_404(word_id)
-            if word.wordbook_id != id or word.unit != unit:
-                logger.warning(f'Invalid word ID {word_id} for wordbook {id}, unit {unit}')
-                return jsonify({'error': '无效的单词ID'}), 400
-            correct = answer == word.english.lower()
-            progress = UserWordProgress.query.filter_by(
-                user_id=session['user_id'], wordbook_id=id, unit=unit
-            ).first()
-            if not progress:
-                progress = UserWordProgress(
-                    user_id=session['user_id'],
-                    wordbook_id=id,
-                    unit=unit,
-                    is_completed_a=0,
-                    is_completed_b=0,
-                    last_attempted=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    correct_count_a=0,
-                    incorrect_count_a=0,
-                    correct_count_b=0,
-                    incorrect_count_b=0,
-                    created_at=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                )
-                db.session.add(progress)
-            if correct:
-                progress.correct_count_a += 1
-                message = '正确'
-            else:
-                progress.incorrect_count_a += 1
-                message = f'错误，正确答案是 {word.english}'
-            progress.last_attempted = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            words = Word.query.filter_by(wordbook_id=id, unit=unit).count()
-            if progress.correct_count_a >= words and progress.incorrect_count_a == 0:
-                progress.is_completed_a = 1
+            results = grade_answers(user_id, id, unit, SUBMIT_MODES[mode], answers)
+            if results is None:
+                logger.warning('Invalid word IDs for wordbook %s, unit %s', id, unit)
+                db.session.rollback()
+                return None
             db.session.commit()
-            logger.info(f'Answer submitted for word {word_id}: {"correct" if correct else "incorrect"}')
-            return jsonify({'correct': correct, 'message': message}), 200
-        except Exception as e:
-            logger.error(f'Error submitting answer: {str(e)}')
+            return results
+        except Exception:
             db.session.rollback()
-            return jsonify({'error': '服务器错误，请稍后重试'}), 500
+            raise
+
+def single_answer_response(answers, results):
+    if results is None:
+        return jsonify({'error': '无效的单词ID'}), 400
+    result = results[0]
+    answer_logger.info('Answer submitted for word %s: %s', answers[0][0], 'correct' if result['correct'] else 'incorrect')
+    return jsonify({'correct': result['correct'], 'message': result['message']}), 200
+
+def answer_batch_response(id, unit, mode, results):
+    if results is None:
+        return jsonify({'error': '无效的单词ID'}), 400
+    correct_count = sum(1 for r in results if r['correct'])
+    answer_logger.info('Batch of %s answers submitted for wordbook %s, unit %s, mode %s: %s correct', len(results), id, unit, mode, correct_count)
+    return jsonify({
+        'results': results,
+        'correct_count': correct_count,
+        'incorrect_count': len(results) - correct_count
+    }), 200
+
+def submit_single_answer(id, unit, mode):
+    """单个答案提交：与批量提交共用判分服务"""
+    answers, error = parse_single_answer(request.form)
+    if error:
+        return jsonify({'error': error}), 400
+    try:
+        results = grade_and_commit(session['user_id'], id, unit, mode, answers)
+    except Exception as e:
+        logger.error('Error submitting answer: %s', e)
+        return jsonify({'error': '服务器错误，请稍后重试'}), 500
+    return single_answer_response(answers, results)
+
+@app.route('/wordbook/<int:id>/practice_a/<unit>/submit', methods=['POST'])
+@login_required
+def practice_a_submit(id, unit):
+    answer_logger.debug('Received request to /wordbook/%s/practice_a/%s/submit', id, unit)
+    return submit_single_answer(id, unit, 'practice_a')
 
 @app.route('/wordbook/<int:id>/practice_a/<unit>/complete', methods=['POST'])
 @login_required
 def practice_a_complete(id, unit):
-    logger.debug(f'Received request to /wordbook/{id}/practice_a/{unit}/complete')
+    logger.debug('Received request to /wordbook/%s/practice_a/%s/complete', id, unit)
     with app.app_context():
         try:
             progress = UserWordProgress.query.filter_by(
                 user_id=session['user_id'], wordbook_id=id, unit=unit
             ).first_or_404()
             progress.is_completed_a = 1
-            progress.last_attempted = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            progress.last_attempted = datetime.datetime.now()
+            bump_progress_version(session['user_id'])
             db.session.commit()
-            logger.info(f'Practice A completed for wordbook {id}, unit {unit} for user {session["user_id"]}')
+            logger.info('Practice A completed for wordbook %s, unit %s for user %s', id, unit, session['user_id'])
             return jsonify({
                 'message': '练习完成！现在可以开始第二阶段的练习了。',
                 'redirect_url': url_for('wordbook_detail', id=id)
             }), 200
         except Exception as e:
-            logger.error(f'Error completing practice A: {str(e)}')
+            logger.error('Error completing practice A: %s', e)
             db.session.rollback()
             return jsonify({'error': '服务器错误，请稍后重试'}), 500
 
 @app.route('/wordbook/<int:id>/practice_b/<unit>', methods=['GET'])
 @login_required
+@conditional_get(lambda id, unit: wordbook_version(id, with_progress=True))
 def practice_b(id, unit):
-    logger.debug(f'Received request to /wordbook/{id}/practice_b/{unit}')
+    logger.debug('Received request to /wordbook/%s/practice_b/%s', id, unit)
     with app.app_context():
         wordbook = WordBook.query.get_or_404(id)
         progress = UserWordProgress.query.filter_by(user_id=session['user_id'], wordbook_id=id, unit=unit).first()
         if not progress or not progress.is_completed_a:
-            logger.warning(f'Mode B not unlocked for wordbook {id}, unit {unit}')
+            logger.warning('Mode B not unlocked for wordbook %s, unit %s', id, unit)
             return jsonify({'error': '请先完成填空模式（模式A）'}), 403
-        words = Word.query.filter_by(wordbook_id=id, unit=unit).all()
+        words = get_unit_words(id, unit, wordbook.version)
         if not words:
-            logger.warning(f'No words found for wordbook {id}, unit {unit}')
+            logger.warning('No words found for wordbook %s, unit %s', id, unit)
             return jsonify({'error': '该单元没有单词'}), 404
-        words_data = [{
-            'id': w.id,
-            'chinese': w.chinese,
-            'english': w.english,
-            'full_blank': generate_full_blank_word(w.english),
-            'wordbook_id': id,
-            'unit': unit
-        } for w in words]
-        return render_template('practice_b.html', wordbook=wordbook, unit=unit, words=words_data)
+        return render_template('practice_b.html', wordbook=wordbook, unit=unit, word_count=len(words))
 
 @app.route('/wordbook/<int:id>/practice_b/<unit>/submit', methods=['POST'])
 @login_required
 def practice_b_submit(id, unit):
-    logger.debug(f'Received request to /wordbook/{id}/practice_b/{unit}/submit')
-    data = request.form
-    logger.debug(f'Form data: {data}')
-    word_id = data.get('word_id')
-    answer = data.get('answer', '').strip().lower()
-    if not word_id or not answer:
-        logger.warning('Word ID or answer missing')
-        return jsonify({'error': '单词ID或答案不能为空'}), 400
-    with app.app_context():
-        try:
-            word = Word.query.get_or_404(word_id)
-            if word.wordbook_id != id or word.unit != unit:
-                logger.warning(f'Invalid word ID {word_id} for wordbook {id}, unit {unit}')
-                return jsonify({'error': '无效的单词ID'}), 400
-            correct = answer == word.english.lower()
-            progress = UserWordProgress.query.filter_by(
-                user_id=session['user_id'], wordbook_id=id, unit=unit
-            ).first()
-            if not progress:
-                progress = UserWordProgress(
-                    user_id=session['user_id'],
-                    wordbook_id=id,
-                    unit=unit,
-                    is_completed_a=0,
-                    is_completed_b=0,
-                    last_attempted=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    correct_count_a=0,
-                    incorrect_count_a=0,
-                    correct_count_b=0,
-                    incorrect_count_b=0,
-                    created_at=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                )
-                db.session.add(progress)
-            mistake = UserWordMistake.query.filter_by(
-                user_id=session['user_id'], word_id=word_id, mode='B'
-            ).first()
-            if correct:
-                progress.correct_count_b += 1
-                message = '正确'
-                if mistake:
-                    mistake.correct_count += 1
-                    if mistake.correct_count >= 2:
-                        db.session.delete(mistake)
-                        message = '正确，此单词已熟练掌握，已从错题本移除'
-            else:
-                progress.incorrect_count_b += 1
-                message = f'错误，正确答案是 {word.english}'
-                if mistake:
-                    mistake.incorrect_count += 1
-                    mistake.correct_count = 0
-                    mistake.last_incorrect = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                else:
-                    mistake = UserWordMistake(
-                        user_id=session['user_id'],
-                        word_id=word_id,
-                        wordbook_id=id,
-                        unit=unit,
-                        mode='B',
-                        incorrect_count=1,
-                        correct_count=0,
-                        last_incorrect=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                        created_at=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    )
-                    db.session.add(mistake)
-            progress.last_attempted = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            words = Word.query.filter_by(wordbook_id=id, unit=unit).count()
-            if progress.correct_count_b >= words and progress.incorrect_count_b == 0:
-                progress.is_completed_b = 1
-            db.session.commit()
-            logger.info(f'Answer submitted for word {word_id}: {"correct" if correct else "incorrect"}')
-            return jsonify({'correct': correct, 'message': message}), 200
-        except Exception as e:
-            logger.error(f'Error submitting answer: {str(e)}')
-            db.session.rollback()
-            return jsonify({'error': '服务器错误，请稍后重试'}), 500
+    answer_logger.debug('Received request to /wordbook/%s/practice_b/%s/submit', id, unit)
+    return submit_single_answer(id, unit, 'practice_b')
 
 @app.route('/review/<int:wordbook_id>', methods=['GET'])
 @login_required
+@conditional_get(lambda wordbook_id: wordbook_version(wordbook_id, with_progress=True))
 def review(wordbook_id):
-    logger.debug(f'Received request to /review/{wordbook_id}')
+    logger.debug('Received request to /review/%s', wordbook_id)
     with app.app_context():
         wordbook = WordBook.query.get_or_404(wordbook_id)
         units = db.session.query(
@@ -796,141 +815,224 @@ def review(wordbook_id):
         units_data = [{'unit': unit, 'mistake_count': mistake_count} for unit, mistake_count in units]
         return render_template('review.html', wordbook=wordbook, units=units_data)
 
+REVIEW_FEED_PER_PAGE = 30
+REVIEW_FEED_MAX_PER_PAGE = 100
+
+@app.route('/review/today', methods=['GET'])
+@login_required
+def review_feed():
+    """
+    全局今日复习：跨单词书列出当前用户今天内到期的复习计划，最早到期的优先。
+    按 (due_at, id) 游标分页并走 (user_id, due_at) 索引；答题只会把单词的 due_at 推后，
+    不会让尚未读到的单词移到游标之前，翻页期间不会跳过或重复。
+    """
+    logger.debug('Received request to /review/today')
+    limit = min(max(request.args.get('limit', REVIEW_FEED_PER_PAGE, type=int), 1), REVIEW_FEED_MAX_PER_PAGE)
+    cursor = request.args.get('cursor')
+    end_of_today = datetime.datetime.combine(datetime.date.today() + datetime.timedelta(days=1), datetime.time.min)
+    with app.app_context():
+        query = db.session.query(
+            ReviewSchedule.id, ReviewSchedule.due_at, ReviewSchedule.wordbook_id, ReviewSchedule.unit,
+            ReviewSchedule.interval_days, ReviewSchedule.repetitions, Word.english, Word.chinese, WordBook.title
+        ).join(Word, ReviewSchedule.word_id == Word.id).join(
+            WordBook, ReviewSchedule.wordbook_id == WordBook.id
+        ).filter(ReviewSchedule.user_id == session['user_id'], ReviewSchedule.due_at < end_of_today)
+        try:
+            rows, next_cursor = keyset_page(query, [ReviewSchedule.due_at, ReviewSchedule.id], cursor, limit,
+                                            descending=False)
+        except InvalidCursor as e:
+            logger.warning('Invalid review feed cursor: %s', cursor)
+            return jsonify({'error': str(e)}), 400
+        items = [{
+            'schedule_id': row.id,
+            'wordbook_id': row.wordbook_id,
+            'wordbook_title': row.title,
+            'unit': row.unit,
+            'english': row.english,
+            'chinese': row.chinese,
+            'due_at': row.due_at,
+            'interval_days': row.interval_days,
+            'repetitions': row.repetitions
+        } for row in rows]
+        if request.args.get('format') == 'json':
+            for item in items:
+                item['due_at'] = item['due_at'].isoformat(timespec='seconds')
+            return jsonify({'items': items, 'next_cursor': next_cursor}), 200
+        return render_template('review_feed.html', items=items, next_cursor=next_cursor, limit=limit)
+
 @app.route('/wordbook/<int:id>/review_b/<unit>', methods=['GET'])
 @login_required
 def review_mode_b(id, unit):
-    logger.debug(f'Received request to /wordbook/{id}/review_b/{unit}')
+    logger.debug('Received request to /wordbook/%s/review_b/%s', id, unit)
     with app.app_context():
         wordbook = WordBook.query.get_or_404(id)
         mistakes = UserWordMistake.query.filter_by(
             user_id=session['user_id'], wordbook_id=id, unit=unit, mode='B'
-        ).join(Word, UserWordMistake.word_id == Word.id).order_by(UserWordMistake.last_incorrect.desc()).all()
+        ).join(Word, UserWordMistake.word_id == Word.id).options(
+            db.contains_eager(UserWordMistake.word)
+        ).order_by(UserWordMistake.last_incorrect.desc()).all()
         if not mistakes:
-            logger.warning(f'No mistakes found for wordbook {id}, unit {unit}')
+            logger.warning('No mistakes found for wordbook %s, unit %s', id, unit)
             return jsonify({'error': '该单元没有错题'}), 404
-        words_data = [{
-            'id': m.word_id,
-            'chinese': m.word.chinese,
-            'english': m.word.english,
-            'full_blank': generate_full_blank_word(m.word.english),
-            'wordbook_id': id,
-            'unit': unit
-        } for m in mistakes]
+        words_data = practice_b_words(id, unit, [(m.word_id, m.word.english, m.word.chinese) for m in mistakes])
         return render_template('review_mode_b.html', wordbook=wordbook, unit=unit, words=words_data)
 
 @app.route('/wordbook/<int:id>/review_b/<unit>/submit', methods=['POST'])
 @login_required
 def review_b_submit(id, unit):
-    logger.debug(f'Received request to /wordbook/{id}/review_b/{unit}/submit')
-    data = request.form
-    logger.debug(f'Form data: {data}')
-    word_id = data.get('word_id')
-    answer = data.get('answer', '').strip().lower()
-    if not word_id or not answer:
-        logger.warning('Word ID or answer missing')
-        return jsonify({'error': '单词ID或答案不能为空'}), 400
+    answer_logger.debug('Received request to /wordbook/%s/review_b/%s/submit', id, unit)
+    return submit_single_answer(id, unit, 'review_b')
+
+REVIEW_DUE_LIMIT = 20
+REVIEW_DUE_MAX_LIMIT = 100
+
+@app.route('/review/due', methods=['GET'])
+@login_required
+def review_due():
+    """间隔重复复习队列：返回当前用户最早到期的N个单词"""
+    limit = min(max(request.args.get('limit', REVIEW_DUE_LIMIT, type=int), 1), REVIEW_DUE_MAX_LIMIT)
     with app.app_context():
-        try:
-            word = Word.query.get_or_404(word_id)
-            if word.wordbook_id != id or word.unit != unit:
-                logger.warning(f'Invalid word ID {word_id} for wordbook {id}, unit {unit}')
-                return jsonify({'error': '无效的单词ID'}), 400
-            correct = answer == word.english.lower()
-            progress = UserWordProgress.query.filter_by(
-                user_id=session['user_id'], wordbook_id=id, unit=unit
-            ).first()
-            if not progress:
-                progress = UserWordProgress(
-                    user_id=session['user_id'],
-                    wordbook_id=id,
-                    unit=unit,
-                    is_completed_a=0,
-                    is_completed_b=0,
-                    last_attempted=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    correct_count_a=0,
-                    incorrect_count_a=0,
-                    correct_count_b=0,
-                    incorrect_count_b=0,
-                    created_at=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                )
-                db.session.add(progress)
-            mistake = UserWordMistake.query.filter_by(
-                user_id=session['user_id'], word_id=word_id, mode='B'
-            ).first()
-            if correct:
-                progress.correct_count_b += 1
-                message = '正确'
-                if mistake:
-                    mistake.correct_count += 1
-                    if mistake.correct_count >= 2:
-                        db.session.delete(mistake)
-                        message = '正确，此单词已熟练掌握，已从错题本移除'
-            else:
-                progress.incorrect_count_b += 1
-                message = f'错误，正确答案是 {word.english}'
-                if mistake:
-                    mistake.incorrect_count += 1
-                    mistake.correct_count = 0
-                    mistake.last_incorrect = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                else:
-                    mistake = UserWordMistake(
-                        user_id=session['user_id'],
-                        word_id=word_id,
-                        wordbook_id=id,
-                        unit=unit,
-                        mode='B',
-                        incorrect_count=1,
-                        correct_count=0,
-                        last_incorrect=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                        created_at=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    )
-                    db.session.add(mistake)
-            progress.last_attempted = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            words = Word.query.filter_by(wordbook_id=id, unit=unit).count()
-            if progress.correct_count_b >= words and progress.incorrect_count_b == 0:
-                progress.is_completed_b = 1
-            db.session.commit()
-            logger.info(f'Answer submitted for word {word_id}: {"correct" if correct else "incorrect"}')
-            return jsonify({'correct': correct, 'message': message}), 200
-        except Exception as e:
-            logger.error(f'Error submitting answer: {str(e)}')
-            db.session.rollback()
-            return jsonify({'error': '服务器错误，请稍后重试'}), 500
+        items = [{
+            'word_id': word.id,
+            'wordbook_id': schedule.wordbook_id,
+            'unit': schedule.unit,
+            'chinese': word.chinese,
+            'english': word.english,
+            'full_blank': generate_full_blank_word(word.english),
+            'due_at': schedule.due_at.isoformat(timespec='seconds'),
+            'interval_days': schedule.interval_days,
+            'repetitions': schedule.repetitions,
+            'submit_url': url_for('review_b_submit', id=schedule.wordbook_id, unit=schedule.unit)
+        } for schedule, word in due_reviews(session['user_id'], limit)]
+        return jsonify({'items': items, 'count': len(items)}), 200
+
+@app.route('/wordbook/<int:id>/<mode>/<unit>/submit_batch', methods=['POST'])
+@login_required
+def submit_batch(id, mode, unit):
+    """批量提交一个练习/复习会话中的答案，在一个事务中完成判分和进度更新"""
+    answer_logger.debug('Received request to /wordbook/%s/%s/%s/submit_batch', id, mode, unit)
+    if mode not in SUBMIT_MODES:
+        logger.warning('Invalid batch submit mode: %s', mode)
+        return jsonify({'error': '无效的练习模式'}), 404
+    parsed, error = parse_answer_batch(request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
+    try:
+        results = grade_and_commit(session['user_id'], id, unit, mode, parsed)
+    except Exception as e:
+        logger.error('Error submitting answer batch: %s', e)
+        return jsonify({'error': '服务器错误，请稍后重试'}), 500
+    return answer_batch_response(id, unit, mode, results)
+
+@app.route('/assets/<path:filename>', methods=['GET'])
+def asset(filename):
+    """带内容哈希的静态资源：按 Accept-Encoding 返回预压缩版本，浏览器长期缓存"""
+    return assets.send_asset(filename)
+
+@app.route('/admin/cache_stats', methods=['GET'])
+@login_required
+@admin_required
+def admin_cache_stats():
+    """单词读缓存和模板片段缓存的命中/未命中统计，供监控使用"""
+    return jsonify({'word_cache': cache_stats(), 'fragment_cache': template_cache.cache_stats()}), 200
+
+@app.route('/admin/metrics', methods=['GET'])
+@login_required
+@admin_required
+def admin_metrics():
+    """Prometheus文本格式的请求延迟、SQL统计和缓存命中率"""
+    body = metrics.render_prometheus({
+        'word_cache': cache_stats(),
+        'device_auth': device_auth_cache.cache_stats(),
+        'fragment_cache': template_cache.cache_stats()
+    })
+    return body, 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+ADMIN_PROGRESS_PER_PAGE = 20
+ADMIN_PROGRESS_MAX_PER_PAGE = 100
 
 @app.route('/admin/user_progress', methods=['GET'])
 @login_required
 @admin_required
 def admin_user_progress():
     logger.debug('Received request to /admin/user_progress')
+    cursor = request.args.get('cursor')
+    per_page = min(max(request.args.get('per_page', ADMIN_PROGRESS_PER_PAGE, type=int), 1), ADMIN_PROGRESS_MAX_PER_PAGE)
+    username = request.args.get('username', '').strip()
+    wordbook_id = request.args.get('wordbook_id', type=int)
     with app.app_context():
-        users = User.query.all()
-        wordbooks = WordBook.query.all()
-        user_progress_data = []
-        for user in users:
-            user_data = {
+        users_query = User.query
+        if username:
+            users_query = users_query.filter(User.username.contains(username))
+        try:
+            users, next_cursor = keyset_page(users_query, [User.id], cursor, per_page, descending=False)
+        except InvalidCursor as e:
+            logger.warning('Invalid user progress cursor: %s', cursor)
+            return jsonify({'error': str(e)}), 400
+        user_ids = [user.id for user in users]
+
+        # 单词书版本号随下拉列表一起查询；标题或单元变化都会递增版本号，用作片段缓存键的一部分
+        wordbook_versions = db.session.query(WordBook.id, WordBook.title, WordBook.version).order_by(WordBook.id).all()
+        wordbooks = [(book_id, book_title) for book_id, book_title, _ in wordbook_versions]
+        catalog_version = tuple(
+            (book_id, version) for book_id, _, version in wordbook_versions
+            if not wordbook_id or book_id == wordbook_id
+        )
+
+        def load_units():
+            # 一次查询所有单词书的单元目录
+            units_query = db.session.query(WordBook.id, WordBook.title, WordBookUnit.unit).join(
+                WordBookUnit, WordBookUnit.wordbook_id == WordBook.id
+            )
+            if wordbook_id:
+                units_query = units_query.filter(WordBook.id == wordbook_id)
+            return units_query.order_by(WordBook.id, WordBookUnit.position).all()
+
+        def load_progress():
+            # 一次查询当前页用户的全部进度，在内存中按 (用户, 单词书, 单元) 合并
+            progress_query = UserWordProgress.query.filter(UserWordProgress.user_id.in_(user_ids))
+            if wordbook_id:
+                progress_query = progress_query.filter(UserWordProgress.wordbook_id == wordbook_id)
+            return {(p.user_id, p.wordbook_id, p.unit): p for p in progress_query.all()}
+
+        # 只有片段缓存未命中的用户才会触发以下查询，且整页最多各查询一次
+        units = deferred(load_units)
+        progress_map = deferred(load_progress)
+
+        def user_rows(user_id):
+            rows = []
+            for book_id, book_title, unit in units:
+                progress = progress_map.value.get((user_id, book_id, unit))
+                rows.append({
+                    'wordbook_title': book_title,
+                    'unit': unit,
+                    'is_completed_a': progress.is_completed_a if progress else 0,
+                    'is_completed_b': progress.is_completed_b if progress else 0,
+                    'correct_count_a': progress.correct_count_a if progress else 0,
+                    'incorrect_count_a': progress.incorrect_count_a if progress else 0,
+                    'correct_count_b': progress.correct_count_b if progress else 0,
+                    'incorrect_count_b': progress.incorrect_count_b if progress else 0,
+                    'last_attempted': progress.last_attempted if progress else None
+                })
+            return rows
+
+        user_progress_data = [
+            {
+                'id': user.id,
                 'username': user.username,
-                'progress': []
-            }
-            for wordbook in wordbooks:
-                units = db.session.query(Word.unit).filter_by(wordbook_id=wordbook.id).distinct().all()
-                for unit in units:
-                    unit = unit[0]
-                    progress = UserWordProgress.query.filter_by(
-                        user_id=user.id, wordbook_id=wordbook.id, unit=unit
-                    ).first()
-                    user_data['progress'].append({
-                        'wordbook_title': wordbook.title,
-                        'unit': unit,
-                        'is_completed_a': progress.is_completed_a if progress else 0,
-                        'is_completed_b': progress.is_completed_b if progress else 0,
-                        'correct_count_a': progress.correct_count_a if progress else 0,
-                        'incorrect_count_a': progress.incorrect_count_a if progress else 0,
-                        'correct_count_b': progress.correct_count_b if progress else 0,
-                        'incorrect_count_b': progress.incorrect_count_b if progress else 0,
-                        'last_attempted': progress.last_attempted if progress else '未尝试'
-                    })
-            user_progress_data.append(user_data)
-        return render_template('admin_user_progress.html', users=user_progress_data)
+                'progress_version': user.progress_version,
+                'progress': deferred(lambda user_id=user.id: user_rows(user_id))
+            } for user in users
+        ]
+        return render_template(
+            'admin_user_progress.html',
+            users=user_progress_data,
+            next_cursor=next_cursor,
+            is_first_page=not cursor,
+            wordbooks=wordbooks,
+            catalog_version=catalog_version,
+            filters={'username': username, 'wordbook_id': wordbook_id, 'per_page': per_page}
+        )
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+ASGI异步服务入口：练习页面和答案提交接口以异步处理函数运行，其余路由（管理页面等）仍由Flask同步处理
+
+用法：
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+    python asgi.py [PORT]
+
+- 读：练习页面和单元数据包通过 aiosqlite 的只读连接池查询，单元单词优先走进程内读缓存
+- 写：所有答案提交进入一个队列，由唯一的写任务按顺序在专用写线程上判分并提交，
+  请求本身只是 await 结果，不占用线程，也不会在SQLite写锁上互相等待
+- 其余路由：在线程池中以WSGI方式调用Flask应用，行为与 app.py 直接运行时一致
+
+依赖 aiosqlite；以 uvicorn 运行时另需安装 uvicorn。每个进程一个写任务，多进程部署时进程间仍依靠 busy_timeout 排队。
+"""
+import asyncio
+import contextlib
+import io
+import logging
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import aiosqlite
+from flask import request, session, jsonify, make_response, redirect, render_template, url_for, abort
+from werkzeug.exceptions import HTTPException
+
+from app import (app, SUBMIT_MODES, parse_single_answer, parse_answer_batch, grade_and_commit, single_answer_response,
+                 answer_batch_response)
+from conditional import not_modified, page_etag, set_validators
+from database import db
+from unit_bundles import bundle_response
+from word_cache import peek_unit_words, store_unit_words
+
+logger = logging.getLogger(__name__)
+
+# 只读连接上应用的 PRAGMA（写相关的 journal_mode/synchronous 由写连接负责）
+READ_PRAGMAS = ('busy_timeout', 'cache_size', 'mmap_size', 'temp_store')
+
+
+class WriterBusy(Exception):
+    """写队列已满"""
+
+
+class _Runtime:
+    """进程级状态：只读连接池、写队列和线程池，在 lifespan 启动时创建"""
+
+    def __init__(self):
+        self.readers = None
+        self.write_queue = None
+        self.writer_task = None
+        self.writer_executor = None
+        self.wsgi_executor = None
+
+    async def start(self):
+        with app.app_context():
+            db_path = db.engine.url.database
+        config = app.config
+        pragmas = config['SQLITE_PRAGMAS']
+        self.readers = asyncio.Queue()
+        for _ in range(config['ASYNC_READ_CONNECTIONS']):
+            conn = await aiosqlite.connect(db_path, timeout=pragmas['busy_timeout'] / 1000)
+            conn.row_factory = sqlite3.Row
+            for name in READ_PRAGMAS:
+                await conn.execute(f'PRAGMA {name}={pragmas[name]}')
+            await conn.execute('PRAGMA query_only=ON')
+            self.readers.put_nowait(conn)
+        self.write_queue = asyncio.Queue(maxsize=config['ASYNC_WRITE_QUEUE_SIZE'])
+        self.writer_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='asgi-writer')
+        self.wsgi_executor = ThreadPoolExecutor(max_workers=config['ASYNC_WSGI_THREADS'], thread_name_prefix='asgi-wsgi')
+        self.writer_task = asyncio.create_task(self._writer_loop())
+        logger.info('ASGI runtime started: %s read connections on %s', config['ASYNC_READ_CONNECTIONS'], db_path)
+
+    async def stop(self):
+        # 先处理完已排队的写入，再关闭连接
+        await self.write_queue.put(None)
+        await self.writer_task
+        while not self.readers.empty():
+            await self.readers.get_nowait().close()
+        self.writer_executor.shutdown()
+        self.wsgi_executor.shutdown()
+        logger.info('ASGI runtime stopped')
+
+    async def _writer_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.write_queue.get()
+            if job is None:
+                return
+            func, args, future = job
+            try:
+                result = await loop.run_in_executor(self.writer_executor, func, *args)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+    async def write(self, func, *args):
+        """把写操作交给唯一的写任务执行并等待结果；队列已满时抛出 WriterBusy"""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.write_queue.put_nowait((func, args, future))
+        except asyncio.QueueFull:
+            raise WriterBusy()
+        return await future
+
+    @contextlib.asynccontextmanager
+    async def reader(self):
+        conn = await self.readers.get()
+        try:
+            yield conn
+        finally:
+            self.readers.put_nowait(conn)
+
+
+runtime = _Runtime()
+_started = None
+
+
+async def _ensure_started():
+    """服务器不发送 lifespan 事件时，在第一个请求上启动"""
+    global _started
+    if _started is None:
+        _started = asyncio.ensure_future(runtime.start())
+    await _started
+
+
+# ---------------------------------------------------------------------------
+# 异步处理函数：与 app.py 中同名视图行为一致，在Flask请求上下文中运行
+# ---------------------------------------------------------------------------
+
+async def _fetch_one(sql, params):
+    async with runtime.reader() as conn:
+        async with conn.execute(sql, params) as cursor:
+            return await cursor.fetchone()
+
+
+async def _get_wordbook_or_404(id, with_progress=False):
+    """单词书及其版本号（可附带当前用户的进度版本号），同时作为条件GET的版本查询"""
+    if with_progress:
+        wordbook = await _fetch_one(
+            'SELECT id, title, version, (SELECT progress_version FROM User WHERE id = ?) AS progress_version '
+            'FROM WordBook WHERE id = ?', (session['user_id'], id)
+        )
+    else:
+        wordbook = await _fetch_one('SELECT id, title, version FROM WordBook WHERE id = ?', (id,))
+    if wordbook is None:
+        abort(404)
+    return wordbook
+
+
+def _with_etag(rv, etag):
+    response = make_response(rv)
+    if response.status_code == 200:
+        set_validators(response, etag)
+    return response
+
+
+async def _unit_words(wordbook_id, unit, min_version=None):
+    words = peek_unit_words(wordbook_id, unit, min_version)
+    if words is None:
+        async with runtime.reader() as conn:
+            async with conn.execute(
+                'SELECT id, english, chinese, (SELECT version FROM WordBook WHERE id = ?) '
+                'FROM Word WHERE wordbook_id = ? AND unit = ? ORDER BY id',
+                (wordbook_id, wordbook_id, unit)
+            ) as cursor:
+                words = store_unit_words(wordbook_id, unit, await cursor.fetchall())
+    return words
+
+
+async def practice_a(id, unit):
+    logger.debug('Received async request to /wordbook/%s/practice_a/%s', id, unit)
+    wordbook = await _get_wordbook_or_404(id)
+    etag = page_etag((wordbook['version'],))
+    response = not_modified(etag)
+    if response is not None:
+        return response
+    words = await _unit_words(id, unit, wordbook['version'])
+    if not words:
+        logger.warning('No words found for wordbook %s, unit %s', id, unit)
+        return jsonify({'error': '该单元没有单词'}), 404
+    return _with_etag(render_template('practice_a.html', wordbook=wordbook, unit=unit, word_count=len(words)), etag)
+
+
+async def practice_b(id, unit):
+    logger.debug('Received async request to /wordbook/%s/practice_b/%s', id, unit)
+    wordbook = await _get_wordbook_or_404(id, with_progress=True)
+    etag = page_etag((wordbook['version'], wordbook['progress_version']))
+    response = not_modified(etag)
+    if response is not None:
+        return response
+    progress = await _fetch_one(
+        'SELECT is_completed_a FROM UserWordProgress WHERE user_id = ? AND wordbook_id = ? AND unit = ?',
+        (session['user_id'], id, unit)
+    )
+    if not progress or not progress['is_completed_a']:
+        logger.warning('Mode B not unlocked for wordbook %s, unit %s', id, unit)
+        return jsonify({'error': '请先完成填空模式（模式A）'}), 403
+    words = await _unit_words(id, unit, wordbook['version'])
+    if not words:
+        logger.warning('No words found for wordbook %s, unit %s', id, unit)
+        return jsonify({'error': '该单元没有单词'}), 404
+    return _with_etag(render_template('practice_b.html', wordbook=wordbook, unit=unit, word_count=len(words)), etag)
+
+
+async def unit_bundle(id, unit):
+    return bundle_response(id, unit, await _unit_words(id, unit, request.args.get('v', type=int)))
+
+
+async def _grade(id, unit, mode, answers):
+    """交给写任务判分；返回 (results, 错误响应)"""
+    try:
+        return await runtime.write(grade_and_commit, session['user_id'], id, unit, mode, answers), None
+    except WriterBusy:
+        logger.warning('Async write queue full, rejecting answers for wordbook %s, unit %s', id, unit)
+        return None, (jsonify({'error': '当前提交人数较多，请稍后重试'}), 503)
+    except Exception as e:
+        logger.error('Error submitting answers: %s', e)
+        return None, (jsonify({'error': '服务器错误，请稍后重试'}), 500)
+
+
+async def _submit_single_answer(id, unit, mode):
+    answers, error = parse_single_answer(request.form)
+    if error:
+        return jsonify({'error': error}), 400
+    results, error_response = await _grade(id, unit, mode, answers)
+    return error_response or single_answer_response(answers, results)
+
+
+async def practice_a_submit(id, unit):
+    return await _submit_single_answer(id, unit, 'practice_a')
+
+
+async def practice_b_submit(id, unit):
+    return await _submit_single_answer(id, unit, 'practice_b')
+
+
+async def review_b_submit(id, unit):
+    return await _submit_single_answer(id, unit, 'review_b')
+
+
+async def submit_batch(id, mode, unit):
+    if mode not in SUBMIT_MODES:
+        logger.warning('Invalid batch submit mode: %s', mode)
+        return jsonify({'error': '无效的练习模式'}), 404
+    answers, error = parse_answer_batch(request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
+    results, error_response = await _grade(id, unit, mode, answers)
+    return error_response or answer_batch_response(id, unit, mode, results)
+
+
+# 以异步方式处理的端点（端点名与 app.py 一致，均要求登录）
+ASYNC_VIEWS = {
+    'practice_a': practice_a,
+    'practice_b': practice_b,
+    'unit_bundle': unit_bundle,
+    'practice_a_submit': practice_a_submit,
+    'practice_b_submit': practice_b_submit,
+    'review_b_submit': review_b_submit,
+    'submit_batch': submit_batch,
+}
+
+
+# ---------------------------------------------------------------------------
+# ASGI 适配
+# ---------------------------------------------------------------------------
+
+def _wsgi_environ(scope, body):
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = 'HTTP_' + name
+        environ[name] = environ[name] + ',' + value if name in environ else value
+    # 请求体已完整读入内存：分块传输的请求没有 Content-Length，按实际长度补上并标记输入已结束
+    environ['CONTENT_LENGTH'] = str(len(body))
+    environ['wsgi.input_terminated'] = True
+    return environ
+
+
+def _run_wsgi(environ):
+    """在线程池中调用Flask应用，返回 (状态码, 头部列表, 响应体)"""
+    response = {}
+    chunks = []
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = headers
+        return chunks.append
+
+    result = app(environ, start_response)
+    try:
+        chunks.extend(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], b''.join(chunks)
+
+
+async def _run_async_view(environ, view):
+    """按 Flask.full_dispatch_request 的流程运行异步视图：请求钩子、登录检查、异常处理和响应钩子"""
+    with app.request_context(environ):
+        try:
+            try:
+                rv = app.preprocess_request()
+                if rv is None:
+                    if 'user_id' not in session:
+                        rv = redirect(url_for('login'))
+                    else:
+                        rv = await view(**request.view_args)
+            except Exception as e:
+                rv = app.handle_user_exception(e)
+            response = app.finalize_request(rv)
+        except Exception as e:
+            response = app.handle_exception(e)
+        return response.status_code, list(response.headers.items()), response.get_data()
+
+
+def _async_view_for(scope):
+    adapter = app.url_map.bind(scope.get('server', ('localhost',))[0] or 'localhost', url_scheme=scope.get('scheme', 'http'))
+    try:
+        endpoint, _ = adapter.match(scope['path'], scope['method'])
+    except HTTPException:
+        return None  # 404/405/重定向交给Flask处理
+    return ASYNC_VIEWS.get(endpoint)
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await _ensure_started()
+            except Exception as e:
+                logger.error('ASGI startup failed: %s', e)
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await runtime.stop()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+    await _ensure_started()
+    body = await _read_body(receive)
+    if body is None:
+        return
+    environ = _wsgi_environ(scope, body)
+    view = _async_view_for(scope)
+    if view is not None:
+        status, headers, content = await _run_async_view(environ, view)
+    else:
+        status, headers, content = await asyncio.get_running_loop().run_in_executor(
+            runtime.wsgi_executor, _run_wsgi, environ
+        )
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+    })
+    await send({'type': 'http.response.body', 'body': content})
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(application, host='0.0.0.0', port=int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+静态资源指纹化：按内容哈希生成带版本号的文件名（如 scripts.3f2a9c1b7d4e.js），预先生成 gzip/brotli 压缩版本，
+通过 /assets/ 以 immutable 长缓存提供。内容变化后文件名随之改变，浏览器不会再请求未变化的文件。
+
+用法：
+    python assets.py [OUTPUT_DIR]   # 部署时预先构建（默认 instance/assets）
+应用启动时也会自动构建，已存在的文件不会重复生成。brotli 为可选依赖，未安装时只生成 gzip 版本。
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import sys
+
+from flask import abort, current_app, request, send_from_directory, url_for
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# 参与指纹化的静态资源类型；压缩只对文本类型有意义
+ASSET_EXTENSIONS = ('.css', '.js')
+MANIFEST_NAME = 'manifest.json'
+# 带哈希的文件名永不变化，可以缓存一年
+ASSET_MAX_AGE = 365 * 24 * 3600
+# 按优先级排列的 (Content-Encoding, 文件后缀)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _hashed_name(name, content):
+    root, ext = os.path.splitext(name)
+    return f'{root}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+
+
+def _write_once(path, data):
+    """文件已存在时跳过（同名即同内容）；先写临时文件再改名，避免多进程同时构建时读到半个文件"""
+    if os.path.exists(path):
+        return False
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def build(static_dir, output_dir):
+    """构建全部资源及压缩版本，写入清单并返回 {原文件名: 带哈希的文件名}"""
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {}
+    written = 0
+    for name in sorted(os.listdir(static_dir)):
+        if not name.endswith(ASSET_EXTENSIONS):
+            continue
+        with open(os.path.join(static_dir, name), 'rb') as f:
+            content = f.read()
+        hashed = _hashed_name(name, content)
+        manifest[name] = hashed
+        path = os.path.join(output_dir, hashed)
+        written += _write_once(path, content)
+        variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content, quality=11)))
+        for suffix, data in variants:
+            # 压缩后没有变小的文件只提供原始版本
+            if len(data) < len(content):
+                written += _write_once(path + suffix, data)
+    manifest_data = json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8')
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    tmp_path = f'{manifest_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(manifest_data)
+    os.replace(tmp_path, manifest_path)
+    logger.info('Built %d assets into %s (%d files written, brotli %s)', len(manifest), output_dir, written,
+                'enabled' if brotli is not None else 'unavailable')
+    return manifest
+
+
+def init_assets(app):
+    """启动时构建资源并注册模板函数 asset_url"""
+    output_dir = app.config.get('ASSETS_DIR') or os.path.join(app.instance_path, 'assets')
+    manifest = build(app.static_folder, output_dir)
+    app.extensions['assets'] = {'dir': output_dir, 'manifest': manifest}
+    app.add_template_global(asset_url)
+
+
+def asset_url(name):
+    """模板中引用静态资源：返回带哈希的 /assets/ 地址；未指纹化的文件回退到 /static/"""
+    hashed = current_app.extensions['assets']['manifest'].get(name)
+    if hashed is None:
+        return url_for('static', filename=name)
+    return url_for('asset', filename=hashed)
+
+
+def send_asset(filename):
+    """按 Accept-Encoding 选择预压缩版本，以 immutable 长缓存返回"""
+    output_dir = current_app.extensions['assets']['dir']
+    path = safe_join(output_dir, filename)
+    if path is None or not filename.endswith(ASSET_EXTENSIONS):
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = None
+    for candidate, suffix in ENCODINGS:
+        if request.accept_encodings[candidate] and os.path.isfile(path + suffix):
+            encoding = candidate
+            filename += suffix
+            break
+    response = send_from_directory(output_dir, filename, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'assets')
+    build(static_dir, sys.argv[1] if len(sys.argv) > 1 else default_dir)
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+HTTP压测脚本：在临时SQLite数据库中造数，启动本地服务，用并发模拟客户端跑完整的练习流程，
+输出每个路由的吞吐量和 p50/p95/p99 延迟，并写入JSON文件便于在不同提交之间对比
+
+用法：
+    python benchmark.py                                  # 默认规模，20个客户端压测30秒
+    python benchmark.py --clients 50 --duration 60 --output results.json
+    python benchmark.py --users 500 --wordbooks 10 --units 20 --words 30
+    python benchmark.py --asgi --clients 200                # 用 uvicorn 运行 asgi.py 的异步模式
+
+每个模拟客户端循环执行：登录 -> check_device_auth -> 单词书详情 -> 模式A练习页 -> 逐题提交 ->
+批量提交 -> 模式B逐题提交 -> 错题复习页。
+"""
+import argparse
+import datetime
+import http.cookiejar
+import json
+import logging
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)  # 导入 app 后根logger级别由 LOG_LEVEL 决定，报告输出不受其影响
+
+PASSWORD = 'bench123'
+# 服务端和造数使用同一哈希参数，避免登录时触发重新哈希
+PASSWORD_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='单词书应用HTTP压测')
+    parser.add_argument('--users', type=int, default=50, help='用户数')
+    parser.add_argument('--wordbooks', type=int, default=3, help='单词书数')
+    parser.add_argument('--units', type=int, default=10, help='每本单词书的单元数')
+    parser.add_argument('--words', type=int, default=20, help='每个单元的单词数')
+    parser.add_argument('--progress', type=float, default=0.5, help='每名用户已有进度的单元比例')
+    parser.add_argument('--mistakes', type=int, default=5, help='有进度的单元中每名用户的错题数')
+    parser.add_argument('--clients', type=int, default=20, help='并发模拟客户端数')
+    parser.add_argument('--duration', type=float, default=30, help='压测时长（秒）')
+    parser.add_argument('--output', default='benchmark-results.json', help='结果JSON文件路径')
+    parser.add_argument('--seed', type=int, default=1, help='随机数种子')
+    parser.add_argument('--asgi', action='store_true', help='以ASGI异步模式（asgi.py + uvicorn）启动服务')
+    parser.add_argument('--serve', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def seed_database(args):
+    """用批量插入造数，返回 {wordbook_id: [(unit, [(word_id, english), ...]), ...]}"""
+    from werkzeug.security import generate_password_hash
+
+    from app import app
+    from database import db
+    from models import User, WordBook, Word, UserWordProgress, UserWordMistake
+    import unit_catalog
+
+    rng = random.Random(args.seed)
+    now = datetime.datetime.now()
+    started = time.perf_counter()
+    with app.app_context():
+        db.create_all()
+        password_hash = generate_password_hash(PASSWORD, PASSWORD_METHOD)  # 所有用户共用同一密码
+        db.session.execute(User.__table__.insert(), [
+            {'username': f'bench{i}', 'password_hash': password_hash, 'created_at': now}
+            for i in range(args.users)
+        ])
+        db.session.execute(WordBook.__table__.insert(), [
+            {'title': f'Bench Book {i}', 'created_at': now} for i in range(args.wordbooks)
+        ])
+        wordbook_ids = [wid for (wid,) in db.session.query(WordBook.id).order_by(WordBook.id)]
+        db.session.execute(Word.__table__.insert(), [
+            {'wordbook_id': wid, 'unit': f'Unit {u}', 'english': f'word{u}x{w}', 'chinese': f'词{u}-{w}', 'created_at': now}
+            for wid in wordbook_ids for u in range(1, args.units + 1) for w in range(1, args.words + 1)
+        ])
+        catalog = {}
+        for wid, unit, word_id, english in db.session.query(Word.wordbook_id, Word.unit, Word.id, Word.english).order_by(Word.id):
+            units = catalog.setdefault(wid, {})
+            units.setdefault(unit, []).append((word_id, english))
+        for wid in wordbook_ids:
+            unit_catalog.rebuild(wid)
+
+        user_ids = [uid for (uid,) in db.session.query(User.id).order_by(User.id)]
+        progress_rows, mistake_rows = [], []
+        for uid in user_ids:
+            for wid, units in catalog.items():
+                for unit, words in units.items():
+                    if rng.random() >= args.progress:
+                        continue
+                    progress_rows.append({
+                        'user_id': uid, 'wordbook_id': wid, 'unit': unit,
+                        'is_completed_a': 1, 'is_completed_b': 0, 'last_attempted': now,
+                        'correct_count_a': len(words), 'incorrect_count_a': 0,
+                        'correct_count_b': 0, 'incorrect_count_b': 0, 'created_at': now
+                    })
+                    for word_id, _ in rng.sample(words, min(args.mistakes, len(words))):
+                        mistake_rows.append({
+                            'user_id': uid, 'word_id': word_id, 'wordbook_id': wid, 'unit': unit, 'mode': 'B',
+                            'incorrect_count': 1, 'correct_count': 0, 'last_incorrect': now, 'created_at': now
+                        })
+        if progress_rows:
+            db.session.execute(UserWordProgress.__table__.insert(), progress_rows)
+        if mistake_rows:
+            db.session.execute(UserWordMistake.__table__.insert(), mistake_rows)
+        db.session.commit()
+    logger.info('造数完成：%d 用户，%d 单词书，%d 单词，%d 进度，%d 错题，用时 %.1fs',
+                len(user_ids), len(wordbook_ids), sum(len(w) for u in catalog.values() for w in u.values()),
+                len(progress_rows), len(mistake_rows), time.perf_counter() - started)
+    return {wid: sorted(units.items()) for wid, units in catalog.items()}
+
+
+def serve(port, asgi=False):
+    """子进程入口：用多线程开发服务器或 uvicorn（ASGI模式）提供应用"""
+    if asgi:
+        import uvicorn
+
+        from asgi import application
+        uvicorn.run(application, host='127.0.0.1', port=port, log_level='warning')
+        return
+    from werkzeug.serving import make_server
+
+    from app import app
+    make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(env, asgi=False):
+    port = _free_port()
+    command = [sys.executable, os.path.abspath(__file__), '--serve', str(port)] + (['--asgi'] if asgi else [])
+    process = subprocess.Popen(command, env=env)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('服务进程启动失败')
+        try:
+            urllib.request.urlopen(base_url + '/login', timeout=1).close()
+            return process, base_url
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('等待服务启动超时')
+
+
+class Recorder:
+    """线程安全地收集每个路由的延迟（秒）和错误数"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, elapsed, ok):
+        with self._lock:
+            self.latencies.setdefault(route, []).append(elapsed)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+
+class SimulatedClient:
+    """一个模拟的学生设备：独立的Cookie会话和设备指纹"""
+
+    def __init__(self, base_url, username, recorder, rng):
+        self.base_url = base_url
+        self.username = username
+        self.recorder = recorder
+        self.rng = rng
+        self.fingerprint = f'bench-device-{username}'
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, route, path, method='GET', data=None, json_body=None):
+        headers = {}
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            body = urllib.parse.urlencode(data).encode('utf-8')
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        req = urllib.request.Request(self.base_url + urllib.parse.quote(path), data=body, headers=headers, method=method)
+        started = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=30) as response:
+                response.read()
+                ok = True
+        except urllib.error.HTTPError as e:
+            e.read()
+            ok = e.code < 500
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            ok = False
+        self.recorder.record(route, time.perf_counter() - started, ok)
+
+    def session(self, catalog):
+        """执行一轮完整的练习流程"""
+        wordbook_id = self.rng.choice(list(catalog))
+        unit, words = self.rng.choice(catalog[wordbook_id])
+        self.request('login', '/login', 'POST', json_body={
+            'username': self.username, 'password': PASSWORD, 'device_fingerprint': self.fingerprint
+        })
+        self.request('check_device_auth', '/check_device_auth', 'POST', json_body={'device_fingerprint': self.fingerprint})
+        self.request('wordbook_detail', f'/wordbook/{wordbook_id}')
+        self.request('practice_a', f'/wordbook/{wordbook_id}/practice_a/{unit}')
+        for word_id, english in self.rng.sample(words, min(5, len(words))):
+            answer = english if self.rng.random() < 0.8 else 'wrong'
+            self.request('practice_a_submit', f'/wordbook/{wordbook_id}/practice_a/{unit}/submit', 'POST',
+                         data={'word_id': word_id, 'answer': answer})
+        batch = [{'word_id': word_id, 'answer': english if self.rng.random() < 0.8 else 'wrong'}
+                 for word_id, english in words]
+        self.request('submit_batch', f'/wordbook/{wordbook_id}/practice_a/{unit}/submit_batch', 'POST',
+                     json_body={'answers': batch})
+        for word_id, english in self.rng.sample(words, min(3, len(words))):
+            answer = english if self.rng.random() < 0.7 else 'wrong'
+            self.request('practice_b_submit', f'/wordbook/{wordbook_id}/practice_b/{unit}/submit', 'POST',
+                         data={'word_id': word_id, 'answer': answer})
+        self.request('review_mode_b', f'/wordbook/{wordbook_id}/review_b/{unit}')
+
+
+def percentile(sorted_values, pct):
+    """最近秩法计算百分位数"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(recorder, elapsed):
+    routes = {}
+    for route, latencies in sorted(recorder.latencies.items()):
+        values = sorted(latencies)
+        routes[route] = {
+            'requests': len(values),
+            'errors': recorder.errors.get(route, 0),
+            'rps': round(len(values) / elapsed, 2),
+            'p50_ms': round(percentile(values, 50) * 1000, 2),
+            'p95_ms': round(percentile(values, 95) * 1000, 2),
+            'p99_ms': round(percentile(values, 99) * 1000, 2),
+            'mean_ms': round(sum(values) / len(values) * 1000, 2),
+        }
+    total = sum(r['requests'] for r in routes.values())
+    return {
+        'requests': total,
+        'errors': sum(r['errors'] for r in routes.values()),
+        'rps': round(total / elapsed, 2),
+        'routes': routes,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(args):
+    work_dir = tempfile.mkdtemp(prefix='wordbook-bench-')
+    env = dict(os.environ,
+               DATABASE_URL='sqlite:///' + os.path.join(work_dir, 'bench.db'),
+               FLASK_CONFIG='production',
+               PASSWORD_HASH_METHOD=PASSWORD_METHOD,
+               LOG_LEVEL=os.environ.get('LOG_LEVEL', 'ERROR'),
+               LOG_LEVELS=os.environ.get('LOG_LEVELS', 'werkzeug=WARNING'))
+    os.environ.update(env)
+    server = None
+    try:
+        catalog = seed_database(args)
+        server, base_url = start_server(env, args.asgi)
+        logger.info('服务已启动：%s，%d 个客户端压测 %.0f 秒', base_url, args.clients, args.duration)
+
+        recorder = Recorder()
+        stop_at = time.monotonic() + args.duration
+
+        def run_client(idx):
+            rng = random.Random(args.seed * 1000 + idx)
+            client = SimulatedClient(base_url, f'bench{idx % args.users}', recorder, rng)
+            while time.monotonic() < stop_at:
+                client.session(catalog)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=run_client, args=(idx,), daemon=True) for idx in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    result = {
+        'commit': _git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'duration_s': round(elapsed, 2),
+        'config': {k: v for k, v in vars(args).items() if k not in ('serve', 'output')},
+        **summarize(recorder, elapsed),
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return result
+
+
+def print_report(result):
+    logger.info('%-20s %8s %6s %8s %9s %9s %9s', 'route', 'requests', 'errors', 'req/s', 'p50(ms)', 'p95(ms)', 'p99(ms)')
+    for route, stats in result['routes'].items():
+        logger.info('%-20s %8d %6d %8.1f %9.1f %9.1f %9.1f', route, stats['requests'], stats['errors'],
+                    stats['rps'], stats['p50_ms'], stats['p95_ms'], stats['p99_ms'])
+    logger.info('总计 %d 个请求，%d 个错误，%.1f req/s', result['requests'], result['errors'], result['rps'])
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.serve:
+        serve(args.serve, args.asgi)
+        sys.exit(0)
+    result = run_benchmark(args)
+    print_report(result)
+    logger.info('结果已写入 %s', args.output)
+    sys.exit(1 if result['errors'] else 0)
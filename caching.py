@@ -0,0 +1,71 @@
+"""
+进程内缓存的通用实现
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """按条目数和估算字节数双重限制的线程安全LRU缓存，条目带有效期"""
+
+    def __init__(self, max_entries=1024, max_bytes=32 * 1024 * 1024, ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, size, expires)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """返回未过期的缓存值，不存在或已过期时返回None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[2] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, size, time.monotonic() + self.ttl)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, predicate):
+        """删除所有 predicate(key, value) 为真的条目，返回删除数量"""
+        with self._lock:
+            keys = [key for key, entry in self._data.items() if predicate(key, entry[0])]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+查询预算回归检查：用测试客户端请求 app.py 的每个路由，统计执行的SQL语句数，超出预算时以非零状态退出
+
+用法：
+    python check_query_budgets.py      # 在临时数据库中造数并检查全部路由
+    python check_query_budgets.py -v   # 同时打印超预算路由执行的SQL
+
+预算按"冷缓存"计算：每个路由检查前都会清空单词读缓存和设备授权缓存。
+新增路由时必须在 ROUTE_BUDGETS 中登记预算，否则检查失败。
+"""
+import atexit
+import contextlib
+import datetime
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+from sqlalchemy import event
+
+# 必须在导入 app 之前指定数据库，避免检查脚本写入正式库
+_db_dir = tempfile.mkdtemp(prefix='query-budget-')
+atexit.register(shutil.rmtree, _db_dir, ignore_errors=True)
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_db_dir, 'budget.db')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from werkzeug.security import generate_password_hash
+
+from app import app
+from database import db
+from models import User, WordBook, Word, UserWordProgress, UserWordMistake, ReviewSchedule, DeviceAuth
+import device_auth_cache
+from pagination import encode_cursor
+import unit_catalog
+import word_cache
+
+logger = logging.getLogger('check_query_budgets')
+
+# 造数规模：N+1 查询会随这些数量放大，从而超出预算
+USERS = 30
+WORDBOOKS = 3
+UNITS_PER_WORDBOOK = 5
+WORDS_PER_UNIT = 20
+# 登录检查使用低强度哈希，避免脚本耗时集中在密码计算上
+PASSWORD_METHOD = 'pbkdf2:sha256:1000'
+PASSWORD = 'secret1'
+FINGERPRINT = 'budget-check-device'
+
+
+class QueryBudgetExceeded(AssertionError):
+    """路由执行的SQL语句数超出声明的预算"""
+
+
+@contextlib.contextmanager
+def query_budget(engine, budget, label=''):
+    """
+    统计代码块内当前线程在 engine 上执行的SQL语句（不含后台任务线程），超过 budget 条时抛出 QueryBudgetExceeded。
+    产出的列表在代码块结束后包含全部语句，便于排查。
+    """
+    statements = []
+    thread_id = threading.get_ident()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread_id:
+            statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    if len(statements) > budget:
+        raise QueryBudgetExceeded(f'{label}: {len(statements)} 条SQL，超出预算 {budget} 条')
+
+
+# (端点, 用户, 方法, URL, 请求参数, 预算)
+# 用户为 None 表示匿名请求；URL 中的 {wb}/{word} 在运行时替换为造数得到的ID
+# 请求参数为 'revalidate' 时先不计数地请求一次，再带上返回的ETag重复请求（条件GET应只做一次版本查询）
+ROUTE_BUDGETS = [
+    ('index', 'kid', 'GET', '/', {}, 0),
+    ('register', None, 'GET', '/register', {}, 0),
+    ('register', None, 'POST', '/register', {'data': {'username': 'newkid', 'password': PASSWORD}}, 3),
+    ('login', None, 'GET', '/login', {}, 0),
+    ('login', None, 'POST', '/login',
+     {'json': {'username': 'kid', 'password': PASSWORD, 'device_fingerprint': FINGERPRINT}}, 4),
+    ('check_device_auth', None, 'POST', '/check_device_auth', {'json': {'device_fingerprint': FINGERPRINT}}, 2),
+    ('logout', 'kid', 'GET', '/logout', {}, 0),
+    ('wordbook_list', 'kid', 'GET', '/wordbook/list', {}, 2),
+    ('wordbook_list', 'kid', 'GET', '/wordbook/list', 'revalidate', 1),
+    ('wordbook_list', 'kid', 'GET', '/wordbook/list?limit=2&format=json&cursor={list_cursor}', {}, 2),
+    ('wordbook_create', 'admin', 'GET', '/wordbook/create', {}, 0),
+    ('wordbook_create', 'admin', 'POST', '/wordbook/create', {'data': {'title': 'Budget Book'}}, 3),
+    ('wordbook_edit', 'admin', 'GET', '/wordbook/{wb}/edit', {}, 2),
+    ('wordbook_words', 'admin', 'GET', '/wordbook/{wb}/words?limit=10&cursor={word_cursor}', {}, 1),
+    ('wordbook_detail', 'kid', 'GET', '/wordbook/{wb}', {}, 4),
+    ('wordbook_detail', 'kid', 'GET', '/wordbook/{wb}', 'revalidate', 1),
+    ('wordbook_select', 'kid', 'POST', '/wordbook/{wb}/select', {}, 4),
+    ('practice_a', 'kid', 'GET', '/wordbook/{wb}/practice_a/Unit 1', {}, 3),
+    ('practice_a', 'kid', 'GET', '/wordbook/{wb}/practice_a/Unit 1', 'revalidate', 1),
+    ('unit_bundle', 'kid', 'GET', '/wordbook/{wb}/units/Unit 1/bundle?v=1', {}, 1),
+    ('unit_bundle', 'kid', 'GET', '/wordbook/{wb}/units/Unit 1/bundle?v=1', 'revalidate', 1),
+    ('service_worker', None, 'GET', '/sw.js', {}, 0),
+    ('practice_a_submit', 'kid', 'POST', '/wordbook/{wb}/practice_a/Unit 1/submit',
+     {'data': {'word_id': '{word}', 'answer': 'word1'}}, 6),
+    ('practice_a_complete', 'kid', 'POST', '/wordbook/{wb}/practice_a/Unit 1/complete', {}, 3),
+    ('practice_b', 'kid', 'GET', '/wordbook/{wb}/practice_b/Unit 1', {}, 4),
+    ('practice_b', 'kid', 'GET', '/wordbook/{wb}/practice_b/Unit 1', 'revalidate', 1),
+    ('practice_b_submit', 'kid', 'POST', '/wordbook/{wb}/practice_b/Unit 1/submit',
+     {'data': {'word_id': '{word}', 'answer': 'wrong'}}, 8),
+    ('review', 'kid', 'GET', '/review/{wb}', {}, 3),
+    ('review', 'kid', 'GET', '/review/{wb}', 'revalidate', 1),
+    ('review_feed', 'kid', 'GET', '/review/today', {}, 1),
+    ('review_feed', 'kid', 'GET', '/review/today?limit=5&format=json&cursor={feed_cursor}', {}, 1),
+    ('review_mode_b', 'kid', 'GET', '/wordbook/{wb}/review_b/Unit 1', {}, 2),
+    ('review_b_submit', 'kid', 'POST', '/wordbook/{wb}/review_b/Unit 1/submit',
+     {'data': {'word_id': '{word}', 'answer': 'word1'}}, 8),
+    ('review_due', 'kid', 'GET', '/review/due', {}, 1),
+    ('submit_batch', 'kid', 'POST', '/wordbook/{wb}/practice_b/Unit 1/submit_batch',
+     {'json': {'answers': [{'word_id': '{word}', 'answer': 'wrong'}] * 10}}, 8),
+    ('import_job_status', 'admin', 'GET', '/wordbook/import_csv/job/missing', {}, 1),
+    ('asset', None, 'GET', '/assets/{asset}', {}, 0),
+    ('admin_cache_stats', 'admin', 'GET', '/admin/cache_stats', {}, 0),
+    ('admin_metrics', 'admin', 'GET', '/admin/metrics', {}, 0),
+    ('admin_user_progress', 'admin', 'GET', '/admin/user_progress', {}, 4),
+    ('admin_user_progress', 'admin', 'GET', '/admin/user_progress?per_page=100', {}, 4),
+    ('admin_user_progress', 'admin', 'GET', '/admin/user_progress?per_page=10&cursor={user_cursor}', {}, 4),
+    # 以下路由会修改或删除造数，放在最后执行
+    ('wordbook_edit', 'admin', 'POST', '/wordbook/{wb}/edit', 'edit_form', 12),
+    ('wordbook_words_patch', 'admin', 'PATCH', '/wordbook/{wb}/words', 'word_patch', 12),
+    ('import_csv_words', 'admin', 'POST', '/wordbook/import_csv/{wb}', 'csv_upload', 2),
+    ('wordbook_delete', 'admin', 'POST', '/wordbook/{wb_spare}/delete', {}, 11),
+]
+
+# 不纳入预算检查的端点
+EXEMPT_ENDPOINTS = {'static'}
+
+
+def seed():
+    """造数：多名用户、多本单词书，每名用户在每个单元都有进度和错题"""
+    now = datetime.datetime.now()
+    password_hash = generate_password_hash(PASSWORD, PASSWORD_METHOD)
+    db.create_all()
+    users = [User(username=name, password_hash=password_hash, created_at=now)
+             for name in ['admin', 'kid'] + [f'student{i}' for i in range(USERS - 2)]]
+    db.session.add_all(users)
+    wordbooks = [WordBook(title=f'Book {i}', created_at=now) for i in range(WORDBOOKS + 1)]
+    db.session.add_all(wordbooks)
+    db.session.flush()
+    for wordbook in wordbooks:
+        for u in range(1, UNITS_PER_WORDBOOK + 1):
+            words = [Word(wordbook_id=wordbook.id, unit=f'Unit {u}', english=f'word{w}', chinese=f'词{w}', created_at=now)
+                     for w in range(1, WORDS_PER_UNIT + 1)]
+            db.session.add_all(words)
+            db.session.flush()
+            for user in users:
+                db.session.add(UserWordProgress(
+                    user_id=user.id, wordbook_id=wordbook.id, unit=f'Unit {u}',
+                    is_completed_a=1, is_completed_b=0, last_attempted=now,
+                    correct_count_a=0, incorrect_count_a=0, correct_count_b=0, incorrect_count_b=0,
+                    created_at=now
+                ))
+                for word in words[:3]:
+                    db.session.add(UserWordMistake(
+                        user_id=user.id, word_id=word.id, wordbook_id=wordbook.id, unit=f'Unit {u}', mode='B',
+                        incorrect_count=1, correct_count=0, last_incorrect=now, created_at=now
+                    ))
+                    db.session.add(ReviewSchedule(
+                        user_id=user.id, word_id=word.id, wordbook_id=wordbook.id, unit=f'Unit {u}',
+                        repetitions=0, interval_days=0.0, ease=2.5, due_at=now - datetime.timedelta(hours=1),
+                        last_reviewed=now, created_at=now
+                    ))
+        unit_catalog.rebuild(wordbook.id)
+    db.session.add(DeviceAuth(
+        user_id=users[1].id, fingerprint_digest=device_auth_cache.fingerprint_digest(FINGERPRINT),
+        device_name='budget', auth_token='budget-token', created_at=now, last_used=now, is_active=1
+    ))
+    db.session.commit()
+    first_word = Word.query.filter_by(wordbook_id=wordbooks[0].id, unit='Unit 1').order_by(Word.id).first()
+    return {'wb': wordbooks[0].id, 'wb_spare': wordbooks[-1].id, 'word': first_word.id,
+            'feed_cursor': encode_cursor([now - datetime.timedelta(hours=1), first_word.id + 10]),
+            'word_cursor': encode_cursor([first_word.id]),
+            'user_cursor': encode_cursor([users[9].id]),
+            'list_cursor': encode_cursor([wordbooks[-1].created_at, wordbooks[-1].id])}
+
+
+def _fill(value, ids):
+    if isinstance(value, str):
+        return value.format(**ids)
+    if isinstance(value, dict):
+        return {k: _fill(v, ids) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, ids) for v in value]
+    return value
+
+
+def _request_kwargs(spec, ids):
+    """构造请求参数；编辑表单和CSV上传需要根据造数动态生成"""
+    if spec == 'edit_form':
+        words = Word.query.filter_by(wordbook_id=ids['wb']).order_by(Word.id).all()
+        data = {'title': 'Book 0 edited'}
+        for idx, word in enumerate(words):
+            data[f'words[{idx}][id]'] = str(word.id)
+            data[f'words[{idx}][unit]'] = word.unit
+            data[f'words[{idx}][english]'] = word.english
+            data[f'words[{idx}][chinese]'] = word.chinese
+        # 再追加一批新单词，覆盖新增路径
+        for idx in range(len(words), len(words) + 20):
+            data[f'words[{idx}][unit]'] = 'Unit 9'
+            data[f'words[{idx}][english]'] = f'extra{idx}'
+            data[f'words[{idx}][chinese]'] = f'新增{idx}'
+        data['delete_words'] = [str(words[0].id)]
+        return {'data': data}
+    if spec == 'word_patch':
+        words = Word.query.filter_by(wordbook_id=ids['wb']).order_by(Word.id).all()
+        return {'json': {
+            'title': 'Book 0 patched',
+            'update': [{'id': w.id, 'unit': w.unit, 'english': w.english + 's', 'chinese': w.chinese} for w in words[1:31]],
+            'add': [{'unit': 'Unit 9', 'english': f'patch{i}', 'chinese': f'补{i}'} for i in range(20)],
+            'delete': [words[-1].id],
+        }}
+    if spec == 'csv_upload':
+        import io
+        content = 'unit,english,chinese\n' + ''.join(f'Unit 9,new{i},新{i}\n' for i in range(50))
+        return {'data': {'csv_file': (io.BytesIO(content.encode('utf-8')), 'words.csv')},
+                'content_type': 'multipart/form-data'}
+    return _fill(spec, ids)
+
+
+def _client(username):
+    client = app.test_client()
+    if username:
+        with client.session_transaction() as sess:
+            user = User.query.filter_by(username=username).first()
+            sess['user_id'] = user.id
+            sess['username'] = user.username
+    return client
+
+
+def check_query_budgets(verbose=False):
+    app.config['PASSWORD_HASH_METHOD'] = PASSWORD_METHOD
+    app.config['IMPORT_UPLOAD_DIR'] = _db_dir
+    failures = 0
+    with app.app_context():
+        ids = seed()
+        ids['asset'] = app.extensions['assets']['manifest']['scripts.js']
+        engine = db.engine
+
+        registered = {rule.endpoint for rule in app.url_map.iter_rules()} - EXEMPT_ENDPOINTS
+        missing = registered - {endpoint for endpoint, *_ in ROUTE_BUDGETS}
+        for endpoint in sorted(missing):
+            failures += 1
+            logger.error('FAIL %s: 未登记查询预算', endpoint)
+
+        for endpoint, username, method, url, spec, budget in ROUTE_BUDGETS:
+            client = _client(username)
+            url = url.format(**ids)
+            if spec == 'revalidate':
+                kwargs = {'headers': {'If-None-Match': client.open(url, method=method).headers['ETag']}}
+            else:
+                kwargs = _request_kwargs(spec, ids)
+            word_cache.invalidate_wordbook(ids['wb'])
+            device_auth_cache.invalidate(device_auth_cache.fingerprint_digest(FINGERPRINT))
+            label = f'{method} {url}'
+            try:
+                with query_budget(engine, budget, label) as statements:
+                    response = client.open(url, method=method, **kwargs)
+            except QueryBudgetExceeded as e:
+                failures += 1
+                logger.error('FAIL %s [%s]: %s', endpoint, response.status_code, e)
+                if verbose:
+                    for statement in statements:
+                        logger.error('       %s', ' '.join(statement.split()))
+                continue
+            if response.status_code >= 500 or (spec == 'revalidate' and response.status_code != 304):
+                failures += 1
+                logger.error('FAIL %s: %s 返回 %s', endpoint, label, response.status_code)
+                continue
+            logger.info('ok   %s: %s [%s] %d/%d 条SQL', endpoint, label, response.status_code, len(statements), budget)
+    return failures
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s', force=True)
+    failures = check_query_budgets(verbose='-v' in sys.argv[1:])
+    if failures:
+        logger.error('%d 个路由超出查询预算', failures)
+        sys.exit(1)
+    logger.info('所有路由均在查询预算内')
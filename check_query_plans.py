@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+查询计划回归检查：对热点查询执行 EXPLAIN QUERY PLAN，出现全表扫描时以非零状态退出
+
+用法：
+    python check_query_plans.py              # 使用 models.py 建出的空库检查索引声明
+    python check_query_plans.py wordbook.db  # 检查已有数据库（确认迁移已执行）
+检查已有数据库时只复制其表和索引定义到内存库：migrate_indexes.py 执行过 ANALYZE 后，
+小库的 sqlite_stat1 统计会让规划器选择全表扫描，而这与索引是否齐全无关。
+"""
+import sys
+import sqlite3
+import logging
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from database import db
+from models import WordBook, Word, WordBookUnit, UserWordProgress, UserWordMistake, ReviewSchedule, DeviceAuth
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+
+def hot_queries():
+    """(名称, 语句) 列表，与 app.py 中对应路由的查询保持一致"""
+    return [
+        ('practice_a/practice_b: 单元单词',
+         db.select(Word).where(Word.wordbook_id == 1, Word.unit == 'Unit 1')),
+        ('grading: 单元单词数',
+         db.select(db.func.count(Word.id)).where(Word.wordbook_id == 1, Word.unit == 'Unit 1')),
+        ('wordbook_detail/wordbook_select: 单元目录',
+         db.select(WordBookUnit.unit, WordBookUnit.word_count).where(
+             WordBookUnit.wordbook_id == 1).order_by(WordBookUnit.position)),
+        ('unit_catalog.rebuild: 单元汇总',
+         db.select(Word.unit, db.func.count(Word.id)).where(Word.wordbook_id == 1).group_by(Word.unit)),
+        ('wordbook_list: 按创建时间排序',
+         db.select(WordBook).order_by(WordBook.created_at.desc(), WordBook.id.desc()).limit(21)),
+        ('wordbook_list: 游标续读',
+         db.select(WordBook).where(
+             db.tuple_(WordBook.created_at, WordBook.id) < db.tuple_(db.literal('2024-01-01 00:00:00'), 10)
+         ).order_by(WordBook.created_at.desc(), WordBook.id.desc()).limit(21)),
+        ('wordbook_edit/wordbook_words: 按ID分批加载',
+         db.select(Word).where(Word.wordbook_id == 1, Word.id > 100).order_by(Word.id).limit(101)),
+        ('grading: 单元进度',
+         db.select(UserWordProgress).where(
+             UserWordProgress.user_id == 1, UserWordProgress.wordbook_id == 1, UserWordProgress.unit == 'Unit 1')),
+        ('grading: 单词错题',
+         db.select(UserWordMistake).where(
+             UserWordMistake.user_id == 1, UserWordMistake.word_id.in_([1, 2]), UserWordMistake.mode == 'B')),
+        ('review: 各单元错题数',
+         db.select(UserWordMistake.unit, db.func.count(UserWordMistake.id)).where(
+             UserWordMistake.user_id == 1, UserWordMistake.wordbook_id == 1, UserWordMistake.mode == 'B'
+         ).group_by(UserWordMistake.unit)),
+        ('review_mode_b: 单元错题',
+         db.select(UserWordMistake).join(Word, UserWordMistake.word_id == Word.id).where(
+             UserWordMistake.user_id == 1, UserWordMistake.wordbook_id == 1,
+             UserWordMistake.unit == 'Unit 1', UserWordMistake.mode == 'B'
+         ).order_by(UserWordMistake.last_incorrect.desc())),
+        ('review_feed: 今日到期（首页）',
+         db.select(ReviewSchedule.id).where(
+             ReviewSchedule.user_id == 1, ReviewSchedule.due_at < '2024-01-02 00:00:00'
+         ).order_by(ReviewSchedule.due_at, ReviewSchedule.id).limit(31)),
+        ('review_feed: 今日到期（游标续读）',
+         db.select(ReviewSchedule.id).where(
+             ReviewSchedule.user_id == 1, ReviewSchedule.due_at < '2024-01-02 00:00:00',
+             db.tuple_(ReviewSchedule.due_at, ReviewSchedule.id) > db.tuple_(db.literal('2024-01-01 08:00:00'), 100)
+         ).order_by(ReviewSchedule.due_at, ReviewSchedule.id).limit(31)),
+        ('scheduling: 单词复习计划',
+         db.select(ReviewSchedule).where(ReviewSchedule.user_id == 1, ReviewSchedule.word_id.in_([1, 2]))),
+        ('review_due: 到期复习队列',
+         db.select(ReviewSchedule, Word).join(Word, ReviewSchedule.word_id == Word.id).where(
+             ReviewSchedule.user_id == 1, ReviewSchedule.due_at <= '2024-01-01 00:00:00'
+         ).order_by(ReviewSchedule.due_at).limit(20)),
+        ('check_device_auth: 设备授权',
+         db.select(DeviceAuth).where(DeviceAuth.fingerprint_digest == b'0123456789abcdef', DeviceAuth.is_active == 1)),
+    ]
+
+
+def full_scans(conn, statement):
+    """返回查询计划中的全表扫描步骤（SCAN 且未使用索引）"""
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    plan = [row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql)]
+    return plan, [step for step in plan if step.startswith('SCAN') and 'USING' not in step]
+
+
+def schema_copy(db_path):
+    """只读打开已有数据库，把表和索引定义复制到内存库（不含数据和 ANALYZE 统计）"""
+    source = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        statements = [row[0] for row in source.execute(
+            "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+            "ORDER BY type != 'table'"
+        )]
+    finally:
+        source.close()
+    copy = sqlite3.connect(':memory:', check_same_thread=False)
+    for sql in statements:
+        copy.execute(sql)
+    return copy
+
+
+def check_query_plans(db_path=None):
+    if db_path:
+        copy = schema_copy(db_path)
+        engine = create_engine('sqlite://', creator=lambda: copy, poolclass=StaticPool)
+    else:
+        engine = create_engine('sqlite://')
+        db.metadata.create_all(engine)
+    failures = 0
+    with engine.connect() as conn:
+        for name, statement in hot_queries():
+            plan, scans = full_scans(conn, statement)
+            if scans:
+                failures += 1
+                logger.error(f'FAIL {name}: {"; ".join(scans)}')
+            else:
+                logger.info(f'ok   {name}: {"; ".join(plan)}')
+    engine.dispose()
+    return failures
+
+
+if __name__ == '__main__':
+    failures = check_query_plans(sys.argv[1] if len(sys.argv) > 1 else None)
+    if failures:
+        logger.error(f'{failures} 个热点查询退化为全表扫描')
+        sys.exit(1)
+    logger.info('所有热点查询均使用索引')
@@ -0,0 +1,103 @@
+"""
+条件GET：用单词书版本号和用户进度版本号在渲染前计算强ETag，If-None-Match 命中时只做一次版本查询就返回304
+"""
+import functools
+import hashlib
+import os
+
+from flask import current_app, g, make_response, request, session
+
+from database import db
+from models import User, WordBook
+
+_render_salt = None
+
+
+def _get_render_salt():
+    """模板和静态资源清单的摘要：部署后页面结构变化，旧ETag随之失效"""
+    global _render_salt
+    if _render_salt is None:
+        digest = hashlib.sha256()
+        template_dir = os.path.join(current_app.root_path, current_app.template_folder)
+        for name in sorted(os.listdir(template_dir)):
+            with open(os.path.join(template_dir, name), 'rb') as f:
+                digest.update(name.encode('utf-8') + b'\0' + f.read())
+        assets = current_app.extensions.get('assets', {})
+        digest.update(repr(sorted(assets.get('manifest', {}).items())).encode('utf-8'))
+        _render_salt = digest.hexdigest()
+    return _render_salt
+
+
+def bump_progress_version(user_id):
+    """用户的进度、错题变化时递增进度版本号（不提交事务）"""
+    db.session.query(User).filter(User.id == user_id).update(
+        {User.progress_version: User.progress_version + 1}, synchronize_session=False
+    )
+
+
+def wordbook_list_version():
+    """
+    单词书列表的版本：(数量, 版本号之和, 最大ID)。版本号只增不减；WordBook.id 为 AUTOINCREMENT，
+    删除的ID不会被复用，新建单词书总会改变最大ID，因此任何增删改都会改变其中一项
+    """
+    return tuple(db.session.query(
+        db.func.count(WordBook.id), db.func.coalesce(db.func.sum(WordBook.version), 0), db.func.max(WordBook.id)
+    ).one())
+
+
+def wordbook_version(wordbook_id, with_progress=False):
+    """单词书版本号（可附带当前用户的进度版本号），一次查询；单词书不存在时返回None"""
+    columns = [WordBook.version]
+    if with_progress:
+        columns.append(db.select(User.progress_version).where(User.id == session['user_id']).scalar_subquery())
+    row = db.session.query(*columns).filter(WordBook.id == wordbook_id).first()
+    return tuple(row) if row else None
+
+
+def page_etag(versions):
+    """ETag覆盖页面依赖的全部输入：地址、当前用户、版本号和模板摘要"""
+    key = repr((request.path, request.query_string, session.get('user_id'), session.get('username'), versions))
+    return hashlib.sha256((_get_render_salt() + key).encode('utf-8')).hexdigest()[:32]
+
+
+def set_validators(response, etag):
+    response.set_etag(etag)
+    # 页面因用户而异：只允许浏览器缓存，且每次使用前都要重新验证
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response
+
+
+def not_modified(etag):
+    """If-None-Match 与当前ETag一致时返回304响应，否则返回None"""
+    if request.if_none_match.contains(etag):
+        return set_validators(current_app.response_class(status=304), etag)
+    return None
+
+
+def respond(etag, render):
+    """ETag未变化时返回304，否则调用 render() 生成页面并附带ETag"""
+    response = not_modified(etag)
+    if response is None:
+        response = make_response(render())
+        if response.status_code == 200:
+            set_validators(response, etag)
+    return response
+
+
+def conditional_get(versions):
+    """
+    视图装饰器：versions(**view_args) 返回页面依赖的版本号元组（返回None时按普通请求处理），
+    在视图执行任何查询和渲染之前比较ETag。应放在 login_required 之后。
+    版本号保存在 g.page_versions，视图可直接用作模板片段缓存的键，无需再次查询。
+    """
+    def decorator(f):
+        @functools.wraps(f)
+        def wrap(*args, **kwargs):
+            current = g.page_versions = versions(**kwargs)
+            if current is None:
+                return f(*args, **kwargs)
+            return respond(page_etag(current), lambda: f(*args, **kwargs))
+        return wrap
+    return decorator
@@ -1,25 +1,121 @@
 import os
 
+from logging_setup import parse_mapping
+
 # Get the absolute path of the directory where this file is located.
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+def env_int(name, default):
+    """Read an integer setting from the environment, falling back to a default."""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
 class Config:
     """Base configuration class. Contains common settings."""
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'a-super-secret-key-that-you-should-change'
+    # Without SECRET_KEY set, a random key is generated per process (sessions reset on restart).
+    SECRET_KEY = os.environ.get('SECRET_KEY') or os.urandom(24)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # SQLite tuning applied to every new connection via PRAGMA statements.
+    # WAL lets readers proceed while a writer holds the lock; busy_timeout makes
+    # writers wait for the lock instead of failing with "database is locked".
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'busy_timeout': env_int('SQLITE_BUSY_TIMEOUT_MS', 5000),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'cache_size': env_int('SQLITE_CACHE_SIZE', -16000),  # negative values are KiB
+        'mmap_size': env_int('SQLITE_MMAP_SIZE', 64 * 1024 * 1024),
+        'temp_store': 'MEMORY',
+    }
+
+    # Logging. Handlers run on a background QueueListener thread. LOG_LEVELS and
+    # LOG_SAMPLE_RATES take 'logger=value' pairs separated by commas, e.g.
+    # LOG_LEVELS='sqlalchemy.engine=WARNING' or LOG_SAMPLE_RATES='answers=0.01'.
+    # Sampling only drops records below WARNING.
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')  # 'text' or 'json'
+    LOG_FILE = os.environ.get('LOG_FILE')  # defaults to stderr
+    LOG_LEVELS = parse_mapping(os.environ.get('LOG_LEVELS'))
+    LOG_SAMPLE_RATES = parse_mapping(os.environ.get('LOG_SAMPLE_RATES', 'answers=0.1'), float)
+
+    # Connection pool settings passed to create_engine.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': env_int('DB_POOL_SIZE', 10),
+        'max_overflow': env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': env_int('DB_POOL_RECYCLE', 3600),
+        'pool_pre_ping': True,
+        'connect_args': {
+            'timeout': env_int('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000,
+            'check_same_thread': False,
+        },
+    }
+
+    # In-process LRU cache of unit word lists. The TTL bounds staleness for edits
+    # made in other worker processes; local edits invalidate entries immediately.
+    WORD_CACHE_MAX_ENTRIES = env_int('WORD_CACHE_MAX_ENTRIES', 1024)
+    WORD_CACHE_MAX_BYTES = env_int('WORD_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+    WORD_CACHE_TTL = env_int('WORD_CACHE_TTL', 300)
+
+    # Device auto-login cache keyed by fingerprint digest. last_used writes are
+    # coalesced and flushed at most once per DEVICE_AUTH_FLUSH_INTERVAL seconds.
+    DEVICE_AUTH_CACHE_MAX_ENTRIES = env_int('DEVICE_AUTH_CACHE_MAX_ENTRIES', 4096)
+    DEVICE_AUTH_CACHE_TTL = env_int('DEVICE_AUTH_CACHE_TTL', 60)
+    DEVICE_AUTH_FLUSH_INTERVAL = env_int('DEVICE_AUTH_FLUSH_INTERVAL', 60)
+
+    # Password hashing. Method/salt follow werkzeug.security.generate_password_hash;
+    # existing hashes are upgraded on the next successful login after a change.
+    # Hashing runs on a small thread pool so logins cannot occupy every request
+    # thread; past PASSWORD_HASH_MAX_PENDING waiting logins are rejected with 503.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_SALT_LENGTH = env_int('PASSWORD_SALT_LENGTH', 16)
+    PASSWORD_HASH_WORKERS = env_int('PASSWORD_HASH_WORKERS', 2)
+    PASSWORD_HASH_MAX_PENDING = env_int('PASSWORD_HASH_MAX_PENDING', 64)
+    PASSWORD_HASH_TIMEOUT = env_int('PASSWORD_HASH_TIMEOUT', 10)
+
+    # ASGI serving mode (asgi.py). Practice pages read through a pool of
+    # read-only aiosqlite connections; answer submissions queue for a single
+    # writer thread and get 503 once ASYNC_WRITE_QUEUE_SIZE are waiting. Other
+    # routes run as plain WSGI on ASYNC_WSGI_THREADS threads.
+    ASYNC_READ_CONNECTIONS = env_int('ASYNC_READ_CONNECTIONS', 4)
+    ASYNC_WRITE_QUEUE_SIZE = env_int('ASYNC_WRITE_QUEUE_SIZE', 1000)
+    ASYNC_WSGI_THREADS = env_int('ASYNC_WSGI_THREADS', 8)
+
+    # Fingerprinted, precompressed static assets served from /assets/.
+    ASSETS_DIR = os.environ.get('ASSETS_DIR')  # defaults to <instance>/assets
+
+    # Compiled Jinja templates are cached on disk so new workers start warm.
+    # Rendered fragments inside {% cache %} blocks are keyed by data versions;
+    # the TTL only bounds memory held by fragments whose versions moved on.
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR')  # defaults to <instance>/jinja-cache
+    FRAGMENT_CACHE_MAX_ENTRIES = env_int('FRAGMENT_CACHE_MAX_ENTRIES', 4096)
+    FRAGMENT_CACHE_MAX_BYTES = env_int('FRAGMENT_CACHE_MAX_BYTES', 16 * 1024 * 1024)
+    FRAGMENT_CACHE_TTL = env_int('FRAGMENT_CACHE_TTL', 600)
+
+    # Background CSV import jobs.
+    IMPORT_WORKERS = env_int('IMPORT_WORKERS', 2)
+    IMPORT_UPLOAD_DIR = os.environ.get('IMPORT_UPLOAD_DIR')  # defaults to <instance>/imports
+
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG')
+    LOG_SAMPLE_RATES = parse_mapping(os.environ.get('LOG_SAMPLE_RATES'), float)
     SQLALCHEMY_DATABASE_URI = os.environ.get('DEV_DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'dev-wordbook.db')
 
 class ProductionConfig(Config):
     """Production configuration."""
     DEBUG = False
-    # Note: This points to the database inside the 'instance' folder, which is a best practice.
+    # Defaults to the existing wordbook.db next to the application; set DATABASE_URL to move it.
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
-        'sqlite:///' + os.path.join(basedir, 'instance', 'wordbook.db')
+        'sqlite:///' + os.path.join(basedir, 'wordbook.db')
+
+    SQLITE_PRAGMAS = dict(
+        Config.SQLITE_PRAGMAS,
+        cache_size=env_int('SQLITE_CACHE_SIZE', -64000),
+        mmap_size=env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+    )
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,141 @@
+"""
+CSV单词导入引擎：一次性加载已有单词做内存去重，按块批量插入
+"""
+import csv
+import datetime
+import io
+import logging
+import time
+
+from database import db
+from models import Word
+from unit_catalog import add_words
+from word_edits import bump_version
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_HEADERS = ['unit', 'english', 'chinese']
+ENCODINGS = ['utf-8', 'utf-8-sig', 'gbk', 'gb2312']
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class CSVImportError(ValueError):
+    """CSV文件本身无法导入（编码、标题行错误），消息可直接返回给用户"""
+
+
+def decode_csv(content):
+    """尝试不同的编码解码上传的文件内容"""
+    logger.info('文件大小: %s 字节', len(content))
+    for encoding in ENCODINGS:
+        try:
+            decoded_content = content.decode(encoding)
+            logger.info('成功使用 %s 编码解码', encoding)
+            break
+        except UnicodeDecodeError:
+            logger.warning('无法使用 %s 编码解码', encoding)
+    else:
+        logger.error('无法解码文件内容')
+        raise CSVImportError('文件编码不支持，请使用UTF-8编码保存CSV文件')
+
+    # 移除BOM头（如果存在）
+    if decoded_content.startswith('\ufeff'):
+        decoded_content = decoded_content[1:]
+        logger.info('移除BOM头')
+    return decoded_content
+
+
+def read_csv_rows(text):
+    """校验标题行，返回逐行产出 (行号, 原始行, 列索引) 的迭代器"""
+    csv_reader = csv.reader(io.StringIO(text))
+    headers = next(csv_reader, None)
+    if not headers or len(headers) < 3:
+        logger.warning('Invalid CSV format')
+        raise CSVImportError('CSV格式错误，至少需要3列数据')
+
+    headers_lower = [h.lower().strip() for h in headers]
+    logger.debug('CSV headers: %s', headers)
+    missing_headers = [h for h in REQUIRED_HEADERS if h not in headers_lower]
+    if missing_headers:
+        logger.warning('Invalid CSV headers: %s, missing: %s', headers, missing_headers)
+        raise CSVImportError(f'CSV标题行必须包含：unit, english, chinese。缺少：{missing_headers}')
+
+    columns = tuple(headers_lower.index(h) for h in REQUIRED_HEADERS)
+    return ((row_num, row, columns) for row_num, row in enumerate(csv_reader, 2))  # 从第2行开始计数
+
+
+def _validate_row(row_num, row, columns):
+    """返回 ((unit, english, chinese), None) 或 (None, 错误信息)"""
+    if len(row) < 3 or len(row) <= max(columns):
+        return None, f'第{row_num}行：数据不完整'
+    unit, english, chinese = (row[idx].strip() for idx in columns)
+    if not unit or len(unit) > 50:
+        return None, f'第{row_num}行：单元名称必须在1-50字符之间'
+    if not english or len(english) > 50:
+        return None, f'第{row_num}行：英文单词必须在1-50字符之间'
+    if not chinese or len(chinese) > 50:
+        return None, f'第{row_num}行：中文释义必须在1-50字符之间'
+    return (unit, english, chinese), None
+
+
+def import_rows(wordbook_id, rows, chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None):
+    """
+    把CSV行导入到单词书（不提交事务）。
+    已有单词的 (unit, english, chinese) 只查询一次放入集合，文件内的重复行同样会被跳过；
+    通过校验的行按 chunk_size 分块用 executemany 批量插入，每插入一块后调用 on_chunk(stats)。
+    返回统计信息 {'parsed', 'imported', 'rejected', 'errors'}。
+    """
+    existing = {
+        tuple(key) for key in db.session.query(Word.unit, Word.english, Word.chinese)
+        .filter(Word.wordbook_id == wordbook_id)
+    }
+    logger.info('Loaded %s existing word keys for wordbook %s', len(existing), wordbook_id)
+
+    created_at = datetime.datetime.now()
+    insert = Word.__table__.insert()
+    stats = {'parsed': 0, 'imported': 0, 'rejected': 0, 'errors': []}
+    seen_rows = {}  # 本文件内已接受的单词 -> 行号
+    chunk = []
+
+    def flush_chunk():
+        started = time.perf_counter()
+        db.session.execute(insert, chunk)
+        unit_counts = {}
+        for row in chunk:
+            unit_counts[row['unit']] = unit_counts.get(row['unit'], 0) + 1
+        add_words(wordbook_id, unit_counts)
+        if not bump_version(wordbook_id):
+            # 单词书在导入过程中被删除：抛出异常让调用方回滚本块，不留下悬空的单词
+            raise CSVImportError('单词书已被删除，导入已停止')
+        elapsed = time.perf_counter() - started
+        stats['imported'] += len(chunk)
+        logger.info('Imported chunk of %d words for wordbook %s in %.3fs (%.0f rows/sec)',
+                    len(chunk), wordbook_id, elapsed, len(chunk) / max(elapsed, 1e-6))
+        chunk.clear()
+        if on_chunk:
+            on_chunk(stats)
+
+    for row_num, row, columns in rows:
+        stats['parsed'] += 1
+        key, error = _validate_row(row_num, row, columns)
+        if key is not None and key in existing:
+            key, error = None, f'第{row_num}行：该单词已存在'
+        elif key is not None and key in seen_rows:
+            key, error = None, f'第{row_num}行：与第{seen_rows[key]}行重复'
+        if key is None:
+            stats['rejected'] += 1
+            stats['errors'].append(error)
+            continue
+        seen_rows[key] = row_num
+        chunk.append({
+            'wordbook_id': wordbook_id,
+            'unit': key[0],
+            'english': key[1],
+            'chinese': key[2],
+            'created_at': created_at
+        })
+        if len(chunk) >= chunk_size:
+            flush_chunk()
+
+    if chunk:
+        flush_chunk()
+    return stats
@@ -0,0 +1,106 @@
+"""
+设备自动登录缓存：按设备指纹摘要缓存授权信息，last_used 更新合并后定期批量写入
+"""
+import datetime
+import hashlib
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+
+from caching import LRUCache
+from database import db
+from models import DeviceAuth
+
+logger = logging.getLogger(__name__)
+
+# 缓存的授权信息
+CachedDeviceAuth = namedtuple('CachedDeviceAuth', ['device_auth_id', 'user_id', 'username', 'auth_token'])
+_ENTRY_SIZE = 256  # 单条缓存的估算字节数
+
+_cache = None
+_cache_lock = threading.Lock()
+
+# 待写入的 last_used：{device_auth_id: 最后使用时间}
+_pending_last_used = {}
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def fingerprint_digest(device_fingerprint):
+    """把任意长度的设备指纹压缩为16字节摘要，用于存储和索引"""
+    return hashlib.blake2b(device_fingerprint.encode('utf-8'), digest_size=16).digest()
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = current_app.config
+                max_entries = config.get('DEVICE_AUTH_CACHE_MAX_ENTRIES', 4096)
+                _cache = LRUCache(
+                    max_entries=max_entries,
+                    max_bytes=max_entries * _ENTRY_SIZE,
+                    ttl=config.get('DEVICE_AUTH_CACHE_TTL', 60)
+                )
+    return _cache
+
+
+def get_cached(digest):
+    return _get_cache().get(digest)
+
+
+def store(digest, device_auth, user):
+    entry = CachedDeviceAuth(device_auth.id, user.id, user.username, device_auth.auth_token)
+    _get_cache().put(digest, entry, _ENTRY_SIZE)
+    return entry
+
+
+def invalidate(digest):
+    """设备授权变更（重新分配、禁用、令牌更新）后清除缓存"""
+    _get_cache().invalidate(lambda key, value: key == digest)
+
+
+def invalidate_user(user_id):
+    """用户退出登录后清除其所有设备的缓存"""
+    removed = _get_cache().invalidate(lambda key, value: value.user_id == user_id)
+    logger.debug('Device auth cache invalidated for user %s: %s entries', user_id, removed)
+
+
+def touch(device_auth_id):
+    """记录一次自动登录，last_used 稍后批量写入"""
+    with _pending_lock:
+        _pending_last_used[device_auth_id] = datetime.datetime.now()
+
+
+def flush_last_used(force=False):
+    """距上次写入超过 DEVICE_AUTH_FLUSH_INTERVAL 秒（或 force）时批量写入 last_used 并提交"""
+    global _pending_last_used, _last_flush
+    interval = current_app.config.get('DEVICE_AUTH_FLUSH_INTERVAL', 60)
+    with _pending_lock:
+        if not _pending_last_used or (not force and time.monotonic() - _last_flush < interval):
+            return 0
+        pending, _pending_last_used = _pending_last_used, {}
+        _last_flush = time.monotonic()
+    try:
+        db.session.execute(db.update(DeviceAuth), [
+            {'id': device_auth_id, 'last_used': last_used}
+            for device_auth_id, last_used in pending.items()
+        ])
+        db.session.commit()
+    except Exception as e:
+        logger.error('Error flushing device last_used: %s', e)
+        db.session.rollback()
+        with _pending_lock:
+            for device_auth_id, last_used in pending.items():
+                _pending_last_used.setdefault(device_auth_id, last_used)
+        return 0
+    logger.debug('Flushed last_used for %s devices', len(pending))
+    return len(pending)
+
+
+def cache_stats():
+    return _get_cache().stats()
@@ -0,0 +1,123 @@
+"""
+判分服务：所有练习/复习提交接口共用的判分与进度更新逻辑
+"""
+import datetime
+import logging
+
+from database import db
+from models import UserWordProgress, UserWordMistake
+from word_cache import get_unit_words, reload_unit_words
+import scheduling
+from conditional import bump_progress_version
+
+logger = logging.getLogger(__name__)
+
+# 模式A只统计进度；模式B（含错题复习）同时维护错题本
+MODE_A = 'A'
+MODE_B = 'B'
+
+def grade_answers(user_id, wordbook_id, unit, mode, answers):
+    """
+    按顺序判分并更新进度、错题本和复习计划（不提交事务）。
+    answers为[(word_id, 小写答案), ...]；存在不属于该单元的单词ID时返回None。
+    """
+    word_ids = {word_id for word_id, _ in answers}
+    # 单元单词来自读缓存：既用于校验单词ID，也用于判断单元是否全部完成
+    unit_words = get_unit_words(wordbook_id, unit)
+    english_by_id = {word_id: english for word_id, english, _ in unit_words}
+    if not word_ids.issubset(english_by_id):
+        # 其他进程新增的单词在本进程缓存过期前不可见：拒绝前从数据库重新读取一次
+        unit_words = reload_unit_words(wordbook_id, unit)
+        english_by_id = {word_id: english for word_id, english, _ in unit_words}
+        if not word_ids.issubset(english_by_id):
+            return None
+    current_time = datetime.datetime.now()
+    progress = UserWordProgress.query.filter_by(
+        user_id=user_id, wordbook_id=wordbook_id, unit=unit
+    ).first()
+    if not progress:
+        progress = UserWordProgress(
+            user_id=user_id,
+            wordbook_id=wordbook_id,
+            unit=unit,
+            is_completed_a=0,
+            is_completed_b=0,
+            last_attempted=current_time,
+            correct_count_a=0,
+            incorrect_count_a=0,
+            correct_count_b=0,
+            incorrect_count_b=0,
+            created_at=current_time
+        )
+        db.session.add(progress)
+    mistakes = {}
+    removed_mistakes = set()
+    if mode == MODE_B:
+        mistakes = {m.word_id: m for m in UserWordMistake.query.filter(
+            UserWordMistake.user_id == user_id,
+            UserWordMistake.word_id.in_(word_ids),
+            UserWordMistake.mode == MODE_B
+        ).all()}
+    results = []
+    for word_id, answer in answers:
+        english = english_by_id[word_id]
+        correct = answer == english.lower()
+        if correct:
+            message = '正确'
+        else:
+            message = f'错误，正确答案是 {english}'
+        if mode == MODE_A:
+            if correct:
+                progress.correct_count_a += 1
+            else:
+                progress.incorrect_count_a += 1
+        elif correct:
+            progress.correct_count_b += 1
+            mistake = mistakes.get(word_id)
+            if mistake:
+                mistake.correct_count += 1
+                if mistake.correct_count >= 2:
+                    if mistake in db.session.new:
+                        # 本批次内新建的错题尚未落库，直接撤销即可
+                        db.session.expunge(mistake)
+                    else:
+                        db.session.delete(mistake)
+                        removed_mistakes.add(word_id)
+                    del mistakes[word_id]
+                    message = '正确，此单词已熟练掌握，已从错题本移除'
+        else:
+            progress.incorrect_count_b += 1
+            mistake = mistakes.get(word_id)
+            if mistake:
+                mistake.incorrect_count += 1
+                mistake.correct_count = 0
+                mistake.last_incorrect = current_time
+            else:
+                if word_id in removed_mistakes:
+                    # 同一批次内先移除后又答错：先落库删除，避免唯一约束冲突
+                    db.session.flush()
+                    removed_mistakes.discard(word_id)
+                mistake = UserWordMistake(
+                    user_id=user_id,
+                    word_id=word_id,
+                    wordbook_id=wordbook_id,
+                    unit=unit,
+                    mode=MODE_B,
+                    incorrect_count=1,
+                    correct_count=0,
+                    last_incorrect=current_time,
+                    created_at=current_time
+                )
+                db.session.add(mistake)
+                mistakes[word_id] = mistake
+        results.append({'word_id': word_id, 'correct': correct, 'message': message})
+    progress.last_attempted = current_time
+    scheduling.record_answers(user_id, wordbook_id, unit, [(r['word_id'], r['correct']) for r in results], current_time)
+    word_count = len(unit_words)
+    if mode == MODE_A:
+        if progress.correct_count_a >= word_count and progress.incorrect_count_a == 0:
+            progress.is_completed_a = 1
+    elif progress.correct_count_b >= word_count and progress.incorrect_count_b == 0:
+        progress.is_completed_b = 1
+    bump_progress_version(user_id)
+    return results
@@ -0,0 +1,131 @@
+"""
+后台CSV导入任务：上传文件先落盘并登记任务，由线程池异步执行，前端轮询任务状态
+"""
+import datetime
+import json
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from database import db
+from models import ImportJob
+from csv_import import CSVImportError, decode_csv, read_csv_rows, import_rows
+from word_cache import invalidate_wordbook
+
+logger = logging.getLogger(__name__)
+
+# 任务状态中最多保留的错误条数，完整的拒绝行数见 rows_rejected
+MAX_STORED_ERRORS = 1000
+
+_executor = None
+
+
+def _get_executor(app):
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=app.config.get('IMPORT_WORKERS', 2),
+            thread_name_prefix='csv-import'
+        )
+    return _executor
+
+
+def _upload_dir(app):
+    upload_dir = app.config.get('IMPORT_UPLOAD_DIR') or os.path.join(app.instance_path, 'imports')
+    os.makedirs(upload_dir, exist_ok=True)
+    return upload_dir
+
+
+def submit_import_job(app, wordbook_id, file):
+    """保存上传文件、登记导入任务并交给线程池执行，返回任务ID"""
+    job_id = uuid.uuid4().hex
+    file_path = os.path.join(_upload_dir(app), f'{job_id}.csv')
+    file.save(file_path)
+    job = ImportJob(
+        id=job_id,
+        wordbook_id=wordbook_id,
+        filename=file.filename,
+        file_path=file_path,
+        status='pending',
+        created_at=datetime.datetime.now()
+    )
+    db.session.add(job)
+    db.session.commit()
+    _get_executor(app).submit(_run_job, app, job_id)
+    logger.info('Import job %s queued for wordbook %s (%s)', job_id, wordbook_id, file.filename)
+    return job_id
+
+
+def has_active_job(wordbook_id):
+    """单词书是否有排队或正在执行的导入任务"""
+    return db.session.query(ImportJob.id).filter(
+        ImportJob.wordbook_id == wordbook_id, ImportJob.status.in_(('pending', 'running'))
+    ).first() is not None
+
+
+def job_status(job):
+    """任务状态的JSON表示"""
+    return {
+        'job_id': job.id,
+        'wordbook_id': job.wordbook_id,
+        'status': job.status,
+        'rows_parsed': job.rows_parsed,
+        'rows_imported': job.rows_imported,
+        'rows_rejected': job.rows_rejected,
+        'errors': json.loads(job.errors) if job.errors else [],
+        'message': job.message
+    }
+
+
+def _run_job(app, job_id):
+    with app.app_context():
+        job = db.session.get(ImportJob, job_id)
+        if not job:
+            logger.error('Import job %s not found', job_id)
+            return
+        job.status = 'running'
+        db.session.commit()
+
+        def save_progress(stats):
+            # 每块单词与任务进度在同一事务中提交，任务状态始终与已导入的数据一致
+            job.rows_parsed = stats['parsed']
+            job.rows_imported = stats['imported']
+            job.rows_rejected = stats['rejected']
+            job.errors = json.dumps(stats['errors'][:MAX_STORED_ERRORS], ensure_ascii=False)
+            db.session.commit()
+            # 每块提交后立即失效读缓存，避免练习和评分在导入期间继续使用导入前的单词
+            if stats['imported']:
+                invalidate_wordbook(job.wordbook_id)
+
+        try:
+            with open(job.file_path, 'rb') as f:
+                rows = read_csv_rows(decode_csv(f.read()))
+            stats = import_rows(job.wordbook_id, rows, on_chunk=save_progress)
+            save_progress(stats)
+            job.status = 'done'
+            job.message = f'成功导入 {stats["imported"]} 个单词'
+            if stats['errors']:
+                job.message += f'，遇到 {len(stats["errors"])} 个错误'
+            logger.info('Import job %s finished: %s imported, %s rejected', job_id, stats['imported'], stats['rejected'])
+        except CSVImportError as e:
+            db.session.rollback()
+            job.status = 'failed'
+            job.message = str(e)
+        except Exception as e:
+            logger.error('Error running import job %s: %s', job_id, e)
+            db.session.rollback()
+            job.status = 'failed'
+            job.message = f'导入失败：{str(e)}'
+        finally:
+            job.finished_at = datetime.datetime.now()
+            try:
+                db.session.commit()
+            except Exception as e:
+                # 任务记录可能已随单词书一起删除
+                logger.error('Could not save status of import job %s: %s', job_id, e)
+                db.session.rollback()
+            try:
+                os.remove(job.file_path)
+            except OSError:
+                logger.warning('Could not remove uploaded file for import job %s', job_id)
@@ -0,0 +1,101 @@
+"""
+日志配置：处理器在后台线程中运行（QueueHandler/QueueListener），支持按logger设置级别和采样
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+# 高频的逐题日志使用该logger，默认按 LOG_SAMPLE_RATES 采样
+ANSWER_LOGGER = 'answers'
+
+_listener = None
+
+
+class _LocalQueueHandler(QueueHandler):
+    """进程内队列无需序列化：直接入队，格式化留给监听线程完成"""
+
+    def prepare(self, record):
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """按比例保留低于 WARNING 的日志，警告和错误始终保留"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class JSONFormatter(logging.Formatter):
+    """每条日志输出一行JSON，便于日志系统检索"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def parse_mapping(value, convert=str):
+    """把 'name=value,name2=value2' 形式的环境变量解析为字典"""
+    mapping = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            name, setting = item.split('=', 1)
+            mapping[name.strip()] = convert(setting.strip())
+    return mapping
+
+
+def configure_logging(app):
+    """按应用配置初始化根logger，重复调用时只保留最新配置"""
+    global _listener
+    config = app.config
+    if config.get('LOG_FORMAT', 'text') == 'json':
+        formatter = JSONFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s [%(threadName)s] %(message)s')
+
+    log_file = config.get('LOG_FILE')
+    handler = logging.FileHandler(log_file, encoding='utf-8') if log_file else logging.StreamHandler(sys.stderr)
+    handler.setFormatter(formatter)
+
+    if _listener is not None:
+        _listener.stop()
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(_LocalQueueHandler(log_queue))
+    root.setLevel(config.get('LOG_LEVEL', 'INFO'))
+
+    for name, level in config.get('LOG_LEVELS', {}).items():
+        logging.getLogger(name).setLevel(level)
+    for name, rate in config.get('LOG_SAMPLE_RATES', {}).items():
+        target = logging.getLogger(name)
+        for existing in [f for f in target.filters if isinstance(f, SamplingFilter)]:
+            target.removeFilter(existing)
+        if rate < 1:
+            target.addFilter(SamplingFilter(rate))
+
+
+@atexit.register
+def _stop_listener():
+    # 退出前把队列中剩余的日志写完
+    if _listener is not None:
+        _listener.stop()
@@ -0,0 +1,154 @@
+"""
+请求指标：按端点统计延迟直方图、SQL语句数和耗时，以Prometheus文本格式导出
+"""
+import threading
+import time
+from contextvars import ContextVar
+
+from flask import request
+from sqlalchemy import event
+
+# 延迟直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 后台线程（如CSV导入）执行的SQL归入该端点名
+BACKGROUND_ENDPOINT = '_background'
+
+# 当前请求的 {'start', 'sql_count', 'sql_time', 'status'}；视图里嵌套的 app_context 会换掉 g，因此用上下文变量
+_current = ContextVar('request_metrics', default=None)
+
+
+class _EndpointStats:
+    __slots__ = ('requests', 'bucket_counts', 'latency_sum', 'sql_count', 'sql_time')
+
+    def __init__(self):
+        self.requests = {}  # (method, status) -> 次数
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+
+
+_stats = {}
+_lock = threading.Lock()
+
+
+def _endpoint_stats(endpoint):
+    stats = _stats.get(endpoint)
+    if stats is None:
+        stats = _stats[endpoint] = _EndpointStats()
+    return stats
+
+
+def init_metrics(app, engine):
+    """注册请求钩子和SQLAlchemy引擎事件"""
+
+    @app.before_request
+    def start_request_metrics():
+        _current.set({'start': time.perf_counter(), 'sql_count': 0, 'sql_time': 0.0, 'status': 500})
+
+    @app.after_request
+    def record_status(response):
+        current = _current.get()
+        if current is not None:
+            current['status'] = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        current = _current.get()
+        if current is None:
+            return
+        _current.set(None)
+        elapsed = time.perf_counter() - current['start']
+        endpoint = request.endpoint or 'unmatched'
+        with _lock:
+            stats = _endpoint_stats(endpoint)
+            key = (request.method, current['status'])
+            stats.requests[key] = stats.requests.get(key, 0) + 1
+            stats.latency_sum += elapsed
+            for idx, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    stats.bucket_counts[idx] += 1
+                    break
+            stats.sql_count += current['sql_count']
+            stats.sql_time += current['sql_time']
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def record_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        current = _current.get()
+        if current is not None:
+            current['sql_count'] += 1
+            current['sql_time'] += elapsed
+        else:
+            with _lock:
+                stats = _endpoint_stats(BACKGROUND_ENDPOINT)
+                stats.sql_count += 1
+                stats.sql_time += elapsed
+
+
+def current_sql_count():
+    """当前请求已执行的SQL语句数，不在请求中时返回None"""
+    current = _current.get()
+    return current['sql_count'] if current is not None else None
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(caches=None):
+    """
+    以Prometheus文本格式导出全部指标。
+    caches为 {缓存名: LRUCache.stats()}，导出命中、未命中、淘汰次数及当前大小。
+    """
+    lines = []
+    with _lock:
+        snapshot = sorted(_stats.items())
+        lines.append('# HELP wordbook_http_requests_total Requests handled, by endpoint, method and status.')
+        lines.append('# TYPE wordbook_http_requests_total counter')
+        for endpoint, stats in snapshot:
+            for (method, status), count in sorted(stats.requests.items()):
+                lines.append(f'wordbook_http_requests_total{{endpoint="{_escape(endpoint)}",method="{method}",status="{status}"}} {count}')
+
+        lines.append('# HELP wordbook_http_request_duration_seconds Request latency, by endpoint.')
+        lines.append('# TYPE wordbook_http_request_duration_seconds histogram')
+        for endpoint, stats in snapshot:
+            total = sum(stats.requests.values())
+            if not total:
+                continue
+            label = f'endpoint="{_escape(endpoint)}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats.bucket_counts):
+                cumulative += count
+                lines.append(f'wordbook_http_request_duration_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'wordbook_http_request_duration_seconds_bucket{{{label},le="+Inf"}} {total}')
+            lines.append(f'wordbook_http_request_duration_seconds_sum{{{label}}} {stats.latency_sum:.6f}')
+            lines.append(f'wordbook_http_request_duration_seconds_count{{{label}}} {total}')
+
+        lines.append('# HELP wordbook_sql_queries_total SQL statements executed, by endpoint.')
+        lines.append('# TYPE wordbook_sql_queries_total counter')
+        for endpoint, stats in snapshot:
+            lines.append(f'wordbook_sql_queries_total{{endpoint="{_escape(endpoint)}"}} {stats.sql_count}')
+        lines.append('# HELP wordbook_sql_duration_seconds_total Time spent executing SQL, by endpoint.')
+        lines.append('# TYPE wordbook_sql_duration_seconds_total counter')
+        for endpoint, stats in snapshot:
+            lines.append(f'wordbook_sql_duration_seconds_total{{endpoint="{_escape(endpoint)}"}} {stats.sql_time:.6f}')
+
+    caches = caches or {}
+    for metric, field, kind, help_text in (
+        ('wordbook_cache_hits_total', 'hits', 'counter', 'Cache lookups that found an entry.'),
+        ('wordbook_cache_misses_total', 'misses', 'counter', 'Cache lookups that missed.'),
+        ('wordbook_cache_evictions_total', 'evictions', 'counter', 'Entries evicted to stay within size limits.'),
+        ('wordbook_cache_entries', 'entries', 'gauge', 'Entries currently cached.'),
+        ('wordbook_cache_bytes', 'bytes', 'gauge', 'Estimated bytes currently cached.'),
+    ):
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} {kind}')
+        for name, stats in sorted(caches.items()):
+            lines.append(f'{metric}{{cache="{_escape(name)}"}} {stats[field]}')
+    return '\n'.join(lines) + '\n'
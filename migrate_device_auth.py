@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """
 数据库迁移脚本：为DeviceAuth表添加设备指纹唯一约束
+旧版数据库的基线迁移，须在 migrate_device_fingerprint_digest.py 之前执行；
+指纹已改为摘要（fingerprint_digest，自带唯一约束）的数据库会被跳过，以免重建出旧的表结构。
 """
 import sqlite3
 import os
@@ -19,6 +21,7 @@ def migrate_database():
         logger.error(f"数据库文件 {db_path} 不存在")
         return False
     
+    conn = None
     try:
         # 连接数据库
         conn = sqlite3.connect(db_path)
@@ -34,6 +37,13 @@ def migrate_database():
             logger.warning("DeviceAuth表不存在，无需迁移")
             return True
         
+        # 已迁移为指纹摘要的表不再有 device_fingerprint 列
+        cursor.execute("PRAGMA table_info(DeviceAuth)")
+        columns = {row[1] for row in cursor.fetchall()}
+        if 'device_fingerprint' not in columns:
+            logger.info("DeviceAuth已使用指纹摘要（fingerprint_digest），本迁移已被取代，无需迁移")
+            return True
+        
         # 检查是否已经存在唯一约束
         cursor.execute("PRAGMA index_list(DeviceAuth)")
         indexes = cursor.fetchall()
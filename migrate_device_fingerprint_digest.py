@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本：DeviceAuth 的设备指纹改为存储16字节摘要（fingerprint_digest）
+"""
+import sqlite3
+import os
+import sys
+import logging
+
+from device_auth_cache import fingerprint_digest
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_database(db_path='wordbook.db'):
+    """执行数据库迁移"""
+    if not os.path.exists(db_path):
+        logger.error(f"数据库文件 {db_path} 不存在")
+        return False
+
+    conn = None
+    try:
+        conn = sqlite3.connect(db_path)
+        conn.create_function('fingerprint_digest', 1, fingerprint_digest, deterministic=True)
+        cursor = conn.cursor()
+
+        cursor.execute("PRAGMA table_info(DeviceAuth)")
+        columns = {row[1] for row in cursor.fetchall()}
+        if not columns:
+            logger.warning("DeviceAuth表不存在，无需迁移")
+            return True
+        if 'fingerprint_digest' in columns:
+            logger.info("设备指纹已是摘要格式，无需迁移")
+            return True
+
+        cursor.execute("""
+            CREATE TABLE DeviceAuth_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                fingerprint_digest BLOB NOT NULL UNIQUE,
+                device_name VARCHAR(100),
+                auth_token VARCHAR(255) NOT NULL UNIQUE,
+                created_at DATETIME NOT NULL,
+                last_used DATETIME,
+                is_active INTEGER NOT NULL DEFAULT 1,
+                FOREIGN KEY (user_id) REFERENCES User (id) ON DELETE CASCADE,
+                CONSTRAINT uix_user_device UNIQUE (user_id, fingerprint_digest)
+            )
+        """)
+
+        cursor.execute("""
+            INSERT INTO DeviceAuth_new (id, user_id, fingerprint_digest, device_name, auth_token, created_at, last_used, is_active)
+            SELECT id, user_id, fingerprint_digest(device_fingerprint), device_name, auth_token, created_at, last_used, is_active
+            FROM DeviceAuth
+        """)
+        logger.info(f"转换 {cursor.rowcount} 条设备授权")
+
+        cursor.execute("DROP TABLE DeviceAuth")
+        cursor.execute("ALTER TABLE DeviceAuth_new RENAME TO DeviceAuth")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_device_auth_fingerprint_active
+            ON DeviceAuth (fingerprint_digest, is_active)
+        """)
+
+        conn.commit()
+
+        logger.info("数据库迁移完成")
+        return True
+
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {str(e)}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    if migrate_database(*sys.argv[1:2]):
+        logger.info("迁移成功")
+        sys.exit(0)
+    else:
+        logger.error("迁移失败")
+        sys.exit(1)
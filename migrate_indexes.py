@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本：为热点查询添加复合索引
+"""
+import sqlite3
+import os
+import sys
+import logging
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# (索引名, 表名, 列) —— 与 models.py 中的声明保持一致
+INDEXES = [
+    ('ix_word_wordbook_unit', 'Word', ['wordbook_id', 'unit']),
+    ('ix_word_wordbook_id', 'Word', ['wordbook_id', 'id']),
+    ('ix_mistake_user_wordbook_unit_mode', 'UserWordMistake', ['user_id', 'wordbook_id', 'unit', 'mode']),
+    ('ix_mistake_user_mode_priority', 'UserWordMistake', ['user_id', 'mode', 'incorrect_count', 'id']),
+    ('ix_device_auth_fingerprint_active', 'DeviceAuth', ['fingerprint_digest', 'is_active']),
+    ('ix_WordBook_created_at', 'WordBook', ['created_at']),
+]
+
+def migrate_database(db_path='wordbook.db'):
+    """执行数据库迁移"""
+    if not os.path.exists(db_path):
+        logger.error(f"数据库文件 {db_path} 不存在")
+        return False
+
+    conn = None
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        for index_name, table, columns in INDEXES:
+            cursor.execute("""
+                SELECT name FROM sqlite_master
+                WHERE type='table' AND name=?
+            """, (table,))
+            if not cursor.fetchone():
+                logger.warning(f"{table}表不存在，跳过索引 {index_name}")
+                continue
+
+            cursor.execute(f'PRAGMA table_info("{table}")')
+            existing_columns = {row[1] for row in cursor.fetchall()}
+            missing = [c for c in columns if c not in existing_columns]
+            if missing:
+                logger.warning(f"{table}表缺少列 {', '.join(missing)}，跳过索引 {index_name}（请先运行对应的迁移脚本）")
+                continue
+
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{table}" ({", ".join(columns)})')
+            logger.info(f"索引 {index_name} 已就绪 ({table}: {', '.join(columns)})")
+
+        # 更新统计信息，帮助查询规划器选择新索引
+        cursor.execute("ANALYZE")
+        conn.commit()
+
+        logger.info("数据库迁移完成")
+        return True
+
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {str(e)}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    if migrate_database(*sys.argv[1:2]):
+        logger.info("迁移成功")
+        sys.exit(0)
+    else:
+        logger.error("迁移失败")
+        sys.exit(1)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本：为 User 表添加进度版本号 progress_version（页面条件GET的ETag依赖该版本号）
+"""
+import sqlite3
+import os
+import sys
+import logging
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_database(db_path='wordbook.db'):
+    """执行数据库迁移"""
+    if not os.path.exists(db_path):
+        logger.error(f"数据库文件 {db_path} 不存在")
+        return False
+
+    conn = None
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("PRAGMA table_info(User)")
+        columns = {row[1] for row in cursor.fetchall()}
+        if not columns:
+            logger.warning("User表不存在，无需迁移")
+            return True
+        if 'progress_version' in columns:
+            logger.info("User表已有progress_version字段，无需迁移")
+            return True
+
+        cursor.execute("ALTER TABLE User ADD COLUMN progress_version INTEGER NOT NULL DEFAULT 1")
+        logger.info("已添加 User.progress_version 字段")
+
+        conn.commit()
+        logger.info("数据库迁移完成")
+        return True
+
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {str(e)}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    if migrate_database(*sys.argv[1:2]):
+        logger.info("迁移成功")
+        sys.exit(0)
+    else:
+        logger.error("迁移失败")
+        sys.exit(1)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本：创建间隔重复复习计划表 ReviewSchedule，并把现有错题导入为立即到期的复习项
+"""
+import sqlite3
+import os
+import sys
+import logging
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_database(db_path='wordbook.db'):
+    """执行数据库迁移"""
+    if not os.path.exists(db_path):
+        logger.error(f"数据库文件 {db_path} 不存在")
+        return False
+
+    conn = None
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ReviewSchedule (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                word_id INTEGER NOT NULL,
+                wordbook_id INTEGER NOT NULL,
+                unit VARCHAR(50) NOT NULL,
+                repetitions INTEGER NOT NULL DEFAULT 0,
+                interval_days FLOAT NOT NULL DEFAULT 0,
+                ease FLOAT NOT NULL DEFAULT 2.5,
+                due_at DATETIME NOT NULL,
+                last_reviewed DATETIME,
+                created_at DATETIME NOT NULL,
+                FOREIGN KEY (user_id) REFERENCES User (id) ON DELETE CASCADE,
+                FOREIGN KEY (word_id) REFERENCES Word (id) ON DELETE CASCADE,
+                FOREIGN KEY (wordbook_id) REFERENCES WordBook (id) ON DELETE CASCADE,
+                CONSTRAINT uix_review_user_word UNIQUE (user_id, word_id)
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_review_schedule_user_due
+            ON ReviewSchedule (user_id, due_at)
+        """)
+
+        # 现有错题视为需要重新学习：立即到期
+        cursor.execute("""
+            INSERT OR IGNORE INTO ReviewSchedule
+                (user_id, word_id, wordbook_id, unit, repetitions, interval_days, ease, due_at, last_reviewed, created_at)
+            SELECT user_id, word_id, wordbook_id, unit, 0, 0, 2.5,
+                   COALESCE(last_incorrect, created_at), last_incorrect, created_at
+            FROM UserWordMistake
+        """)
+        logger.info(f"从错题本导入 {cursor.rowcount} 个复习项")
+
+        conn.commit()
+
+        logger.info("数据库迁移完成")
+        return True
+
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {str(e)}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    if migrate_database(*sys.argv[1:2]):
+        logger.info("迁移成功")
+        sys.exit(0)
+    else:
+        logger.error("迁移失败")
+        sys.exit(1)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本：把时间列中的格式化字符串统一转换为 SQLAlchemy DateTime 的存储格式
+
+SQLite 没有独立的日期类型，DateTime 列以 'YYYY-MM-DD HH:MM:SS.ffffff' 文本存储，
+字典序即时间顺序，可直接用于索引和范围查询。本脚本规范化已有数据，
+无法解析的值：可空列置为NULL，非空列置为迁移时间。
+"""
+import sqlite3
+import os
+import sys
+import logging
+import datetime
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STORAGE_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+INPUT_FORMATS = ['%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d']
+
+# (表名, 列名, 是否可空)
+TIMESTAMP_COLUMNS = [
+    ('User', 'created_at', False),
+    ('WordBook', 'created_at', False),
+    ('Word', 'created_at', False),
+    ('UserWordProgress', 'created_at', False),
+    ('UserWordProgress', 'last_attempted', True),
+    ('UserWordMistake', 'created_at', False),
+    ('UserWordMistake', 'last_incorrect', True),
+    ('DeviceAuth', 'created_at', False),
+    ('DeviceAuth', 'last_used', True),
+    ('ImportJob', 'created_at', False),
+    ('ImportJob', 'finished_at', True),
+]
+
+def parse_timestamp(value):
+    """解析旧格式的时间字符串，失败返回None"""
+    if isinstance(value, (int, float)):
+        return datetime.datetime.fromtimestamp(value)
+    value = str(value).strip()
+    for fmt in INPUT_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+def migrate_database(db_path='wordbook.db'):
+    """执行数据库迁移"""
+    if not os.path.exists(db_path):
+        logger.error(f"数据库文件 {db_path} 不存在")
+        return False
+
+    conn = None
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        migration_time = datetime.datetime.now().strftime(STORAGE_FORMAT)
+
+        for table, column, nullable in TIMESTAMP_COLUMNS:
+            cursor.execute("""
+                SELECT name FROM sqlite_master
+                WHERE type='table' AND name=?
+            """, (table,))
+            if not cursor.fetchone():
+                logger.warning(f"{table}表不存在，跳过")
+                continue
+
+            cursor.execute(f'SELECT id, "{column}" FROM "{table}" WHERE "{column}" IS NOT NULL')
+            updates = []
+            invalid = 0
+            for row_id, value in cursor.fetchall():
+                parsed = parse_timestamp(value)
+                if parsed is None:
+                    invalid += 1
+                    new_value = None if nullable else migration_time
+                else:
+                    new_value = parsed.strftime(STORAGE_FORMAT)
+                if new_value != value:
+                    updates.append((new_value, row_id))
+
+            cursor.executemany(f'UPDATE "{table}" SET "{column}" = ? WHERE id = ?', updates)
+            logger.info(f"{table}.{column}: 转换 {len(updates)} 行，无法解析 {invalid} 行")
+
+        conn.commit()
+
+        logger.info("数据库迁移完成")
+        return True
+
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {str(e)}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    if migrate_database(*sys.argv[1:2]):
+        logger.info("迁移成功")
+        sys.exit(0)
+    else:
+        logger.error("迁移失败")
+        sys.exit(1)
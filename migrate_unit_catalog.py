@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本：创建单元目录表 WordBookUnit 并根据现有单词回填
+"""
+import sqlite3
+import os
+import sys
+import logging
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_database(db_path='wordbook.db'):
+    """执行数据库迁移"""
+    if not os.path.exists(db_path):
+        logger.error(f"数据库文件 {db_path} 不存在")
+        return False
+
+    conn = None
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS WordBookUnit (
+                wordbook_id INTEGER NOT NULL,
+                unit VARCHAR(50) NOT NULL,
+                word_count INTEGER NOT NULL DEFAULT 0,
+                position INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (wordbook_id, unit),
+                FOREIGN KEY (wordbook_id) REFERENCES WordBook (id) ON DELETE CASCADE
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_wordbook_unit_position
+            ON WordBookUnit (wordbook_id, position)
+        """)
+
+        # 按现有单词重新生成目录：单元顺序取其第一个单词的ID
+        cursor.execute("DELETE FROM WordBookUnit")
+        cursor.execute("""
+            INSERT INTO WordBookUnit (wordbook_id, unit, word_count, position)
+            SELECT wordbook_id, unit, COUNT(*),
+                   ROW_NUMBER() OVER (PARTITION BY wordbook_id ORDER BY MIN(id))
+            FROM Word
+            GROUP BY wordbook_id, unit
+        """)
+        logger.info(f"回填 {cursor.rowcount} 个单元")
+
+        conn.commit()
+
+        logger.info("数据库迁移完成")
+        return True
+
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {str(e)}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    if migrate_database(*sys.argv[1:2]):
+        logger.info("迁移成功")
+        sys.exit(0)
+    else:
+        logger.error("迁移失败")
+        sys.exit(1)
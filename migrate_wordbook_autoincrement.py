@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本：WordBook.id 改为 AUTOINCREMENT，删除的ID不再被新单词书复用
+（ETag、片段缓存和单元数据包都以 (单词书ID, 版本号) 为键，复用ID会让新单词书命中旧缓存）
+需在 migrate_wordbook_version.py 之后执行。
+"""
+import sqlite3
+import os
+import sys
+import logging
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_database(db_path='wordbook.db'):
+    """执行数据库迁移"""
+    if not os.path.exists(db_path):
+        logger.error(f"数据库文件 {db_path} 不存在")
+        return False
+
+    conn = None
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        # 重建表期间不触发其他表的外键级联
+        cursor.execute("PRAGMA foreign_keys = OFF")
+
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'WordBook'")
+        row = cursor.fetchone()
+        if not row:
+            logger.warning("WordBook表不存在，无需迁移")
+            return True
+        if 'AUTOINCREMENT' in row[0].upper():
+            logger.info("WordBook.id 已是AUTOINCREMENT，无需迁移")
+            return True
+
+        cursor.execute("PRAGMA table_info(WordBook)")
+        columns = {row[1] for row in cursor.fetchall()}
+        if 'version' not in columns:
+            logger.error("WordBook表缺少version字段，请先运行 migrate_wordbook_version.py")
+            return False
+
+        cursor.execute("""
+            CREATE TABLE WordBook_new (
+                id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+                title VARCHAR(100) NOT NULL UNIQUE,
+                created_at DATETIME NOT NULL,
+                version INTEGER DEFAULT '1' NOT NULL
+            )
+        """)
+
+        # 保留原有ID；sqlite_sequence 随之记录当前最大ID
+        cursor.execute("""
+            INSERT INTO WordBook_new (id, title, created_at, version)
+            SELECT id, title, created_at, version FROM WordBook
+        """)
+        logger.info(f"复制 {cursor.rowcount} 个单词书")
+
+        cursor.execute("DROP TABLE WordBook")
+        cursor.execute("ALTER TABLE WordBook_new RENAME TO WordBook")
+        cursor.execute('CREATE INDEX IF NOT EXISTS "ix_WordBook_created_at" ON WordBook (created_at)')
+
+        conn.commit()
+
+        logger.info("数据库迁移完成")
+        return True
+
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {str(e)}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    if migrate_database(*sys.argv[1:2]):
+        logger.info("迁移成功")
+        sys.exit(0)
+    else:
+        logger.error("迁移失败")
+        sys.exit(1)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本：为 WordBook 表添加内容版本号 version（增量编辑时检测并发修改）
+"""
+import sqlite3
+import os
+import sys
+import logging
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_database(db_path='wordbook.db'):
+    """执行数据库迁移"""
+    if not os.path.exists(db_path):
+        logger.error(f"数据库文件 {db_path} 不存在")
+        return False
+
+    conn = None
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("PRAGMA table_info(WordBook)")
+        columns = {row[1] for row in cursor.fetchall()}
+        if not columns:
+            logger.warning("WordBook表不存在，无需迁移")
+            return True
+        if 'version' in columns:
+            logger.info("WordBook表已有version字段，无需迁移")
+            return True
+
+        cursor.execute("ALTER TABLE WordBook ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+        logger.info("已添加 WordBook.version 字段")
+
+        conn.commit()
+        logger.info("数据库迁移完成")
+        return True
+
+    except Exception as e:
+        logger.error(f"数据库迁移失败: {str(e)}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            conn.close()
+
+if __name__ == "__main__":
+    if migrate_database(*sys.argv[1:2]):
+        logger.info("迁移成功")
+        sys.exit(0)
+    else:
+        logger.error("迁移失败")
+        sys.exit(1)
@@ -6,14 +6,20 @@ class User(db.Model):
     username = db.Column(db.String(20), unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
     email = db.Column(db.String(20), unique=True)
-    created_at = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    progress_version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # 进度或错题每次变化时递增
 
 class WordBook(db.Model):
     __tablename__ = 'WordBook'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     title = db.Column(db.String(100), unique=True, nullable=False)
-    created_at = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, index=True)  # 单词书列表按创建时间排序
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # 内容每次变化时递增
     words = db.relationship('Word', backref='wordbook', cascade='all, delete')
+    units = db.relationship('WordBookUnit', cascade='all, delete', order_by='WordBookUnit.position')
+
+    # ID不复用：缓存和ETag以 (单词书ID, 版本号) 为键，删除后新建的单词书不能与旧单词书同键
+    __table_args__ = {'sqlite_autoincrement': True}
 
 class Word(db.Model):
     __tablename__ = 'Word'
@@ -22,7 +28,24 @@ class Word(db.Model):
     unit = db.Column(db.String(50), nullable=False)
     english = db.Column(db.String(50), nullable=False)
     chinese = db.Column(db.String(50), nullable=False)
-    created_at = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        # 练习页面按 (单词书, 单元) 取词
+        db.Index('ix_word_wordbook_unit', 'wordbook_id', 'unit'),
+        # 编辑器按 (单词书, ID) 游标分批加载，无需排序
+        db.Index('ix_word_wordbook_id', 'wordbook_id', 'id'),
+    )
+
+class WordBookUnit(db.Model):
+    """单元目录：每个单词书的单元及单词数，随单词增删改在同一事务中维护"""
+    __tablename__ = 'WordBookUnit'
+    wordbook_id = db.Column(db.Integer, db.ForeignKey('WordBook.id', ondelete='CASCADE'), primary_key=True)
+    unit = db.Column(db.String(50), primary_key=True)
+    word_count = db.Column(db.Integer, nullable=False, default=0)
+    position = db.Column(db.Integer, nullable=False, default=0)  # 单元在单词书中的显示顺序
+
+    __table_args__ = (db.Index('ix_wordbook_unit_position', 'wordbook_id', 'position'),)
 
 class UserWordProgress(db.Model):
     __tablename__ = 'UserWordProgress'
@@ -32,12 +55,12 @@ class UserWordProgress(db.Model):
     unit = db.Column(db.String(50), nullable=False)
     is_completed_a = db.Column(db.Integer, nullable=False, default=0)
     is_completed_b = db.Column(db.Integer, nullable=False, default=0)
-    last_attempted = db.Column(db.String(50))
+    last_attempted = db.Column(db.DateTime)
     correct_count_a = db.Column(db.Integer, nullable=False, default=0)
     incorrect_count_a = db.Column(db.Integer, nullable=False, default=0)
     correct_count_b = db.Column(db.Integer, nullable=False, default=0)
     incorrect_count_b = db.Column(db.Integer, nullable=False, default=0)
-    created_at = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
     __table_args__ = (db.UniqueConstraint('user_id', 'wordbook_id', 'unit', name='uix_user_wordbook_unit'),)
 
 class UserWordMistake(db.Model):
@@ -55,24 +78,72 @@ class UserWordMistake(db.Model):
 
     correct_count = db.Column(db.Integer, nullable=False, default=0)
 
-    last_incorrect = db.Column(db.String(50))
-    created_at = db.Column(db.String(50), nullable=False)
+    last_incorrect = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, nullable=False)
 
-    __table_args__ = (db.UniqueConstraint('user_id', 'word_id', 'mode', name='uix_user_word_mistake'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'word_id', 'mode', name='uix_user_word_mistake'),
+        # 复习页面按 (用户, 单词书, 单元, 模式) 取错题
+        db.Index('ix_mistake_user_wordbook_unit_mode', 'user_id', 'wordbook_id', 'unit', 'mode'),
+        # 全局复习列表按 (答错次数, ID) 倒序键集分页
+        db.Index('ix_mistake_user_mode_priority', 'user_id', 'mode', 'incorrect_count', 'id'),
+    )
 
     # Add relationship to Word
     word = db.relationship('Word', backref='mistakes')
 
+class ReviewSchedule(db.Model):
+    """间隔重复（SM-2）复习计划：每个 (用户, 单词) 一条，记录复习间隔、难度系数和下次复习时间"""
+    __tablename__ = 'ReviewSchedule'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('User.id', ondelete='CASCADE'), nullable=False)
+    word_id = db.Column(db.Integer, db.ForeignKey('Word.id', ondelete='CASCADE'), nullable=False)
+    wordbook_id = db.Column(db.Integer, db.ForeignKey('WordBook.id', ondelete='CASCADE'), nullable=False)
+    unit = db.Column(db.String(50), nullable=False)
+    repetitions = db.Column(db.Integer, nullable=False, default=0)  # 连续答对次数
+    interval_days = db.Column(db.Float, nullable=False, default=0)  # 当前复习间隔（天）
+    ease = db.Column(db.Float, nullable=False, default=2.5)  # 难度系数
+    due_at = db.Column(db.DateTime, nullable=False)  # 下次复习时间
+    last_reviewed = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'word_id', name='uix_review_user_word'),
+        # 复习队列按 (用户, 到期时间) 取最早到期的N个单词
+        db.Index('ix_review_schedule_user_due', 'user_id', 'due_at'),
+    )
+
 class DeviceAuth(db.Model):
     __tablename__ = 'DeviceAuth'
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('User.id', ondelete='CASCADE'), nullable=False)
-    device_fingerprint = db.Column(db.String(255), nullable=False, unique=True)  # 设备指纹（全局唯一）
+    fingerprint_digest = db.Column(db.LargeBinary(16), nullable=False, unique=True)  # 设备指纹摘要（全局唯一，见 device_auth_cache.fingerprint_digest）
     device_name = db.Column(db.String(100))  # 设备名称（如"儿子的iPad"）
     auth_token = db.Column(db.String(255), unique=True, nullable=False)  # 授权令牌
-    created_at = db.Column(db.String(50), nullable=False)
-    last_used = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime, nullable=False)
+    last_used = db.Column(db.DateTime)
     is_active = db.Column(db.Integer, nullable=False, default=1)  # 是否启用
     
-    __table_args__ = (db.UniqueConstraint('user_id', 'device_fingerprint', name='uix_user_device'),)
\ No newline at end of file
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'fingerprint_digest', name='uix_user_device'),
+        # 自动登录按 (设备指纹摘要, 是否启用) 查找授权
+        db.Index('ix_device_auth_fingerprint_active', 'fingerprint_digest', 'is_active'),
+    )
+
+class ImportJob(db.Model):
+    __tablename__ = 'ImportJob'
+
+    id = db.Column(db.String(32), primary_key=True)  # 任务ID（uuid hex）
+    wordbook_id = db.Column(db.Integer, db.ForeignKey('WordBook.id', ondelete='CASCADE'), nullable=False)
+    filename = db.Column(db.String(255))  # 上传时的文件名
+    file_path = db.Column(db.String(255))  # 暂存的上传文件路径，导入结束后删除
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending/running/done/failed
+    rows_parsed = db.Column(db.Integer, nullable=False, default=0)
+    rows_imported = db.Column(db.Integer, nullable=False, default=0)
+    rows_rejected = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Text)  # 错误信息列表（JSON）
+    message = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, nullable=False)
+    finished_at = db.Column(db.DateTime)
@@ -0,0 +1,60 @@
+"""
+键集（游标）分页：按排序列的最后一行取值生成游标，下一页用 WHERE (列...) < (值...) 续读，避免 OFFSET 扫描已读的行
+"""
+import base64
+import datetime
+import json
+
+from database import db
+
+
+class InvalidCursor(ValueError):
+    """游标无法解析或与排序列不匹配"""
+
+
+def encode_cursor(values):
+    """把排序列的值编码为URL安全的游标字符串"""
+    payload = [v.isoformat() if isinstance(v, datetime.datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """解析游标，按排序列的类型还原取值"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor('无效的分页游标')
+    if not isinstance(payload, list) or len(payload) != len(columns):
+        raise InvalidCursor('无效的分页游标')
+    values = []
+    for column, value in zip(columns, payload):
+        try:
+            if isinstance(column.type, db.DateTime):
+                value = datetime.datetime.fromisoformat(value)
+            elif not isinstance(value, column.type.python_type):
+                raise InvalidCursor('无效的分页游标')
+        except (TypeError, ValueError):
+            raise InvalidCursor('无效的分页游标')
+        values.append(value)
+    return values
+
+
+def keyset_page(query, columns, cursor=None, limit=20, descending=True, key=None):
+    """
+    按 columns 排序取一页（最后一列必须唯一，如主键），返回 (本页行, 下一页游标或None)。
+    所有列同为降序（默认）或升序；key(row) 返回行对应的排序列取值，默认按列名读取行属性。
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        boundary = db.tuple_(*columns) < db.tuple_(*values) if descending else \
+            db.tuple_(*columns) > db.tuple_(*values)
+        query = query.filter(boundary)
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    key = key or (lambda row: [getattr(row, c.key) for c in columns])
+    return rows, encode_cursor(key(rows[-1]))
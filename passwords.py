@@ -0,0 +1,96 @@
+"""
+密码服务：哈希算法和强度可配置，登录时按需升级旧哈希，哈希计算在有界线程池中执行
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_pending = None
+_method_prefixes = {}
+_init_lock = threading.Lock()
+
+
+class PasswordServiceBusy(RuntimeError):
+    """等待哈希计算的请求过多，调用方应返回503让客户端稍后重试"""
+
+
+def _get_executor():
+    global _executor, _pending
+    if _executor is None:
+        with _init_lock:
+            if _executor is None:
+                config = current_app.config
+                _pending = threading.BoundedSemaphore(config.get('PASSWORD_HASH_MAX_PENDING', 64))
+                _executor = ThreadPoolExecutor(
+                    max_workers=config.get('PASSWORD_HASH_WORKERS', 2),
+                    thread_name_prefix='password-hash'
+                )
+    return _executor
+
+
+def _run(fn, *args):
+    """在哈希线程池中执行 fn，排队的请求超过上限时抛出 PasswordServiceBusy"""
+    executor = _get_executor()
+    if not _pending.acquire(blocking=False):
+        raise PasswordServiceBusy('too many pending password hash operations')
+    try:
+        future = executor.submit(fn, *args)
+    except BaseException:
+        _pending.release()
+        raise
+    # 名额在哈希结束（或被取消）时才释放：等待超时后任务仍在线程池中排队或运行，继续占用名额
+    future.add_done_callback(lambda _: _pending.release())
+    try:
+        return future.result(timeout=current_app.config.get('PASSWORD_HASH_TIMEOUT', 10))
+    except FutureTimeoutError:
+        # 尚未开始的任务直接取消；已在运行的只能等它结束
+        future.cancel()
+        logger.warning('Password hash operation timed out')
+        raise PasswordServiceBusy('password hash operation timed out')
+
+
+def _method_prefix(method, salt_length):
+    """配置的算法在哈希串中对应的前缀（如 scrypt:32768:8:1），用于判断旧哈希是否需要升级"""
+    key = (method, salt_length)
+    if key not in _method_prefixes:
+        _method_prefixes[key] = generate_password_hash('', method, salt_length).split('$', 1)[0]
+    return _method_prefixes[key]
+
+
+def _hash(password, method, salt_length):
+    return generate_password_hash(password, method, salt_length)
+
+
+def _verify(pwhash, password, method, salt_length):
+    if not check_password_hash(pwhash, password):
+        return False, None
+    if pwhash.split('$', 1)[0] != _method_prefix(method, salt_length):
+        return True, generate_password_hash(password, method, salt_length)
+    return True, None
+
+
+def _settings():
+    config = current_app.config
+    return config.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1'), config.get('PASSWORD_SALT_LENGTH', 16)
+
+
+def hash_password(password):
+    """按当前配置生成密码哈希"""
+    return _run(_hash, password, *_settings())
+
+
+def verify_password(pwhash, password):
+    """
+    校验密码，返回 (是否正确, 新哈希)。
+    密码正确但哈希参数与当前配置不一致时返回按新配置重新生成的哈希，由调用方保存；否则新哈希为None。
+    """
+    ok, new_hash = _run(_verify, pwhash, password, *_settings())
+    if new_hash:
+        logger.info('Password hash parameters changed, rehashing')
+    return ok, new_hash
@@ -1,14 +1,16 @@
 
 import os
 from app import app, db
-from models import User, UserWordProgress, UserWordMistake, DeviceAuth
+from models import User, UserWordProgress, UserWordMistake, ReviewSchedule, DeviceAuth
 
 from sqlalchemy import text
 
 def recreate_user_tables():
     """
     Drops and recreates user-related tables to apply schema changes
-    without affecting wordbook data.
+    without affecting wordbook data. Tables are rebuilt from the current
+    models (DeviceAuth.fingerprint_digest, User.progress_version), so no
+    separate device/progress migrations are needed afterwards.
     """
     with app.app_context():
         print("Dropping user-related tables...")
@@ -18,6 +20,7 @@ def recreate_user_tables():
             db.session.execute(text('PRAGMA foreign_keys=OFF;'))
 
         # Drop tables in a safe order
+        ReviewSchedule.__table__.drop(db.engine, checkfirst=True)
         UserWordMistake.__table__.drop(db.engine, checkfirst=True)
         UserWordProgress.__table__.drop(db.engine, checkfirst=True)
         DeviceAuth.__table__.drop(db.engine, checkfirst=True)
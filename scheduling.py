@@ -0,0 +1,88 @@
+"""
+间隔重复调度：按 SM-2 算法根据答题结果更新每个 (用户, 单词) 的复习间隔和下次复习时间
+"""
+import datetime
+import logging
+
+from database import db
+from models import Word, ReviewSchedule
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+# 答对/答错分别对应 SM-2 的回忆质量评分（0-5）
+QUALITY_CORRECT = 5
+QUALITY_INCORRECT = 2
+# 答错后在本次学习中很快再次出现
+RELEARN_DELAY = datetime.timedelta(minutes=10)
+
+
+def next_state(repetitions, interval_days, ease, correct):
+    """SM-2：返回答题后的 (repetitions, interval_days, ease)"""
+    quality = QUALITY_CORRECT if correct else QUALITY_INCORRECT
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    if not correct:
+        return 0, 0.0, ease
+    repetitions += 1
+    if repetitions == 1:
+        interval_days = 1.0
+    elif repetitions == 2:
+        interval_days = 6.0
+    else:
+        interval_days = round(interval_days * ease, 1)
+    return repetitions, interval_days, ease
+
+
+def _due_at(now, interval_days):
+    return now + (datetime.timedelta(days=interval_days) if interval_days else RELEARN_DELAY)
+
+
+def record_answers(user_id, wordbook_id, unit, results, now):
+    """
+    按答题结果更新复习计划（不提交事务）。
+    results为[(word_id, 是否答对), ...]，按顺序应用；已有计划批量更新，新单词批量插入。
+    """
+    word_ids = {word_id for word_id, _ in results}
+    states = {
+        row.word_id: {'id': row.id, 'repetitions': row.repetitions, 'interval_days': row.interval_days, 'ease': row.ease}
+        for row in db.session.query(
+            ReviewSchedule.id, ReviewSchedule.word_id, ReviewSchedule.repetitions,
+            ReviewSchedule.interval_days, ReviewSchedule.ease
+        ).filter(ReviewSchedule.user_id == user_id, ReviewSchedule.word_id.in_(word_ids))
+    }
+    for word_id, correct in results:
+        state = states.setdefault(word_id, {'id': None, 'repetitions': 0, 'interval_days': 0.0, 'ease': DEFAULT_EASE})
+        state['repetitions'], state['interval_days'], state['ease'] = next_state(
+            state['repetitions'], state['interval_days'], state['ease'], correct
+        )
+        state['due_at'] = _due_at(now, state['interval_days'])
+
+    updates, inserts = [], []
+    for word_id, state in states.items():
+        values = {
+            'repetitions': state['repetitions'],
+            'interval_days': state['interval_days'],
+            'ease': state['ease'],
+            'due_at': state['due_at'],
+            'last_reviewed': now
+        }
+        if state['id']:
+            updates.append(dict(values, id=state['id']))
+        else:
+            inserts.append(dict(values, user_id=user_id, word_id=word_id, wordbook_id=wordbook_id, unit=unit, created_at=now))
+    if updates:
+        db.session.execute(db.update(ReviewSchedule), updates)
+    if inserts:
+        db.session.execute(ReviewSchedule.__table__.insert(), inserts)
+    logger.debug('Review schedule updated for user %s: %s updated, %s new', user_id, len(updates), len(inserts))
+
+
+def due_reviews(user_id, limit, now=None):
+    """返回最早到期的 limit 个复习项 [(ReviewSchedule, Word), ...]，走 (user_id, due_at) 索引"""
+    now = now or datetime.datetime.now()
+    return db.session.query(ReviewSchedule, Word).join(
+        Word, ReviewSchedule.word_id == Word.id
+    ).filter(
+        ReviewSchedule.user_id == user_id, ReviewSchedule.due_at <= now
+    ).order_by(ReviewSchedule.due_at).limit(limit).all()
@@ -78,29 +78,119 @@ async function selectWordbook(id) {
     }
 }
 
+// 轮询后台导入任务，直到任务完成或失败
+const IMPORT_POLL_INTERVAL = 1000;
+
+async function pollImportJob(statusUrl, onProgress) {
+    while (true) {
+        const response = await fetch(statusUrl);
+        const job = await response.json();
+        if (!response.ok) {
+            throw new Error(job.error || '查询导入进度失败');
+        }
+        if (onProgress) {
+            onProgress(job);
+        }
+        if (job.status === 'done' || job.status === 'failed') {
+            return job;
+        }
+        await new Promise(resolve => setTimeout(resolve, IMPORT_POLL_INTERVAL));
+    }
+}
+
+function importProgressText(job) {
+    return `已解析 ${job.rows_parsed} 行，已导入 ${job.rows_imported} 个，已拒绝 ${job.rows_rejected} 行`;
+}
+
+// 表单字段序号：分批加载和删除卡片后仍保持唯一
+function nextWordIndex(wordCards) {
+    const index = parseInt(wordCards.dataset.nextIndex || wordCards.querySelectorAll('.word-card').length, 10);
+    wordCards.dataset.nextIndex = index + 1;
+    return index;
+}
+
+function escapeAttr(value) {
+    return String(value).replace(/&/g, '&amp;').replace(/"/g, '&quot;').replace(/</g, '&lt;');
+}
+
+function wordCardHtml(index, word) {
+    const idField = word.id ? `<input type="hidden" name="words[${index}][id]" value="${word.id}">` : '';
+    return `
+        ${idField}
+        <label>单元</label>
+        <input type="text" name="words[${index}][unit]" value="${escapeAttr(word.unit || '')}" required maxlength="50">
+        <label>英文</label>
+        <input type="text" name="words[${index}][english]" value="${escapeAttr(word.english || '')}" required maxlength="50">
+        <label>中文</label>
+        <input type="text" name="words[${index}][chinese]" value="${escapeAttr(word.chinese || '')}" required maxlength="50">
+        <button type="button" class="btn btn-danger" onclick="deleteWordCard(this${word.id ? ', ' + word.id : ''})">删除</button>
+    `;
+}
+
 function addWordCard() {
     const wordCards = document.getElementById('word-cards');
     const cards = wordCards.querySelectorAll('.word-card');
-    const count = cards.length;
     let lastUnit = '';
-    if (count > 0) {
-        const lastCard = cards[count - 1];
+    if (cards.length > 0) {
+        const lastCard = cards[cards.length - 1];
         lastUnit = lastCard.querySelector('input[name$="[unit]"]').value || '';
     }
     const card = document.createElement('div');
     card.className = 'card word-card';
-    card.innerHTML = `
-        <label>单元</label>
-        <input type="text" name="words[${count}][unit]" value="${lastUnit}" required maxlength="50">
-        <label>英文</label>
-        <input type="text" name="words[${count}][english]" required maxlength="50">
-        <label>中文</label>
-        <input type="text" name="words[${count}][chinese]" required maxlength="50">
-        <button type="button" class="btn btn-danger" onclick="deleteWordCard(this)">删除</button>
-    `;
+    card.innerHTML = wordCardHtml(nextWordIndex(wordCards), {unit: lastUnit});
     wordCards.appendChild(card);
 }
 
+// 编辑器按游标分批加载已有单词，新卡片插在已加载单词之后、手动新增的单词之前
+let loadingWords = false;
+async function loadMoreWords() {
+    const wordCards = document.getElementById('word-cards');
+    const button = document.getElementById('load-more-words');
+    const cursor = wordCards.dataset.nextCursor;
+    if (!cursor || loadingWords) {
+        return;
+    }
+    loadingWords = true;
+    button.disabled = true;
+    try {
+        const response = await fetch(`${wordCards.dataset.wordsUrl}?cursor=${encodeURIComponent(cursor)}`);
+        const data = await response.json();
+        if (!response.ok) {
+            document.getElementById('message').textContent = data.error || '加载单词失败';
+            return;
+        }
+        const firstNewCard = wordCards.querySelector('.word-card:not([data-id])');
+        data.words.forEach(word => {
+            const card = document.createElement('div');
+            card.className = 'card word-card';
+            card.dataset.id = word.id;
+            card.innerHTML = wordCardHtml(nextWordIndex(wordCards), word);
+            wordCards.insertBefore(card, firstNewCard);
+        });
+        wordCards.dataset.nextCursor = data.next_cursor || '';
+        button.hidden = !data.next_cursor;
+    } catch (error) {
+        console.error('Fetch error:', error);
+        document.getElementById('message').textContent = '网络错误，请稍后重试';
+    } finally {
+        loadingWords = false;
+        button.disabled = false;
+    }
+}
+
+// 按钮滚动到可见区域时自动加载下一批
+function observeLoadMoreWords() {
+    const button = document.getElementById('load-more-words');
+    if (!button || !('IntersectionObserver' in window)) {
+        return;
+    }
+    new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            loadMoreWords();
+        }
+    }).observe(button);
+}
+
 function deleteWordCard(button, wordId = null) {
     if (wordId) {
         const form = document.getElementById('wordbook-edit-form');
@@ -113,6 +203,70 @@ function deleteWordCard(button, wordId = null) {
     button.parentElement.remove();
 }
 
+// 对比输入框的当前值与初始值，只收集变化的单词（修改/新增/删除）
+function collectWordPatch(form) {
+    const patch = {base_version: parseInt(form.dataset.version, 10), update: [], add: [], delete: []};
+    const title = form.querySelector('input[name="title"]');
+    if (title.value !== title.defaultValue) {
+        patch.title = title.value;
+    }
+    form.querySelectorAll('.word-card').forEach(card => {
+        const fields = {};
+        let changed = false;
+        ['unit', 'english', 'chinese'].forEach(field => {
+            const input = card.querySelector(`input[name$="[${field}]"]`);
+            fields[field] = input.value;
+            changed = changed || input.value !== input.defaultValue;
+        });
+        if (!card.dataset.id) {
+            patch.add.push(fields);
+        } else if (changed) {
+            patch.update.push({id: parseInt(card.dataset.id, 10), ...fields});
+        }
+    });
+    form.querySelectorAll('input[name="delete_words"]').forEach(input => {
+        patch.delete.push(parseInt(input.value, 10));
+    });
+    return patch;
+}
+
+async function submitWordPatch(formId, url, redirectUrl) {
+    const form = document.getElementById(formId);
+    const messageDiv = document.getElementById('message');
+    const submitButton = form.querySelector('button[type="submit"]');
+    form.addEventListener('submit', async (e) => {
+        e.preventDefault();
+        const patch = collectWordPatch(form);
+        if (patch.title === undefined && !patch.update.length && !patch.add.length && !patch.delete.length) {
+            messageDiv.textContent = '没有需要保存的更改';
+            return;
+        }
+        submitButton.disabled = true;
+        messageDiv.textContent = '处理中...';
+        try {
+            const response = await fetch(url, {
+                method: 'PATCH',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify(patch)
+            });
+            const data = await response.json();
+            if (response.ok) {
+                messageDiv.textContent = data.message;
+                setTimeout(() => {
+                    window.location.href = redirectUrl;
+                }, 1000);
+            } else {
+                messageDiv.textContent = data.error || '未知错误';
+                submitButton.disabled = false;
+            }
+        } catch (error) {
+            console.error('Fetch error:', error);
+            messageDiv.textContent = '网络错误，请稍后重试';
+            submitButton.disabled = false;
+        }
+    });
+}
+
 function speakWord(word) {
     if ('speechSynthesis' in window) {
         const utterance = new SpeechSynthesisUtterance(word);
@@ -224,6 +378,118 @@ function speakFeedback(message) {
     }
 }
 
+// 单元数据包：练习页面不再内嵌单词，由 service worker 缓存的数据包加载
+async function loadUnitWords(url) {
+    const response = await fetch(url, { headers: { 'Accept': 'application/json' } });
+    if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`);
+    }
+    const bundle = await response.json();
+    return bundle.words.map(([id, english, chinese]) => ({
+        id: id,
+        english: english,
+        chinese: chinese,
+        wordbook_id: bundle.wordbook_id,
+        unit: bundle.unit
+    }));
+}
+
+// 生成20%空白的单词（用于模式A），不隐藏首字母
+function generatePartialWord(word) {
+    if (!word) {
+        return word;
+    }
+    const chars = Array.from(word);
+    const indices = chars.map((_, idx) => idx).slice(1);
+    const hideCount = Math.min(Math.max(1, Math.ceil(chars.length * 0.2)), indices.length);
+    for (let i = 0; i < hideCount; i++) {
+        const pick = i + Math.floor(Math.random() * (indices.length - i));
+        [indices[i], indices[pick]] = [indices[pick], indices[i]];
+        chars[indices[i]] = '_';
+    }
+    return chars.join('');
+}
+
+// 生成全空白的单词（用于模式B）
+function generateFullBlankWord(word) {
+    return word ? Array.from(word, () => '_').join(' ') : '';
+}
+
+function registerServiceWorker() {
+    if ('serviceWorker' in navigator) {
+        navigator.serviceWorker.register('/sw.js').catch(error => console.error('Service worker registration failed:', error));
+    }
+}
+
+// 单词书详情页：让 service worker 预先缓存各单元的数据包（单词书版本未变时不发请求）
+function prefetchUnitBundles() {
+    if (!('serviceWorker' in navigator)) {
+        return;
+    }
+    const urls = Array.from(document.querySelectorAll('[data-bundle-url]'), el => el.dataset.bundleUrl);
+    if (urls.length === 0) {
+        return;
+    }
+    navigator.serviceWorker.ready.then(registration => {
+        if (registration.active) {
+            registration.active.postMessage({ type: 'prefetch-bundles', urls: urls });
+        }
+    });
+}
+
+// 答案批量提交：本地即时判分，答案先进入队列，攒够一批或练习结束时统一提交
+const ANSWER_BATCH_SIZE = 10;
+const pendingAnswers = {};
+
+function batchSubmitUrl(word) {
+    const isModeA = window.location.pathname.includes('/practice_a/');
+    const isReviewB = window.location.pathname.includes('/review_b/');
+    const mode = isReviewB ? 'review_b' : isModeA ? 'practice_a' : 'practice_b';
+    return `/wordbook/${word.wordbook_id}/${mode}/${encodeURIComponent(word.unit)}/submit_batch`;
+}
+
+function queueAnswer(url, wordId, answer) {
+    if (!pendingAnswers[url]) {
+        pendingAnswers[url] = [];
+    }
+    pendingAnswers[url].push({ word_id: wordId, answer: answer });
+    return pendingAnswers[url].length;
+}
+
+async function flushAnswers(keepalive = false) {
+    let ok = true;
+    for (const url of Object.keys(pendingAnswers)) {
+        const batch = pendingAnswers[url];
+        if (!batch || batch.length === 0) continue;
+        pendingAnswers[url] = [];
+        try {
+            const response = await fetch(url, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ answers: batch }),
+                keepalive: keepalive
+            });
+            const data = await response.json();
+            console.log('Batch response:', data);
+            if (!response.ok) {
+                // 服务器拒绝的批次不再重试，避免重复计数
+                console.error('Batch rejected:', data.error);
+                ok = false;
+            }
+        } catch (error) {
+            console.error('Fetch error:', error);
+            // 网络错误时放回队列，下次提交时重试
+            pendingAnswers[url] = batch.concat(pendingAnswers[url]);
+            ok = false;
+        }
+    }
+    return ok;
+}
+
+window.addEventListener('pagehide', () => {
+    flushAnswers(true);
+});
+
 async function submitAnswer(wordId) {
     console.log('submitAnswer called with wordId:', wordId);
     console.log('words[currentIndex]:', words[currentIndex]);
@@ -252,54 +518,31 @@ async function submitAnswer(wordId) {
     }
     submitButton.disabled = true;
     answerInput.disabled = true;
-    const formData = new FormData();
-    formData.append('word_id', wordId);
-    formData.append('answer', answer);
-    const isModeA = window.location.pathname.includes('/practice_a/');
-    const isReviewB = window.location.pathname.includes('/review_b/');
-    const url = isReviewB
-        ? `/wordbook/${words[currentIndex].wordbook_id}/review_b/${encodeURIComponent(words[currentIndex].unit)}/submit`
-        : isModeA
-            ? `/wordbook/${words[currentIndex].wordbook_id}/practice_a/${encodeURIComponent(words[currentIndex].unit)}/submit`
-            : `/wordbook/${words[currentIndex].wordbook_id}/practice_b/${encodeURIComponent(words[currentIndex].unit)}/submit`;
-    console.log('Fetch URL:', url);
-    console.log('FormData:', Object.fromEntries(formData));
-    try {
-        const response = await fetch(url, {
-            method: 'POST',
-            body: formData
-        });
-        const data = await response.json();
-        console.log('Response:', data);
-        if (response.ok) {
-            feedbackDiv.textContent = data.message;
-            feedbackDiv.style.color = data.correct ? '#28a745' : '#d33';
-            
-            // 语音播报结果
-            if (data.correct) {
-                speakFeedback('太棒了！答对了！');
-            } else {
-                speakFeedback('再试试看，加油！');
-            }
-            
-            setTimeout(() => {
-                currentIndex++;
-                showWordCard(currentIndex);
-            }, 1500);
-        } else {
-            feedbackDiv.textContent = data.error || '提交失败';
-            feedbackDiv.style.color = '#d33';
-            speakFeedback('请输入答案哦');
-            submitButton.disabled = false;
-            answerInput.disabled = false;
+    const word = words[currentIndex];
+    const correct = answer.toLowerCase() === word.english.toLowerCase();
+    feedbackDiv.textContent = correct ? '正确' : `错误，正确答案是 ${word.english}`;
+    feedbackDiv.style.color = correct ? '#28a745' : '#d33';
+
+    // 语音播报结果
+    if (correct) {
+        speakFeedback('太棒了！答对了！');
+    } else {
+        speakFeedback('再试试看，加油！');
+    }
+
+    const queued = queueAnswer(batchSubmitUrl(word), wordId, answer);
+    const isLast = currentIndex + 1 >= words.length;
+    if (queued >= ANSWER_BATCH_SIZE || isLast) {
+        const ok = await flushAnswers();
+        if (!ok) {
+            document.getElementById('message').textContent = '部分答案提交失败，请检查网络';
         }
-    } catch (error) {
-        console.error('Fetch error:', error);
-        feedbackDiv.textContent = '网络错误，请稍后重试';
-        feedbackDiv.style.color = '#d33';
-        submitButton.disabled = false;
-        answerInput.disabled = false;
     }
+
+    setTimeout(() => {
+        currentIndex++;
+        showWordCard(currentIndex);
+    }, 1500);
 }
 
 // 注册页面
@@ -469,6 +712,11 @@ if (completeBtn) {
         messageDiv.textContent = '正在提交...';
         
         try {
+            if (!await flushAnswers()) {
+                messageDiv.textContent = '答案提交失败，请检查网络后重试';
+                completeBtn.disabled = false;
+                return;
+            }
             const response = await fetch(url, {
                 method: 'POST'
             });
@@ -0,0 +1,113 @@
+// 单元数据包缓存：练习页面从本地缓存即时加载单词，单词书版本变化时只重新下载内容有变化的单元。
+//
+// 数据包地址带单词书版本号 ?v=N，缓存以完整地址为键：
+// - 同一版本命中缓存时直接返回，不访问网络（服务器保证 ?v=N 的数据包不早于版本N，
+//   读缓存落后时会重新读取数据库，因此按版本号永久缓存是安全的）；
+// - 版本变化（缓存未命中）时，用该单元旧版本缓存的 ETag 发送条件请求，
+//   单元内容未变则服务器返回304，沿用旧数据；内容变化才下载新数据包；
+// - 网络不可用时退回该单元的任意旧版本缓存。
+// 练习页面本身按网络优先缓存，离线时也能打开最近练习过的单元。
+// v2：丢弃修复前可能以新版本号缓存的旧单词
+const BUNDLE_CACHE = 'unit-bundles-v2';
+const PAGE_CACHE = 'practice-pages-v1';
+const CACHES = [BUNDLE_CACHE, PAGE_CACHE];
+
+self.addEventListener('install', () => self.skipWaiting());
+
+self.addEventListener('activate', event => {
+    event.waitUntil((async () => {
+        for (const name of await caches.keys()) {
+            if (!CACHES.includes(name)) {
+                await caches.delete(name);
+            }
+        }
+        await self.clients.claim();
+    })());
+});
+
+function isBundleUrl(url) {
+    return url.origin === self.location.origin && /^\/wordbook\/\d+\/units\/[^/]+\/bundle$/.test(url.pathname);
+}
+
+function isPracticePage(url) {
+    return url.origin === self.location.origin && /^\/wordbook\/\d+\/practice_[ab]\//.test(url.pathname);
+}
+
+async function previousVersions(cache, url) {
+    const keys = await cache.keys();
+    return keys.filter(request => {
+        const cached = new URL(request.url);
+        return cached.pathname === url.pathname && cached.href !== url.href;
+    });
+}
+
+async function getBundle(href) {
+    const url = new URL(href, self.location.origin);
+    const cache = await caches.open(BUNDLE_CACHE);
+    const cached = await cache.match(url.href);
+    if (cached) {
+        return cached;
+    }
+    const previous = await previousVersions(cache, url);
+    const stale = previous.length ? await cache.match(previous[previous.length - 1]) : undefined;
+    const headers = { 'Accept': 'application/json' };
+    if (stale && stale.headers.get('ETag')) {
+        headers['If-None-Match'] = stale.headers.get('ETag');
+    }
+    let response;
+    try {
+        response = await fetch(url.href, { headers: headers, cache: 'no-store' });
+    } catch (error) {
+        if (stale) {
+            return stale;
+        }
+        throw error;
+    }
+    if (response.status === 304 && stale) {
+        response = stale;
+    } else if (!response.ok) {
+        return response;
+    }
+    await cache.put(url.href, response.clone());
+    await Promise.all(previous.map(request => cache.delete(request)));
+    return response;
+}
+
+async function networkFirst(request) {
+    const cache = await caches.open(PAGE_CACHE);
+    try {
+        const response = await fetch(request);
+        if (response.ok) {
+            await cache.put(request, response.clone());
+        }
+        return response;
+    } catch (error) {
+        const cached = await cache.match(request);
+        if (cached) {
+            return cached;
+        }
+        throw error;
+    }
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') {
+        return;
+    }
+    const url = new URL(request.url);
+    if (isBundleUrl(url)) {
+        event.respondWith(getBundle(url.href));
+    } else if (request.mode === 'navigate' && isPracticePage(url)) {
+        event.respondWith(networkFirst(request));
+    }
+});
+
+self.addEventListener('message', event => {
+    const data = event.data || {};
+    if (data.type === 'prefetch-bundles' && Array.isArray(data.urls)) {
+        event.waitUntil(Promise.all(data.urls.map(href => getBundle(href).catch(error => {
+            console.error('Bundle prefetch failed:', href, error);
+        }))));
+    }
+});
@@ -0,0 +1,95 @@
+"""
+模板缓存：
+- 字节码缓存：编译后的模板写入 <instance>/jinja-cache，新启动的工作进程直接加载，不再重新编译；
+- 片段缓存：{% cache 'name', key... %}...{% endcache %} 按数据版本号缓存渲染好的HTML片段。
+  版本号变化后键随之改变，旧片段不会再被读到，由LRU和有效期自然淘汰，无需主动失效。
+"""
+import logging
+import os
+import sys
+import threading
+
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+from caching import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = current_app.config
+                _cache = LRUCache(
+                    max_entries=config.get('FRAGMENT_CACHE_MAX_ENTRIES', 4096),
+                    max_bytes=config.get('FRAGMENT_CACHE_MAX_BYTES', 16 * 1024 * 1024),
+                    ttl=config.get('FRAGMENT_CACHE_TTL', 600)
+                )
+    return _cache
+
+
+class FragmentCacheExtension(Extension):
+    """
+    {% cache 'detail_units', wordbook.id, wordbook.version %}...{% endcache %}
+    第一个参数是片段名，其余参数必须覆盖片段依赖的全部数据版本。
+    """
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_render_fragment', [nodes.Const(parser.name), nodes.List(args)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_fragment(self, template_name, key, caller):
+        cache = _get_cache()
+        key = (template_name, *key)
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = caller()
+            cache.put(key, fragment, sys.getsizeof(fragment))
+        return fragment
+
+
+class deferred:
+    """延迟计算的序列：只在模板片段未命中、真正遍历时才调用 loader() 查询数据库"""
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._value = None
+
+    @property
+    def value(self):
+        if self._value is None:
+            self._value = self._loader()
+        return self._value
+
+    def __iter__(self):
+        return iter(self.value)
+
+    def __len__(self):
+        return len(self.value)
+
+
+def init_template_cache(app):
+    """启用字节码缓存和 {% cache %} 标签；应在渲染任何模板之前调用"""
+    cache_dir = app.config.get('JINJA_BYTECODE_CACHE_DIR') or os.path.join(app.instance_path, 'jinja-cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    logger.info('Jinja bytecode cache at %s', cache_dir)
+
+
+def cache_stats():
+    return _get_cache().stats()
@@ -0,0 +1,70 @@
+"""
+单元数据包：(单词书, 单元) 的紧凑版本化数据，供练习页面和离线客户端（static/sw.js）缓存。
+版本号是单元内容的摘要，客户端带 If-None-Match 重新验证，单元未变化时只收到304。
+支持 JSON（默认）和 MessagePack（Accept: application/x-msgpack，需安装可选依赖 msgpack）。
+"""
+import hashlib
+import json
+
+from flask import current_app, jsonify, request
+
+from conditional import not_modified, set_validators
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# 数据包格式版本：字段变化时递增，旧缓存随之失效
+BUNDLE_FORMAT = 1
+MSGPACK_MIMETYPES = ('application/x-msgpack', 'application/msgpack')
+
+
+def bundle_version(wordbook_id, unit, words):
+    """单元内容的摘要：任何单词的增删改都会改变版本号，其他单元的修改不影响"""
+    key = repr((BUNDLE_FORMAT, wordbook_id, unit, words)).encode('utf-8')
+    return hashlib.blake2b(key, digest_size=8).hexdigest()
+
+
+def build_bundle(wordbook_id, unit, words, version):
+    """单词以 [id, english, chinese] 数组表示，避免每个单词重复字段名"""
+    return {
+        'format': BUNDLE_FORMAT,
+        'wordbook_id': wordbook_id,
+        'unit': unit,
+        'version': version,
+        'word_count': len(words),
+        'words': [list(word) for word in words],
+    }
+
+
+def _wants_msgpack():
+    if msgpack is None:
+        return False
+    if request.args.get('format') == 'msgpack':
+        return True
+    best = request.accept_mimetypes.best_match(('application/json',) + MSGPACK_MIMETYPES)
+    return best in MSGPACK_MIMETYPES
+
+
+def bundle_response(wordbook_id, unit, words):
+    """
+    返回单元数据包；words 为 get_unit_words 的结果（读缓存命中时不查询数据库）。
+    ETag 由内容版本号和表示格式组成，If-None-Match 命中时返回304。
+    """
+    if not words:
+        return jsonify({'error': '该单元没有单词'}), 404
+    use_msgpack = _wants_msgpack()
+    version = bundle_version(wordbook_id, unit, words)
+    etag = f"{version}-{'msgpack' if use_msgpack else 'json'}"
+    response = not_modified(etag)
+    if response is None:
+        bundle = build_bundle(wordbook_id, unit, words, version)
+        if use_msgpack:
+            response = current_app.response_class(msgpack.packb(bundle), mimetype=MSGPACK_MIMETYPES[0])
+        else:
+            body = json.dumps(bundle, ensure_ascii=False, separators=(',', ':'))
+            response = current_app.response_class(body, mimetype='application/json')
+        set_validators(response, etag)
+    response.vary.add('Accept')
+    return response
@@ -0,0 +1,61 @@
+"""
+单元目录维护：单词增删改时在同一事务中更新 WordBookUnit，列出单元时无需对 Word 表做聚合
+"""
+import logging
+
+from database import db
+from models import Word, WordBookUnit
+
+logger = logging.getLogger(__name__)
+
+
+def list_units(wordbook_id):
+    """返回单词书的单元 ((unit, word_count), ...)，按单元顺序排列"""
+    return tuple(
+        tuple(row) for row in db.session.query(WordBookUnit.unit, WordBookUnit.word_count)
+        .filter(WordBookUnit.wordbook_id == wordbook_id)
+        .order_by(WordBookUnit.position)
+    )
+
+
+def add_words(wordbook_id, unit_counts):
+    """
+    记录新增的单词（不提交事务）。
+    unit_counts 为 {unit: 新增数量}，按单元首次出现的顺序排列；新单元追加到末尾。
+    """
+    if not unit_counts:
+        return
+    entries = {u.unit: u for u in WordBookUnit.query.filter_by(wordbook_id=wordbook_id)}
+    next_position = max((u.position for u in entries.values()), default=0) + 1
+    for unit, count in unit_counts.items():
+        entry = entries.get(unit)
+        if entry:
+            entry.word_count += count
+        else:
+            entry = WordBookUnit(wordbook_id=wordbook_id, unit=unit, word_count=count, position=next_position)
+            db.session.add(entry)
+            entries[unit] = entry
+            next_position += 1
+
+
+def rebuild(wordbook_id):
+    """
+    按 Word 表重新计算一个单词书的单元目录（不提交事务），用于编辑等可能改名、删除单元的操作。
+    已有单元保持原顺序，新单元按其第一个单词的ID追加，没有单词的单元被删除。
+    """
+    db.session.flush()
+    counts = db.session.query(Word.unit, db.func.count(Word.id), db.func.min(Word.id)).filter(
+        Word.wordbook_id == wordbook_id
+    ).group_by(Word.unit).order_by(db.func.min(Word.id)).all()
+    entries = {u.unit: u for u in WordBookUnit.query.filter_by(wordbook_id=wordbook_id)}
+    next_position = max((u.position for u in entries.values()), default=0) + 1
+    for unit, count, _ in counts:
+        entry = entries.pop(unit, None)
+        if entry:
+            entry.word_count = count
+        else:
+            db.session.add(WordBookUnit(wordbook_id=wordbook_id, unit=unit, word_count=count, position=next_position))
+            next_position += 1
+    for entry in entries.values():
+        db.session.delete(entry)
+    logger.debug('Unit catalog rebuilt for wordbook %s: %s units', wordbook_id, len(counts))
@@ -0,0 +1,95 @@
+"""
+单元单词读缓存：按 (wordbook_id, unit) 缓存不可变的单词元组，单词书内容变化时精确失效。
+每个条目记录读取时的单词书版本号：调用方已知更新的版本号（如数据包地址中的 v）时，
+其他进程的编辑尚未在本进程失效的旧条目会被重新读取，而不是以新版本号发出旧单词。
+"""
+import logging
+import sys
+import threading
+
+from flask import current_app
+
+from caching import LRUCache
+from database import db
+from models import Word, WordBook
+
+logger = logging.getLogger(__name__)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = current_app.config
+                _cache = LRUCache(
+                    max_entries=config.get('WORD_CACHE_MAX_ENTRIES', 1024),
+                    max_bytes=config.get('WORD_CACHE_MAX_BYTES', 32 * 1024 * 1024),
+                    ttl=config.get('WORD_CACHE_TTL', 300)
+                )
+    return _cache
+
+
+def _estimate_size(rows):
+    """估算元组列表占用的内存字节数"""
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(field) for field in row)
+    return size
+
+
+def get_unit_words(wordbook_id, unit, min_version=None):
+    """返回单元单词 ((id, english, chinese), ...)，按ID排序；min_version 为调用方已知的单词书版本号"""
+    words = peek_unit_words(wordbook_id, unit, min_version)
+    if words is None:
+        words = reload_unit_words(wordbook_id, unit)
+    return words
+
+
+def reload_unit_words(wordbook_id, unit):
+    """跳过缓存从数据库读取单元单词并更新缓存（缓存可能落后于其他进程的编辑时使用）"""
+    # 版本号与单词在同一条语句中读取，保证二者来自同一快照
+    version = db.select(WordBook.version).where(WordBook.id == wordbook_id).scalar_subquery()
+    return store_unit_words(wordbook_id, unit, db.session.query(Word.id, Word.english, Word.chinese, version)
+                            .filter(Word.wordbook_id == wordbook_id, Word.unit == unit)
+                            .order_by(Word.id))
+
+
+def peek_unit_words(wordbook_id, unit, min_version=None):
+    """
+    只查缓存，未命中或条目版本低于 min_version 时返回None
+    （异步模式自行从数据库读取后调用 store_unit_words）
+    """
+    entry = _get_cache().get((wordbook_id, unit))
+    if entry is None:
+        return None
+    version, words = entry
+    if min_version is not None and version < min_version:
+        logger.debug('Word cache entry for wordbook %s, unit %s is at version %s, need %s',
+                     wordbook_id, unit, version, min_version)
+        return None
+    return words
+
+
+def store_unit_words(wordbook_id, unit, rows):
+    """把按ID排序的 (id, english, chinese, 单词书版本号) 行存入缓存，返回不可变的 (id, english, chinese) 元组"""
+    rows = list(rows)
+    # 空单元读不到版本号，记为0：带版本号的请求总会重新读取
+    version = rows[0][3] if rows else 0
+    words = tuple(tuple(row[:3]) for row in rows)
+    _get_cache().put((wordbook_id, unit), (version, words), _estimate_size(words))
+    return words
+
+
+def invalidate_wordbook(wordbook_id):
+    """单词书内容变化（编辑、导入、删除）后清除其全部缓存条目"""
+    removed = _get_cache().invalidate(lambda key, value: key[0] == wordbook_id)
+    logger.debug('Word cache invalidated for wordbook %s: %s entries', wordbook_id, removed)
+
+
+def cache_stats():
+    return _get_cache().stats()
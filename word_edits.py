@@ -0,0 +1,171 @@
+"""
+单词书增量编辑：校验并批量应用单词的修改、新增和删除，并维护单词书版本号
+"""
+import datetime
+import logging
+
+from database import db
+from models import WordBook, Word, UserWordMistake, ReviewSchedule
+import unit_catalog
+
+logger = logging.getLogger(__name__)
+
+WORD_FIELDS = ('unit', 'english', 'chinese')
+FIELD_NAMES = {'unit': '单元', 'english': '英文', 'chinese': '中文'}
+MAX_PATCH_ROWS = 5000
+
+
+class WordPatchError(ValueError):
+    """补丁内容无效，消息可直接返回给用户"""
+
+
+class VersionConflict(Exception):
+    """补丁基于的版本已过期（单词书已被其他人修改）"""
+
+    def __init__(self, current_version):
+        super().__init__(current_version)
+        self.current_version = current_version
+
+
+def bump_version(wordbook_id):
+    """单词书内容变化时递增版本号（不提交事务），返回更新的行数（单词书已被删除时为0）"""
+    return db.session.query(WordBook).filter(WordBook.id == wordbook_id).update(
+        {WordBook.version: WordBook.version + 1}, synchronize_session=False
+    )
+
+
+def delete_words(wordbook_id, word_ids):
+    """
+    删除本单词书内的单词及其错题和复习计划（不提交事务）。
+    Word.id 可能被之后新增的单词复用，关联行必须一起删除，否则复习队列会指向无关的单词。
+    """
+    for model in (UserWordMistake, ReviewSchedule):
+        model.query.filter(model.wordbook_id == wordbook_id, model.word_id.in_(word_ids)).delete(synchronize_session=False)
+    Word.query.filter(Word.wordbook_id == wordbook_id, Word.id.in_(word_ids)).delete(synchronize_session=False)
+
+
+def move_words(wordbook_id, units):
+    """
+    单词换单元后同步错题和复习计划中复制的单元（不提交事务），units 为 {word_id: 新单元}。
+    复习提交按单元校验单词，单元过期的复习项会被判为无效单词。
+    """
+    if not units:
+        return
+    params = [{'moved_word_id': word_id, 'new_unit': unit} for word_id, unit in units.items()]
+    for model in (UserWordMistake, ReviewSchedule):
+        table = model.__table__
+        db.session.execute(
+            table.update().where(table.c.word_id == db.bindparam('moved_word_id'), table.c.wordbook_id == wordbook_id)
+            .values(unit=db.bindparam('new_unit')),
+            params
+        )
+
+
+def _clean_word(row, label):
+    if not isinstance(row, dict):
+        raise WordPatchError(f'{label}格式错误')
+    word = {}
+    for field in WORD_FIELDS:
+        value = row.get(field)
+        value = value.strip() if isinstance(value, str) else ''
+        if not value or len(value) > 50:
+            raise WordPatchError(f'{label}的{FIELD_NAMES[field]}必须为1-50字符')
+        word[field] = value
+    return word
+
+
+def _word_id(value, label):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise WordPatchError(f'{label}的单词ID无效')
+    try:
+        return int(value)
+    except ValueError:
+        raise WordPatchError(f'{label}的单词ID无效')
+
+
+def parse_patch(patch):
+    """
+    一次遍历校验补丁，返回 (title, updates, adds, deletes)。
+    patch 格式：{"base_version", "title", "update": [{id, unit, english, chinese}],
+                 "add": [{unit, english, chinese}], "delete": [id]}，各部分均可省略。
+    """
+    if not isinstance(patch, dict):
+        raise WordPatchError('请求内容必须是JSON对象')
+    title = patch.get('title')
+    if title is not None:
+        title = title.strip() if isinstance(title, str) else ''
+        if not title or len(title) > 100:
+            raise WordPatchError('标题必须为1-100字符')
+    update_rows, add_rows, delete_rows = (patch.get(k) or [] for k in ('update', 'add', 'delete'))
+    if not all(isinstance(rows, list) for rows in (update_rows, add_rows, delete_rows)):
+        raise WordPatchError('update/add/delete 必须是列表')
+    if len(update_rows) + len(add_rows) + len(delete_rows) > MAX_PATCH_ROWS:
+        raise WordPatchError(f'每次最多提交{MAX_PATCH_ROWS}处修改')
+
+    updates = {}
+    for idx, row in enumerate(update_rows, 1):
+        label = f'第{idx}个修改'
+        word = _clean_word(row, label)
+        word_id = _word_id(row.get('id'), label)
+        if word_id in updates:
+            raise WordPatchError(f'{label}的单词重复')
+        updates[word_id] = word
+    adds = [_clean_word(row, f'第{idx}个新单词') for idx, row in enumerate(add_rows, 1)]
+    deletes = set()
+    for idx, value in enumerate(delete_rows, 1):
+        word_id = _word_id(value, f'第{idx}个删除')
+        if word_id in updates:
+            raise WordPatchError(f'单词{word_id}不能同时修改和删除')
+        deletes.add(word_id)
+    return title, updates, adds, deletes
+
+
+def apply_patch(wordbook, patch):
+    """
+    校验并应用补丁（不提交事务），返回新版本号。
+    所有语句都限定在该单词书内：修改和删除的单词ID必须属于该单词书。
+    """
+    title, updates, adds, deletes = parse_patch(patch)
+    base_version = patch.get('base_version')
+    if base_version is not None and (isinstance(base_version, bool) or not isinstance(base_version, int)):
+        raise WordPatchError('base_version必须是整数')
+    if base_version is not None and base_version != wordbook.version:
+        raise VersionConflict(wordbook.version)
+    if title and title != wordbook.title and WordBook.query.filter_by(title=title).first():
+        raise WordPatchError('单词书标题已存在')
+
+    touched = set(updates) | deletes
+    current_units = {}
+    if touched:
+        current_units = dict(db.session.query(Word.id, Word.unit).filter(
+            Word.wordbook_id == wordbook.id, Word.id.in_(touched)
+        ).all())
+        missing = touched - set(current_units)
+        if missing:
+            raise WordPatchError(f'单词不属于该单词书：{sorted(missing)[:10]}')
+
+    if updates:
+        table = Word.__table__
+        db.session.execute(
+            table.update().where(table.c.id == db.bindparam('word_id'), table.c.wordbook_id == wordbook.id)
+            .values(unit=db.bindparam('unit'), english=db.bindparam('english'), chinese=db.bindparam('chinese')),
+            [dict(word, word_id=word_id) for word_id, word in updates.items()]
+        )
+        move_words(wordbook.id, {
+            word_id: word['unit'] for word_id, word in updates.items() if word['unit'] != current_units[word_id]
+        })
+    if deletes:
+        delete_words(wordbook.id, deletes)
+    if adds:
+        created_at = datetime.datetime.now()
+        db.session.execute(Word.__table__.insert(), [
+            dict(word, wordbook_id=wordbook.id, created_at=created_at) for word in adds
+        ])
+    if title:
+        wordbook.title = title
+    wordbook.version += 1
+    if updates or deletes or adds:
+        unit_catalog.rebuild(wordbook.id)
+    logger.info('Wordbook %s patched to version %s: %s updated, %s added, %s deleted',
+                wordbook.id, wordbook.version, len(updates), len(adds), len(deletes))
+    return wordbook.version